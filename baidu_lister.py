@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+百度网盘完整文件列表
+按页调用xpan的list（单个目录）或listall（递归，按cursor翻页）直到取完，
+以生成器逐条产出，边取边写JSONL或SQLite，内存占用与文件总数无关
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import requests
+
+from baidu_token_cache import BaiduTokenCache, find_baidu_storage_id
+from openlist_db import DEFAULT_DATA_DIR, get_db
+from request_scheduler import ERROR, OK, THROTTLED, classify_http, get_scheduler
+
+BAIDU_FILE_URL = "https://pan.baidu.com/rest/2.0/xpan/file"
+BAIDU_MULTIMEDIA_URL = "https://pan.baidu.com/rest/2.0/xpan/multimedia"
+
+# list和listall单页最多返回1000条
+PAGE_SIZE = 1000
+
+# 频率限制：HTTP状态是200，错误码在errno里
+ERRNO_RATE_LIMITED = 31034
+
+# 写SQLite时每批提交的条数
+SQLITE_BATCH = 1000
+
+FIELDS = ("fs_id", "path", "server_filename", "isdir", "size",
+          "server_ctime", "server_mtime", "md5", "category")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS baidu_files (
+    fs_id           INTEGER PRIMARY KEY,
+    path            TEXT NOT NULL,
+    server_filename TEXT NOT NULL,
+    isdir           INTEGER NOT NULL,
+    size            INTEGER NOT NULL DEFAULT 0,
+    server_ctime    INTEGER,
+    server_mtime    INTEGER,
+    md5             TEXT,
+    category        INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_baidu_files_path ON baidu_files(path);
+"""
+
+
+def classify_baidu(response: requests.Response) -> str:
+    """百度xpan接口的响应分类：errno=31034是限流，其它非0 errno是业务错误"""
+    if response.status_code != 200:
+        return classify_http(response)
+    try:
+        errno = response.json().get("errno", 0)
+    except ValueError:
+        return ERROR
+    if errno == ERRNO_RATE_LIMITED:
+        return THROTTLED
+    return ERROR if errno else OK
+
+
+def fetch_baidu_page(url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """请求一页；限流由调度器退避重试并降低并发，非0 errno抛出RuntimeError"""
+    response = get_scheduler().request("GET", url, params=params, timeout=30, classify=classify_baidu)
+    response.raise_for_status()
+    data = response.json()
+    errno = data.get("errno", 0)
+    if errno:
+        raise RuntimeError(f"百度API返回错误: errno={errno} {data.get('errmsg', '')}")
+    return data
+
+
+def iter_baidu_files(access_token: str, dir: str = "/", order: str = "name",
+                     desc: bool = False, page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """逐条产出一个目录下的全部文件（method=list，不递归）"""
+    start = 0
+    while True:
+        data = fetch_baidu_page(BAIDU_FILE_URL, {
+            "method": "list",
+            "access_token": access_token,
+            "dir": dir,
+            "order": order,
+            "desc": int(desc),
+            "start": start,
+            "limit": page_size,
+            "web": "web",
+            "folder": "0",
+            "showempty": "0",
+        })
+        items = data.get("list") or []
+        yield from items
+        if len(items) < page_size:
+            return
+        start += len(items)
+
+
+def iter_baidu_listall(access_token: str, path: str = "/", order: str = "name",
+                       desc: bool = False, page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """逐条产出目录下的全部文件，包括所有子目录（method=listall，按cursor翻页）"""
+    cursor = 0
+    while True:
+        data = fetch_baidu_page(BAIDU_MULTIMEDIA_URL, {
+            "method": "listall",
+            "access_token": access_token,
+            "path": path,
+            "recursion": 1,
+            "order": order,
+            "desc": int(desc),
+            "start": cursor,
+            "limit": page_size,
+            "web": "web",
+        })
+        yield from data.get("list") or []
+        if not data.get("has_more"):
+            return
+        next_cursor = data.get("cursor", cursor + page_size)
+        if next_cursor <= cursor:
+            return
+        cursor = next_cursor
+
+
+def _record(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: item.get(field) for field in FIELDS}
+
+
+def write_jsonl(items: Iterable[Dict[str, Any]], stream) -> int:
+    """逐行写出，返回条数"""
+    count = 0
+    for item in items:
+        stream.write(json.dumps(_record(item), ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def write_sqlite(items: Iterable[Dict[str, Any]], path: str, batch_size: int = SQLITE_BATCH) -> int:
+    """分批写入SQLite（按fs_id去重覆盖），返回条数"""
+    db = get_db(path)
+    with db.connection() as conn:
+        conn.executescript(SCHEMA)
+
+    sql = (f"INSERT OR REPLACE INTO baidu_files ({', '.join(FIELDS)}) "
+           f"VALUES ({', '.join('?' for _ in FIELDS)})")
+    count = 0
+    batch = []
+    for item in items:
+        batch.append(tuple(_record(item)[field] for field in FIELDS))
+        if len(batch) >= batch_size:
+            with db.transaction() as conn:
+                conn.executemany(sql, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        with db.transaction() as conn:
+            conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列出百度网盘全部文件")
+    parser.add_argument("dir", nargs="?", default="/", help="起始目录 (默认: /)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="递归列出所有子目录 (listall)")
+    parser.add_argument("--jsonl", default=None, help="输出JSONL文件，'-'表示标准输出 (默认)")
+    parser.add_argument("--sqlite", default=None, help="输出到SQLite数据库")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="OpenList数据目录")
+    parser.add_argument("--storage-id", type=int, default=None, help="百度网盘存储ID (默认第一个)")
+    args = parser.parse_args()
+
+    token_cache = BaiduTokenCache(args.data_dir)
+    storage_id = args.storage_id or find_baidu_storage_id(token_cache.db_path)
+    if storage_id is None:
+        print("❌ 没有找到百度网盘配置", file=sys.stderr)
+        return
+    access_token = token_cache.get_access_token(storage_id)
+    if not access_token:
+        print("❌ 无法获取access_token", file=sys.stderr)
+        return
+
+    if args.recursive:
+        items = iter_baidu_listall(access_token, args.dir)
+    else:
+        items = iter_baidu_files(access_token, args.dir)
+
+    started = time.time()
+    if args.sqlite:
+        count = write_sqlite(items, args.sqlite)
+    elif args.jsonl and args.jsonl != "-":
+        with open(args.jsonl, 'w', encoding='utf-8') as f:
+            count = write_jsonl(items, f)
+    else:
+        count = write_jsonl(items, sys.stdout)
+    print(f"✅ 共 {count} 个文件/文件夹，用时 {time.time() - started:.1f}秒", file=sys.stderr)
+    token_cache.wait()
+
+
+if __name__ == "__main__":
+    main()
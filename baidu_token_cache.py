@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+百度网盘access_token缓存
+按数据库+存储ID缓存access_token及过期时间，跨进程用文件锁保护；
+有效期过了80%时在后台提前刷新，轮换后的refresh_token只由持锁的一个进程写回x_storages
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from openlist_db import DEFAULT_DATA_DIR, get_db
+from request_scheduler import get_scheduler
+
+BAIDU_TOKEN_URL = "https://openapi.baidu.com/oauth/2.0/token"
+TOKEN_CACHE_FILE = os.path.expanduser("~/.openlist_baidu_tokens.json")
+
+# 百度access_token默认有效期30天
+DEFAULT_EXPIRES_IN = 2592000
+
+
+class BaiduTokenCache:
+    """百度access_token缓存
+
+    - 缓存文件 {"<data.db真实路径>|<storage_id>": {access_token, refresh_token, issued_at, expires_at}}，
+      多个OpenList实例共用一个缓存文件时存储ID相同也不会互相覆盖
+    - 读写缓存文件都持有 <缓存文件>.lock 上的flock，刷新全过程持有排他锁，
+      并发运行的工具只有一个会真正调用OAuth接口并写回轮换后的refresh_token
+    - 超过refresh_ratio的有效期后返回现有token，同时启动后台线程刷新；
+      已过期或没有缓存时同步刷新；后台线程不是守护线程，解释器退出前会等它写完
+      轮换后的refresh_token，短命的命令行工具不会因提前退出而丢失新token
+    """
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, db_path: Optional[str] = None,
+                 cache_file: str = TOKEN_CACHE_FILE, refresh_ratio: float = 0.8,
+                 applier=None):
+        self.db_path = db_path or os.path.join(data_dir, "data.db")
+        self.cache_file = cache_file
+        self.lock_file = cache_file + ".lock"
+        self.refresh_ratio = refresh_ratio
+        # 可选的StorageApplier：写回refresh_token后让服务端按新token重新初始化该存储
+        self.applier = applier
+        self._refreshing = set()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True, blocking: bool = True) -> Iterator[bool]:
+        """跨进程文件锁；非阻塞模式下拿不到锁时返回False"""
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            if not blocking:
+                flags |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(fd, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _read_cache(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, cache: Dict[str, Dict[str, Any]]):
+        # 先写临时文件再替换，读者不会看到写了一半的文件
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.chmod(tmp_file, 0o600)
+        os.replace(tmp_file, self.cache_file)
+
+    def _cache_key(self, storage_id: int) -> str:
+        return f"{os.path.realpath(self.db_path)}|{storage_id}"
+
+    def _needs_refresh(self, entry: Dict[str, Any], now: float) -> bool:
+        lifetime = entry["expires_at"] - entry["issued_at"]
+        return now >= entry["issued_at"] + lifetime * self.refresh_ratio
+
+    def get_access_token(self, storage_id: int, force: bool = False) -> Optional[str]:
+        """获取可用的access_token，必要时刷新"""
+        key = self._cache_key(storage_id)
+        with self._file_lock(exclusive=False):
+            entry = self._read_cache().get(key)
+
+        now = time.time()
+        if entry and not force and now < entry["expires_at"]:
+            if self._needs_refresh(entry, now):
+                self.refresh_in_background(storage_id)
+            return entry["access_token"]
+
+        entry = self.refresh(storage_id, force=force)
+        return entry["access_token"] if entry else None
+
+    def refresh_in_background(self, storage_id: int):
+        """后台提前刷新；同一存储在本进程内只有一个刷新线程，其它进程正在刷新时直接跳过"""
+        with self._lock:
+            if storage_id in self._refreshing:
+                return
+            self._refreshing.add(storage_id)
+
+        def run():
+            try:
+                self.refresh(storage_id, blocking=False)
+            except Exception as e:
+                print(f"⚠ 后台刷新百度token失败: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(storage_id)
+
+        thread = threading.Thread(target=run, name=f"baidu-token-{storage_id}")
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        thread.start()
+
+    def wait(self, timeout: Optional[float] = None):
+        """等待进行中的后台刷新完成（命令行工具结束前调用）"""
+        with self._lock:
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout)
+
+    def refresh(self, storage_id: int, force: bool = False,
+                blocking: bool = True) -> Optional[Dict[str, Any]]:
+        """刷新access_token并写回缓存和x_storages
+
+        持有排他锁后重新读取缓存：等锁期间别的进程可能已经刷新过，直接复用其结果。
+        """
+        key = self._cache_key(storage_id)
+        with self._file_lock(exclusive=True, blocking=blocking) as locked:
+            if not locked:
+                return None
+
+            cache = self._read_cache()
+            entry = cache.get(key)
+            now = time.time()
+            if entry and not force and not self._needs_refresh(entry, now):
+                return entry
+
+            addition = self._load_addition(storage_id)
+            if addition is None:
+                print(f"❌ 存储 {storage_id} 不存在")
+                return None
+            # 数据库里的refresh_token可能已被服务端轮换过，以较新的为准
+            refresh_token = addition.get("refresh_token") or (entry or {}).get("refresh_token")
+            client_id = addition.get("client_id")
+            client_secret = addition.get("client_secret")
+            if not refresh_token or not client_id or not client_secret:
+                print(f"❌ 存储 {storage_id} 缺少refresh_token、client_id或client_secret")
+                return None
+
+            data = self._request_token(refresh_token, client_id, client_secret)
+            if not data:
+                return None
+
+            entry = {
+                "access_token": data["access_token"],
+                "refresh_token": data.get("refresh_token", refresh_token),
+                "issued_at": now,
+                "expires_at": now + int(data.get("expires_in", DEFAULT_EXPIRES_IN)),
+            }
+            cache[key] = entry
+            self._write_cache(cache)
+            if entry["refresh_token"] != refresh_token:
+                self._save_refresh_token(storage_id, entry["refresh_token"])
+            return entry
+
+    def _request_token(self, refresh_token: str, client_id: str,
+                       client_secret: str) -> Optional[Dict[str, Any]]:
+        params = {
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": client_id,
+            "client_secret": client_secret,
+        }
+        response = get_scheduler().request("GET", BAIDU_TOKEN_URL, params=params, timeout=10)
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code != 200 or "access_token" not in data:
+            print(f"❌ 刷新百度token失败: {data or response.text}")
+            return None
+        return data
+
+    def _load_addition(self, storage_id: int) -> Optional[Dict[str, Any]]:
+        with get_db(self.db_path).connection() as conn:
+            row = conn.execute("SELECT addition FROM x_storages WHERE id = ?",
+                               (storage_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row["addition"] or "{}")
+
+    def _save_refresh_token(self, storage_id: int, refresh_token: str):
+        """把轮换后的refresh_token写回x_storages（调用方持有排他锁，只有一个写者）"""
+        db = get_db(self.db_path)
+        with db.transaction() as conn:
+            row = conn.execute("SELECT addition FROM x_storages WHERE id = ?",
+                               (storage_id,)).fetchone()
+            if row is None:
+                return
+            addition = json.loads(row["addition"] or "{}")
+            addition["refresh_token"] = refresh_token
+            conn.execute("UPDATE x_storages SET addition = ? WHERE id = ?",
+                         (json.dumps(addition), storage_id))
+        print(f"✓ 存储 {storage_id} 的refresh_token已更新")
+        if self.applier is not None:
+            self.applier.reload(storage_id)
+
+    def expires_at(self, storage_id: int) -> Optional[float]:
+        with self._file_lock(exclusive=False):
+            entry = self._read_cache().get(self._cache_key(storage_id))
+        return entry["expires_at"] if entry else None
+
+
+def find_baidu_storage_id(db_path: str) -> Optional[int]:
+    """返回第一个BaiduNetdisk存储的ID"""
+    with get_db(db_path).connection() as conn:
+        row = conn.execute("SELECT id FROM x_storages WHERE driver = 'BaiduNetdisk' "
+                           "ORDER BY id LIMIT 1").fetchone()
+    return row["id"] if row else None
@@ -181,6 +181,7 @@ class CloudDiskLogin:
                 json.dump(config_output, f, ensure_ascii=False, indent=2)
             print(f"OpenList存储配置已生成到 {output_file}")
             print("您可以将此配置导入到OpenList中使用")
+            print(f"增量应用到OpenList: python3 openlist_reconcile.py {output_file}")
         else:
             print("没有有效的存储配置")
     
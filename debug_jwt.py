@@ -3,11 +3,13 @@
 JWT调试工具 - 分析OpenList的JWT token问题
 """
 
-import requests
+import argparse
 import json
 import base64
 from datetime import datetime
 
+from openlist_client import OpenListClient
+
 BASE_URL = "http://localhost:5244"
 
 def decode_jwt_without_verification(token):
@@ -30,23 +32,14 @@ def decode_jwt_without_verification(token):
     except Exception as e:
         return {'error': str(e)}
 
-def test_jwt_flow():
+def test_jwt_flow(fresh_login=False):
     """测试完整的JWT流程"""
     print("=== JWT Token调试分析 ===\n")
     
-    # 1. 获取token
+    # 1. 获取token（默认复用token缓存，--fresh-login时重新登录）
     print("1. 获取管理员token...")
-    login_response = requests.post(
-        f"{BASE_URL}/api/auth/login",
-        json={"username": "admin", "password": "admin"}
-    )
-    
-    if login_response.status_code != 200:
-        print(f"登录失败: {login_response.text}")
-        return
-    
-    token_data = login_response.json()
-    token = token_data.get("data", {}).get("token") if isinstance(token_data, dict) else None
+    client = OpenListClient(BASE_URL)
+    token = client.fresh_login() if fresh_login else client.token
     
     if not token:
         print("未获取到token")
@@ -73,7 +66,6 @@ def test_jwt_flow():
     
     # 3. 测试token验证
     print("\n3. 测试token验证...")
-    headers = {"Authorization": f"Bearer {token}"}
     
     # 测试多个API端点
     endpoints = [
@@ -88,14 +80,13 @@ def test_jwt_flow():
         try:
             if endpoint == "/api/fs/list":
                 # POST请求
-                response = requests.post(
-                    f"{BASE_URL}{endpoint}",
-                    headers=headers,
+                response = client.raw(
+                    "POST", endpoint,
                     json={"path": "/", "page": 1, "per_page": 10}
                 )
             else:
                 # GET请求
-                response = requests.get(f"{BASE_URL}{endpoint}", headers=headers)
+                response = client.raw("GET", endpoint)
             
             print(f"  状态码: {response.status_code}")
             print(f"  响应: {response.text[:200]}...")
@@ -113,7 +104,7 @@ def test_jwt_flow():
     
     for endpoint in public_endpoints:
         try:
-            response = requests.get(f"{BASE_URL}{endpoint}")
+            response = client.session.get(f"{BASE_URL}{endpoint}", timeout=10)
             print(f"  {endpoint}: 状态码 {response.status_code}")
         except Exception as e:
             print(f"  {endpoint}: 失败 - {e}")
@@ -134,5 +125,8 @@ def analyze_problem():
 """)
 
 if __name__ == "__main__":
-    test_jwt_flow()
+    parser = argparse.ArgumentParser(description="OpenList JWT调试")
+    parser.add_argument("--fresh-login", action="store_true", help="跳过token缓存，重新登录获取新token")
+    args = parser.parse_args()
+    test_jwt_flow(args.fresh_login)
     analyze_problem()
\ No newline at end of file
@@ -3,11 +3,13 @@
 简单的JWT调试工具
 """
 
-import requests
+import argparse
 import json
 import base64
 from datetime import datetime
 
+from openlist_client import OpenListClient
+
 BASE_URL = "http://localhost:5244"
 
 def decode_jwt(token):
@@ -33,21 +35,16 @@ def decode_jwt(token):
         return None
 
 def main():
+    parser = argparse.ArgumentParser(description="简单的JWT调试工具")
+    parser.add_argument("--fresh-login", action="store_true", help="跳过token缓存，重新登录获取新token")
+    args = parser.parse_args()
+
     print("=== JWT调试工具 ===\n")
     
-    # 获取token
+    # 获取token（默认复用token缓存）
     print("1. 获取管理员token...")
-    response = requests.post(
-        f"{BASE_URL}/api/auth/login",
-        json={"username": "admin", "password": "admin"}
-    )
-    
-    if response.status_code != 200:
-        print(f"登录失败: {response.text}")
-        return
-    
-    data = response.json()
-    token = data.get("data", {}).get("token")
+    client = OpenListClient(BASE_URL)
+    token = client.fresh_login() if args.fresh_login else client.token
     
     if not token:
         print("未获取到token")
@@ -71,7 +68,6 @@ def main():
     
     # 测试token
     print("\n3. 测试token验证...")
-    headers = {"Authorization": f"Bearer {token}"}
     
     test_endpoints = [
         ("/api/admin/storage/list", "GET"),
@@ -83,13 +79,12 @@ def main():
         print(f"\n测试 {method} {endpoint}:")
         try:
             if method == "POST":
-                resp = requests.post(
-                    f"{BASE_URL}{endpoint}",
-                    headers=headers,
+                resp = client.raw(
+                    "POST", endpoint,
                     json={"path": "/", "page": 1, "per_page": 10}
                 )
             else:
-                resp = requests.get(f"{BASE_URL}{endpoint}", headers=headers)
+                resp = client.raw("GET", endpoint)
             
             print(f"  状态码: {resp.status_code}")
             result = resp.json()
@@ -4,85 +4,75 @@ OpenList API代理
 绕过JWT认证问题，直接操作数据库
 """
 
-import sqlite3
 import json
 import os
+from contextlib import contextmanager
 from typing import Dict, List, Any
 
+from openlist_db import DEFAULT_DATA_DIR, get_db
+
 class OpenListAPIProxy:
-    def __init__(self, data_dir: str = "/Users/primihub/github/OpenList/data"):
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR):
         self.data_dir = data_dir
         self.db_path = os.path.join(data_dir, "data.db")
+        self.db = get_db(self.db_path)
+    
+    @contextmanager
+    def transaction(self):
+        """批量修改，块内所有操作只提交一次"""
+        with self.db.transaction() as conn:
+            yield conn
         
     def get_storages(self) -> List[Dict[str, Any]]:
         """获取存储列表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, mount_path, driver, addition, status, disabled, remark 
-            FROM x_storages
-            ORDER BY "order"
-        """)
-        
-        storages = []
-        for row in cursor.fetchall():
-            storage = {
-                "id": row[0],
-                "mount_path": row[1],
-                "driver": row[2],
-                "addition": json.loads(row[3]) if row[3] else {},
-                "status": row[4],
-                "disabled": bool(row[5]),
-                "remark": row[6]
-            }
-            storages.append(storage)
+        with self.db.connection() as conn:
+            cursor = conn.execute("""
+                SELECT id, mount_path, driver, addition, status, disabled, remark 
+                FROM x_storages
+                ORDER BY "order"
+            """)
+            
+            storages = []
+            for row in cursor.fetchall():
+                storage = {
+                    "id": row[0],
+                    "mount_path": row[1],
+                    "driver": row[2],
+                    "addition": json.loads(row[3]) if row[3] else {},
+                    "status": row[4],
+                    "disabled": bool(row[5]),
+                    "remark": row[6]
+                }
+                storages.append(storage)
         
-        conn.close()
         return storages
     
     def add_storage(self, mount_path: str, driver: str, addition: Dict, remark: str = "") -> bool:
         """添加存储"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                INSERT INTO x_storages 
-                (mount_path, driver, addition, status, disabled, remark) 
-                VALUES (?, ?, ?, 'work', 0, ?)
-            """, (mount_path, driver, json.dumps(addition), remark))
-            
-            conn.commit()
-            conn.close()
+            with self.db.connection() as conn:
+                conn.execute("""
+                    INSERT INTO x_storages 
+                    (mount_path, driver, addition, status, disabled, remark) 
+                    VALUES (?, ?, ?, 'work', 0, ?)
+                """, (mount_path, driver, json.dumps(addition), remark))
             return True
         except Exception as e:
             print(f"添加存储失败: {e}")
-            conn.rollback()
-            conn.close()
             return False
     
     def delete_storage(self, storage_id: int) -> bool:
         """删除存储"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("DELETE FROM x_storages WHERE id = ?", (storage_id,))
-            conn.commit()
-            conn.close()
+            with self.db.connection() as conn:
+                conn.execute("DELETE FROM x_storages WHERE id = ?", (storage_id,))
             return True
         except Exception as e:
             print(f"删除存储失败: {e}")
-            conn.rollback()
-            conn.close()
             return False
     
     def update_storage(self, storage_id: int, **kwargs) -> bool:
         """更新存储"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
             update_fields = []
             update_values = []
@@ -97,20 +87,16 @@ class OpenListAPIProxy:
             
             if update_fields:
                 update_values.append(storage_id)
-                cursor.execute(f"""
-                    UPDATE x_storages 
-                    SET {', '.join(update_fields)}
-                    WHERE id = ?
-                """, update_values)
-                
-                conn.commit()
+                with self.db.connection() as conn:
+                    conn.execute(f"""
+                        UPDATE x_storages 
+                        SET {', '.join(update_fields)}
+                        WHERE id = ?
+                    """, update_values)
             
-            conn.close()
             return True
         except Exception as e:
             print(f"更新存储失败: {e}")
-            conn.rollback()
-            conn.close()
             return False
 
 def main():
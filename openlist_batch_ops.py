@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+OpenList批量文件操作
+读取操作计划(CSV或JSONL，每行 op, src, dst)，按源目录合并成尽量少的
+/api/fs/move、/copy、/remove、/batch_rename、/regex_rename 请求，各目录并发执行，
+并通过 /api/task/{move,copy}/done 跟踪返回的后台任务直到结束
+
+计划格式:
+    JSONL: {"op": "move", "src": "/local/a/1.jpg", "dst": "/local/b/"}
+    CSV:   op,src,dst
+           rename,/local/a/1.jpg,/local/a/2024-01.jpg
+    dst以/结尾表示目标目录（保留原文件名），否则为目标完整路径；
+    move/copy的文件名不同时，先移动/复制，任务完成后再在目标目录中重命名。
+    regex_rename 行使用 src=目录, dst=正则替换，pattern列(或JSONL的pattern字段)为匹配正则
+"""
+
+import argparse
+import csv
+import json
+import posixpath
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from openlist_client import BASE_URL, OpenListClient
+
+# 单个请求最多携带的文件名数
+MAX_NAMES = 1000
+
+OPS = ("copy", "move", "rename", "regex_rename", "remove")
+
+# tache任务状态
+STATE_SUCCEEDED, STATE_CANCELED, STATE_FAILED = 2, 4, 7
+
+
+def read_plan(path: str) -> Iterable[Dict[str, str]]:
+    """逐条读取计划；.csv按表头解析，其余按JSONL解析"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield json.loads(line)
+
+
+def _split(path: str) -> Tuple[str, str]:
+    path = '/' + path.strip().strip('/')
+    return posixpath.dirname(path), posixpath.basename(path)
+
+
+def _chunks(items: List[Any], size: int = MAX_NAMES) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BatchPlan:
+    """按 (操作, 源目录, 目标目录) 合并的请求"""
+
+    def __init__(self):
+        self.transfers: Dict[str, Dict[Tuple[str, str], List[str]]] = {
+            "copy": OrderedDict(), "move": OrderedDict()}
+        self.renames: Dict[str, List[Tuple[str, str]]] = OrderedDict()
+        self.post_renames: Dict[str, List[Tuple[str, str]]] = OrderedDict()
+        self.regex_renames: List[Dict[str, str]] = []
+        self.removes: Dict[str, List[str]] = OrderedDict()
+        self.operations = 0
+
+    def add(self, entry: Dict[str, str]):
+        op = (entry.get("op") or "move").strip()
+        if op not in OPS:
+            raise ValueError(f"未知的操作: {op}")
+        src = entry.get("src") or ""
+        dst = entry.get("dst") or ""
+        self.operations += 1
+
+        if op == "regex_rename":
+            self.regex_renames.append({"src_dir": '/' + src.strip('/'), "src_name_regex": entry["pattern"],
+                                       "new_name_regex": dst})
+            return
+
+        src_dir, name = _split(src)
+        if op == "remove":
+            self.removes.setdefault(src_dir, []).append(name)
+            return
+
+        if dst.endswith('/'):
+            dst_dir, new_name = '/' + dst.strip('/'), name
+        else:
+            dst_dir, new_name = _split(dst)
+        if op == "rename" or (op == "move" and dst_dir == src_dir):
+            if new_name != name:
+                self.renames.setdefault(src_dir, []).append((name, new_name))
+            return
+
+        self.transfers[op].setdefault((src_dir, dst_dir), []).append(name)
+        if new_name != name:
+            self.post_renames.setdefault(dst_dir, []).append((name, new_name))
+
+    def request_count(self) -> int:
+        count = sum(-(-len(names) // MAX_NAMES) for group in self.transfers.values() for names in group.values())
+        count += sum(-(-len(pairs) // MAX_NAMES) for pairs in self.renames.values())
+        count += sum(-(-len(pairs) // MAX_NAMES) for pairs in self.post_renames.values())
+        count += sum(-(-len(names) // MAX_NAMES) for names in self.removes.values())
+        return count + len(self.regex_renames)
+
+
+class BatchRunner:
+    def __init__(self, client: OpenListClient, workers: int = 4, overwrite: bool = False,
+                 skip_existing: bool = False, poll_interval: float = 2.0,
+                 timeout: Optional[float] = None):
+        self.client = client
+        self.workers = workers
+        self.overwrite = overwrite
+        self.skip_existing = skip_existing
+        self.poll_interval = poll_interval
+        # 等待后台任务的最长时间(秒)，None表示一直等到全部结束
+        self.timeout = timeout
+        # 已提交但还没看到结束的后台任务 {任务类型: {任务ID: 任务名}}，wait_tasks看到结束后移除
+        self.tasks: Dict[str, Dict[str, str]] = {"copy": {}, "move": {}}
+        self.errors: List[str] = []
+        self.requests = 0
+
+    def _call(self, path: str, payload: Dict[str, Any], label: str) -> Dict[str, Any]:
+        self.requests += 1
+        try:
+            data = self.client.post(path, json=payload)
+        except Exception as e:
+            data = {"code": -1, "message": str(e)}
+        if data.get("code") != 200:
+            self.errors.append(f"{label}: {data.get('message')}")
+            print(f"❌ {label}: {data.get('message')}", file=sys.stderr)
+            return {}
+        return data.get("data") or {}
+
+    def _parallel(self, jobs: List[Tuple]):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(lambda job: self._call(*job), jobs))
+
+    def _transfer(self, op: str, src_dir: str, dst_dir: str, names: List[str]):
+        data = self._call(f"/api/fs/{op}", {
+            "src_dir": src_dir, "dst_dir": dst_dir, "names": names,
+            "overwrite": self.overwrite, "skip_existing": self.skip_existing,
+        }, f"{op} {src_dir} -> {dst_dir} ({len(names)}个)")
+        for task in data.get("tasks") or []:
+            self.tasks[op][task["id"]] = task.get("name", "")
+
+    def run_transfers(self, plan: BatchPlan):
+        jobs = [(op, src_dir, dst_dir, chunk)
+                for op, groups in plan.transfers.items()
+                for (src_dir, dst_dir), names in groups.items()
+                for chunk in _chunks(names)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(lambda job: self._transfer(*job), jobs))
+
+    @staticmethod
+    def _rename_jobs(renames: Dict[str, List[Tuple[str, str]]]) -> List[Tuple]:
+        return [("/api/fs/batch_rename",
+                 {"src_dir": src_dir,
+                  "rename_objects": [{"src_name": a, "new_name": b} for a, b in chunk]},
+                 f"rename {src_dir} ({len(chunk)}个)")
+                for src_dir, pairs in renames.items() for chunk in _chunks(pairs)]
+
+    def pending_tasks(self) -> List[Tuple[str, str, str]]:
+        """还没结束的任务 (任务类型, 任务ID, 任务名)"""
+        return [(op, task_id, name) for op, tasks in self.tasks.items() for task_id, name in tasks.items()]
+
+    def wait_tasks(self) -> Dict[str, int]:
+        """轮询已完成任务列表（每种任务一次请求），直到本次提交的任务全部结束或超时
+
+        单次轮询失败（网络错误、响应不是JSON）只打印警告，下一轮继续，直到超时
+        """
+        result = {"succeeded": 0, "failed": 0, "canceled": 0, "unfinished": 0}
+        total = len(self.pending_tasks())
+        interval = self.poll_interval
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while any(self.tasks.values()):
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                interval = min(interval, remaining)
+            time.sleep(interval)
+            for op, pending in self.tasks.items():
+                if not pending:
+                    continue
+                try:
+                    data = self.client.get(f"/api/task/{op}/done")
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"\n⚠ 查询{op}任务状态失败，稍后重试: {e}", file=sys.stderr)
+                    continue
+                for info in data.get("data") or []:
+                    if info["id"] not in pending:
+                        continue
+                    pending.pop(info["id"])
+                    if info["state"] == STATE_SUCCEEDED:
+                        result["succeeded"] += 1
+                    elif info["state"] == STATE_CANCELED:
+                        result["canceled"] += 1
+                    else:
+                        result["failed"] += 1
+                        self.errors.append(f"{op}任务 {info.get('name')}: {info.get('error')}")
+            left = len(self.pending_tasks())
+            print(f"  任务完成 {total - left}/{total}", end="\r", flush=True)
+            interval = min(interval * 1.2, 15)
+        if total:
+            print()
+        for op, task_id, name in self.pending_tasks():
+            self.errors.append(f"{op}任务 {name}: 等待超时")
+        result["unfinished"] = len(self.pending_tasks())
+        return result
+
+    def run(self, plan: BatchPlan) -> Dict[str, Any]:
+        """执行顺序: 原地重命名 -> 复制/移动(等待任务) -> 目标目录重命名 -> 删除 -> 正则重命名"""
+        self._parallel(self._rename_jobs(plan.renames))
+        self.run_transfers(plan)
+        task_result = self.wait_tasks()
+        self._parallel(self._rename_jobs(plan.post_renames))
+        self._parallel([("/api/fs/remove", {"dir": d, "names": chunk}, f"remove {d} ({len(chunk)}个)")
+                        for d, names in plan.removes.items() for chunk in _chunks(names)])
+        self._parallel([("/api/fs/regex_rename", req, f"regex_rename {req['src_dir']}")
+                        for req in plan.regex_renames])
+        return dict(task_result, requests=self.requests, errors=len(self.errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList批量文件操作")
+    parser.add_argument("plan", help="操作计划 (.csv 或 JSONL)")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--workers", type=int, default=4, help="并发请求数")
+    parser.add_argument("--overwrite", action="store_true", help="复制/移动时覆盖已存在的文件")
+    parser.add_argument("--skip-existing", action="store_true", help="复制/移动时跳过已存在的文件")
+    parser.add_argument("--timeout", type=float, default=3600,
+                        help="等待复制/移动任务的最长时间(秒)，0表示不限")
+    parser.add_argument("--dry-run", action="store_true", help="只显示合并后的请求数")
+    args = parser.parse_args()
+
+    plan = BatchPlan()
+    try:
+        for entry in read_plan(args.plan):
+            plan.add(entry)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ 读取计划失败: {e}")
+        sys.exit(1)
+
+    print(f"=== 批量操作: {plan.operations} 个操作，合并为 {plan.request_count()} 个请求 ===")
+    if args.dry_run:
+        return
+
+    client = OpenListClient(args.url, args.username, args.password, pool_size=max(10, args.workers))
+    runner = BatchRunner(client, args.workers, args.overwrite, args.skip_existing,
+                         timeout=args.timeout or None)
+    started = time.time()
+    try:
+        result = runner.run(plan)
+    finally:
+        # 超时、Ctrl+C或异常退出时都列出还没结束的任务，便于到OpenList任务页跟进
+        pending = runner.pending_tasks()
+        if pending:
+            print(f"⚠ {len(pending)} 个任务未结束（后台仍在执行）:")
+            for op, task_id, name in pending:
+                print(f"  {op} {task_id} {name}")
+    print(f"✅ 完成: {result['requests']} 个请求，任务成功 {result['succeeded']}，失败 {result['failed']}，"
+          f"取消 {result['canceled']}，未结束 {result['unfinished']}，请求错误 {result['errors']}，"
+          f"用时 {time.time() - started:.1f}秒")
+    sys.exit(1 if runner.errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+OpenList性能测试脚本共用的小工具
+"""
+
+import statistics
+from typing import List, Tuple
+
+
+def parse_size(value: str) -> int:
+    """解析 16M / 512K / 1G 这样的大小"""
+    value = value.strip().upper().rstrip('B')
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def percentiles(values: List[float]) -> Tuple[float, float]:
+    """(p50, p95)，输入单位秒，返回毫秒"""
+    if not values:
+        return 0.0, 0.0
+    if len(values) == 1:
+        return values[0] * 1000, values[0] * 1000
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49] * 1000, cuts[94] * 1000
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+OpenList API客户端
+共享的keep-alive连接池；登录token按JWT的exp在本地判断是否过期，
+并缓存到文件供后续进程复用，只有临近过期或被服务端拒绝时才重新登录
+"""
+
+import base64
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "http://localhost:5244"
+TOKEN_CACHE_FILE = os.path.expanduser("~/.openlist_admin_token.json")
+
+# 距离过期不足该秒数时提前重新登录
+EXPIRY_MARGIN = 300
+
+
+def decode_jwt_payload(token: str) -> Optional[Dict[str, Any]]:
+    """不验证签名，直接解码JWT的payload"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return None
+
+
+def token_expires_at(token: str) -> Optional[float]:
+    payload = decode_jwt_payload(token)
+    return payload.get("exp") if payload else None
+
+
+class OpenListClient:
+    """带token缓存的OpenList客户端
+
+    - token缓存在token_file中，键为 "地址|用户名"，多个进程共用
+    - 登录前持有 <token_file>.lock 上的排他锁并重新读取缓存，
+      多个进程同时启动时只有一个真正登录
+    - request() 遇到code=401时重新登录并重试一次
+    """
+
+    def __init__(self, base_url: str = BASE_URL, username: str = "admin", password: str = "admin",
+                 token_file: str = TOKEN_CACHE_FILE, timeout: int = 30, pool_size: int = 10):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.token_file = token_file
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._token: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _cache_key(self) -> str:
+        return f"{self.base_url}|{self.username}"
+
+    def _valid(self, token: Optional[str]) -> bool:
+        if not token:
+            return False
+        expires_at = token_expires_at(token)
+        # 解不出exp的token交给服务端判断，401时再重新登录
+        return expires_at is None or expires_at - EXPIRY_MARGIN > time.time()
+
+    def _read_cache(self) -> Dict[str, str]:
+        try:
+            with open(self.token_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, cache: Dict[str, str]):
+        tmp_file = f"{self.token_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.chmod(tmp_file, 0o600)
+        os.replace(tmp_file, self.token_file)
+
+    @property
+    def token(self) -> Optional[str]:
+        """当前可用的token：内存 -> 缓存文件 -> 登录"""
+        if self._valid(self._token):
+            return self._token
+        with self._lock:
+            if self._valid(self._token):
+                return self._token
+            token = self._read_cache().get(self._cache_key())
+            if self._valid(token):
+                self._token = token
+                return token
+            return self._login(stale=token)
+
+    def login(self) -> Optional[str]:
+        """强制重新登录（当前token被服务端拒绝时）"""
+        with self._lock:
+            return self._login(stale=self._token)
+
+    def fresh_login(self) -> Optional[str]:
+        """跳过token缓存直接调用登录接口（诊断登录/JWT问题用），新token只在本客户端内使用"""
+        with self._lock:
+            response = self.session.post(
+                f"{self.base_url}/api/auth/login",
+                json={"username": self.username, "password": self.password},
+                timeout=self.timeout
+            )
+            data = response.json()
+            token = (data.get("data") or {}).get("token") if data.get("code") == 200 else None
+            if not token:
+                print(f"❌ 登录失败: {data.get('message')}")
+                return None
+            self._token = token
+            return token
+
+    def _login(self, stale: Optional[str] = None) -> Optional[str]:
+        fd = os.open(self.token_file + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # 等锁期间其它进程可能已经登录过
+            cache = self._read_cache()
+            token = cache.get(self._cache_key())
+            if token != stale and self._valid(token):
+                self._token = token
+                return token
+
+            response = self.session.post(
+                f"{self.base_url}/api/auth/login",
+                json={"username": self.username, "password": self.password},
+                timeout=self.timeout
+            )
+            data = response.json()
+            token = (data.get("data") or {}).get("token") if data.get("code") == 200 else None
+            if not token:
+                print(f"❌ 登录失败: {data.get('message')}")
+                return None
+
+            self._token = token
+            cache[self._cache_key()] = token
+            try:
+                self._write_cache(cache)
+            except OSError as e:
+                print(f"⚠ 保存token缓存失败: {e}")
+            return token
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def raw(self, method: str, path: str, **kwargs) -> requests.Response:
+        """带认证头发送请求，返回原始响应（用于/d、/p、/dav等非JSON接口）"""
+        token = self.token
+        headers = dict(kwargs.pop("headers", None) or {})
+        if token:
+            headers["Authorization"] = token
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, f"{self.base_url}{path}", headers=headers, **kwargs)
+
+    def request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """调用JSON接口，返回 {"code", "message", "data"}；token失效时重新登录并重试一次"""
+        data = self.raw(method, path, **kwargs).json()
+        if data.get("code") == 401 and self.login():
+            data = self.raw(method, path, **kwargs).json()
+        return data
+
+    def get(self, path: str, **kwargs) -> Dict[str, Any]:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> Dict[str, Any]:
+        return self.request("POST", path, **kwargs)
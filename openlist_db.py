@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+OpenList数据库连接管理
+为直接操作data.db的工具提供连接池、WAL模式和批量事务
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+DEFAULT_DATA_DIR = "/Users/primihub/github/OpenList/data"
+
+
+class OpenListDB:
+    """data.db连接管理器
+
+    - 复用少量连接，避免每次操作都connect/close
+    - 使用WAL日志模式（与OpenList服务端一致），读写互不阻塞
+    - 设置busy_timeout，服务端持有写锁时等待而不是直接报"database is locked"
+    - 连接自带预编译语句缓存(cached_statements)
+    - transaction() 将多次修改合并为一个事务，只提交一次
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 4,
+                 busy_timeout: int = 5000, cached_statements: int = 256):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+        # 当前线程正在进行的事务连接，嵌套调用时复用
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: 由本类显式控制BEGIN/COMMIT
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._pool.get()
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            # 异常退出时不能把未结束的事务还回池中
+            conn.rollback()
+        self._pool.put(conn)
+
+    def in_transaction(self) -> bool:
+        """当前线程是否处于transaction()块内"""
+        return getattr(self._local, "conn", None) is not None
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """获取一个连接；若当前线程处于事务中，则复用该事务的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """批量事务
+
+        with db.transaction():
+            manager.add_storage(...)
+            manager.add_storage(...)
+
+        块内所有修改只在退出时提交一次；出现异常则整体回滚。
+        嵌套调用时加入外层事务。
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            # IMMEDIATE: 开始时即获取写锁，避免事务中途升级锁失败
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def close(self):
+        """关闭池中所有空闲连接"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_managers: Dict[str, OpenListDB] = {}
+_managers_lock = threading.Lock()
+
+
+def get_db(db_path: str, **kwargs) -> OpenListDB:
+    """按数据库路径获取共享的连接管理器，同一进程内的工具共用一个连接池"""
+    with _managers_lock:
+        db = _managers.get(db_path)
+        if db is None:
+            db = OpenListDB(db_path, **kwargs)
+            _managers[db_path] = db
+        return db
+
+
+def close_all(db_path: Optional[str] = None):
+    """关闭共享连接管理器的空闲连接"""
+    with _managers_lock:
+        paths = [db_path] if db_path else list(_managers)
+        for path in paths:
+            db = _managers.pop(path, None)
+            if db is not None:
+                db.close()
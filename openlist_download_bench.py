@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+OpenList下载吞吐测试
+通过 /d/*path（直链，可能302跳转）和 /p/*path（服务端代理）下载同一个文件，
+分别测试单连接和N路Range并发，统计MB/s、首字节时间(TTFB)和每GB消耗的CPU，
+可选校验SHA256，用于比较代理/跳转模式和发现吞吐回退
+
+建议使用Local驱动的挂载，例如:
+    python3 openlist_download_bench.py /local/big.iso --streams 1,4,8 --local-file /data/big.iso
+"""
+
+import argparse
+import hashlib
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import requests
+
+from openlist_client import BASE_URL, OpenListClient
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """读取其它进程(OpenList服务)累计的CPU时间，ps的time格式为 [[dd-]hh:]mm:ss"""
+    try:
+        value = subprocess.run(["ps", "-o", "time=", "-p", str(pid)],
+                               capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+    if not value:
+        return None
+    days, _, value = value.rpartition('-')
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds + int(days or 0) * 86400
+
+
+class DownloadBench:
+    def __init__(self, client: OpenListClient, path: str, verify_sha256: Optional[str] = None,
+                 server_pid: Optional[int] = None):
+        self.client = client
+        self.path = path
+        self.verify_sha256 = verify_sha256
+        self.server_pid = server_pid
+
+        data = client.post("/api/fs/get", json={"path": path})
+        if data.get("code") != 200:
+            raise RuntimeError(f"获取文件信息失败: {data.get('message')}")
+        info = data["data"]
+        if info.get("is_dir"):
+            raise RuntimeError(f"{path} 是目录")
+        self.size = info["size"]
+        self.sign = info.get("sign", "")
+
+    def url_path(self, mode: str) -> str:
+        return f"/{mode}{quote(self.path)}"
+
+    def _params(self) -> Optional[Dict[str, str]]:
+        return {"sign": self.sign} if self.sign else None
+
+    def _fetch(self, mode: str, start: int, end: int, ttfb: List[float], began: float,
+               out_fd: Optional[int] = None, digest=None) -> int:
+        """下载[start, end]区间；out_fd不为空时按偏移写入文件，digest不为空时流式计算摘要"""
+        headers = {"Range": f"bytes={start}-{end}"} if (start, end) != (0, self.size - 1) else {}
+        with self.client.raw("GET", self.url_path(mode), params=self._params(),
+                             headers=headers, stream=True) as response:
+            if response.status_code >= 400:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            if headers and response.status_code != 206:
+                raise RuntimeError("服务端不支持Range请求")
+            received = 0
+            offset = start
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if not received:
+                    ttfb.append(time.perf_counter() - began)
+                received += len(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                if out_fd is not None:
+                    os.pwrite(out_fd, chunk, offset)
+                    offset += len(chunk)
+            return received
+
+    def run(self, mode: str, streams: int) -> Dict[str, Any]:
+        """下载一次整个文件；streams>1时切成等长区间并发Range下载"""
+        streams = max(1, min(streams, self.size or 1))
+        part = -(-self.size // streams)
+        ranges = [(i, min(i + part, self.size) - 1) for i in range(0, self.size, part)] or [(0, -1)]
+
+        verify = self.verify_sha256 is not None
+        digest = hashlib.sha256() if verify and streams == 1 else None
+        tmp = tempfile.NamedTemporaryFile(delete=False) if verify and streams > 1 else None
+        out_fd = os.open(tmp.name, os.O_WRONLY) if tmp else None
+
+        ttfb: List[float] = []
+        server_cpu = process_cpu_seconds(self.server_pid) if self.server_pid else None
+        cpu = time.process_time()
+        began = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=streams) as executor:
+                futures = [executor.submit(self._fetch, mode, start, end, ttfb, began, out_fd, digest)
+                           for start, end in ranges]
+                received = sum(f.result() for f in futures)
+            elapsed = time.perf_counter() - began
+            cpu = time.process_time() - cpu
+            if server_cpu is not None:
+                server_cpu = process_cpu_seconds(self.server_pid) - server_cpu
+
+            checksum_ok = None
+            if verify:
+                # 多路下载写入临时文件后再计算，不计入下载时间
+                actual = digest.hexdigest() if digest else file_sha256(tmp.name)
+                checksum_ok = actual == self.verify_sha256
+        finally:
+            if out_fd is not None:
+                os.close(out_fd)
+            if tmp:
+                tmp.close()
+                os.unlink(tmp.name)
+
+        gb = received / 1024**3 or 1e-9
+        return {
+            "mode": mode,
+            "streams": streams,
+            "bytes": received,
+            "seconds": elapsed,
+            "mb_per_s": received / elapsed / 1024**2 if elapsed else 0,
+            "ttfb_ms": min(ttfb) * 1000 if ttfb else None,
+            "client_cpu_per_gb": cpu / gb,
+            "server_cpu_per_gb": server_cpu / gb if server_cpu is not None else None,
+            "checksum_ok": checksum_ok,
+        }
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """多次运行取中位数"""
+    summary = dict(results[0])
+    for key in ("seconds", "mb_per_s", "ttfb_ms", "client_cpu_per_gb", "server_cpu_per_gb"):
+        values = [r[key] for r in results if r[key] is not None]
+        summary[key] = statistics.median(values) if values else None
+    checks = [r["checksum_ok"] for r in results if r["checksum_ok"] is not None]
+    summary["checksum_ok"] = all(checks) if checks else None
+    return summary
+
+
+def _fmt(value: Optional[float], digits: int = 2) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList下载吞吐测试 (/d 与 /p)")
+    parser.add_argument("path", help="OpenList中的文件路径，建议位于Local驱动挂载下")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--modes", default="d,p", help="测试的下载入口 (默认: d,p)")
+    parser.add_argument("--streams", default="1,4", help="并发Range连接数列表 (默认: 1,4)")
+    parser.add_argument("--runs", type=int, default=3, help="每种组合运行次数，取中位数")
+    parser.add_argument("--sha256", default=None, help="期望的SHA256，下载后校验")
+    parser.add_argument("--local-file", default=None, help="本地源文件，用其SHA256校验下载结果")
+    parser.add_argument("--server-pid", type=int, default=None, help="OpenList进程PID，统计服务端CPU")
+    args = parser.parse_args()
+
+    print("=== OpenList 下载吞吐测试 ===")
+    stream_counts = [int(n) for n in args.streams.split(',') if n.strip()]
+    expected = args.sha256
+    if args.local_file:
+        expected = file_sha256(args.local_file)
+
+    client = OpenListClient(args.url, args.username, args.password, pool_size=max(10, *stream_counts))
+    try:
+        bench = DownloadBench(client, args.path, expected, args.server_pid)
+    except (RuntimeError, requests.exceptions.RequestException) as e:
+        print(f"❌ {e}")
+        return
+    print(f"文件: {args.path} ({bench.size / 1024**2:.1f} MB)")
+
+    print(f"\n{'入口':<6}{'连接':>5}{'MB/s':>10}{'TTFB(ms)':>10}{'客户端CPU/GB':>14}"
+          f"{'服务端CPU/GB':>14}{'校验':>6}")
+    for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+        for streams in stream_counts:
+            try:
+                results = [bench.run(mode, streams) for _ in range(args.runs)]
+            except (RuntimeError, requests.exceptions.RequestException) as e:
+                print(f"/{mode:<5}{streams:>5}  ❌ {e}")
+                continue
+            s = summarize(results)
+            checksum = {True: "✓", False: "✗", None: "-"}[s["checksum_ok"]]
+            print(f"/{mode:<5}{s['streams']:>5}{_fmt(s['mb_per_s']):>10}{_fmt(s['ttfb_ms'], 1):>10}"
+                  f"{_fmt(s['client_cpu_per_gb']):>14}{_fmt(s['server_cpu_per_gb']):>14}{checksum:>6}")
+
+
+if __name__ == "__main__":
+    main()
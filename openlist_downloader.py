@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+OpenList并发分块下载
+用/api/fs/get解析文件，按Range切块并发下载，用os.pwrite直接写入预分配的文件，
+不在内存中缓存整块数据；进度记录在旁路的检查点文件中，中断后再次运行从未完成的块继续
+
+    python3 openlist_downloader.py /local/big.iso ./big.iso --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+from urllib.parse import quote
+
+import requests
+
+from openlist_client import BASE_URL, OpenListClient
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+# fs/get返回的hash_info中可以校验的算法
+HASH_ALGORITHMS = ("sha256", "sha1", "md5")
+
+
+class Checkpoint:
+    """<目标文件>.part.json：记录已写入磁盘的块，只在块的数据fsync之后才记为完成
+
+    同时记录远端文件的修改时间和哈希，远端文件在两次运行之间被替换时不会拼接新旧内容
+    """
+
+    def __init__(self, path: str, remote_path: str, size: int, chunk_size: int,
+                 modified: Optional[str] = None, hash_info: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.meta = {"remote_path": remote_path, "size": size, "chunk_size": chunk_size,
+                     "modified": modified, "hash_info": hash_info or None}
+        self.done: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """读取已有检查点；远端文件已变化或分块参数不一致时返回False（需要重新下载）"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        changed = [key for key, value in self.meta.items() if data.get(key) != value]
+        if changed:
+            print(f"⚠ 检查点已失效(变化: {', '.join(changed)})，重新下载")
+            return False
+        self.done = set(data.get("done", []))
+        return True
+
+    def mark_done(self, index: int):
+        with self._lock:
+            self.done.add(index)
+            tmp_file = self.path + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(dict(self.meta, done=sorted(self.done)), f)
+            os.replace(tmp_file, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ChunkedDownloader:
+    def __init__(self, client: OpenListClient, workers: int = 8, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 mode: str = "d", retries: int = 5):
+        self.client = client
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.retries = retries
+        self.downloaded = 0
+        self._lock = threading.Lock()
+
+    def resolve(self, remote_path: str) -> Dict[str, Any]:
+        data = self.client.post("/api/fs/get", json={"path": remote_path})
+        if data.get("code") != 200:
+            raise RuntimeError(f"获取文件信息失败: {data.get('message')}")
+        info = data["data"]
+        if info.get("is_dir"):
+            raise RuntimeError(f"{remote_path} 是目录")
+        return info
+
+    def _get(self, remote_path: str, sign: str, start: int, end: int) -> requests.Response:
+        params = {"sign": sign} if sign else None
+        return self.client.raw("GET", f"/{self.mode}{quote(remote_path)}", params=params,
+                               headers={"Range": f"bytes={start}-{end}"}, stream=True)
+
+    def _fetch_chunk(self, fd: int, remote_path: str, sign: str, start: int, end: int):
+        """下载[start, end]并按偏移写入；中途断开时从已写到的位置继续请求"""
+        offset = start
+        for attempt in range(self.retries + 1):
+            try:
+                with self._get(remote_path, sign, offset, end) as response:
+                    if response.status_code != 206:
+                        raise RuntimeError(f"Range请求返回 HTTP {response.status_code}")
+                    for data in response.iter_content(READ_SIZE):
+                        data = data[:end + 1 - offset]
+                        os.pwrite(fd, data, offset)
+                        offset += len(data)
+                        with self._lock:
+                            self.downloaded += len(data)
+                if offset > end:
+                    return
+                raise RuntimeError(f"块 {start}-{end} 提前结束于 {offset}")
+            except (requests.exceptions.RequestException, RuntimeError) as e:
+                if attempt == self.retries:
+                    raise
+                print(f"⚠ 块 {start}-{end} 下载失败，重试({attempt + 1}/{self.retries}): {e}", file=sys.stderr)
+                time.sleep(min(2 ** attempt, 30))
+
+    def download(self, remote_path: str, dest: str, verify_hash: bool = True) -> bool:
+        info = self.resolve(remote_path)
+        size = info["size"]
+        sign = info.get("sign", "")
+        part_file = dest + ".part"
+        checkpoint = Checkpoint(part_file + ".json", remote_path, size, self.chunk_size,
+                                info.get("modified"), info.get("hash_info"))
+
+        resumed = os.path.exists(part_file) and checkpoint.load()
+        fd = os.open(part_file, os.O_RDWR | os.O_CREAT | (0 if resumed else os.O_TRUNC), 0o644)
+        try:
+            if not resumed:
+                # 预分配，避免边写边扩展文件造成碎片和元数据开销
+                if hasattr(os, "posix_fallocate") and size:
+                    os.posix_fallocate(fd, 0, size)
+                else:
+                    os.ftruncate(fd, size)
+
+            chunks = [(i, start, min(start + self.chunk_size, size) - 1)
+                      for i, start in enumerate(range(0, size, self.chunk_size))]
+            pending = [c for c in chunks if c[0] not in checkpoint.done]
+            done_bytes = sum(end - start + 1 for i, start, end in chunks if i in checkpoint.done)
+            if resumed:
+                print(f"✓ 从检查点继续：已完成 {len(chunks) - len(pending)}/{len(chunks)} 块")
+
+            def run(chunk):
+                index, start, end = chunk
+                self._fetch_chunk(fd, remote_path, sign, start, end)
+                os.fsync(fd)
+                checkpoint.mark_done(index)
+
+            started = time.time()
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(run, chunk) for chunk in pending]
+                while any(not f.done() for f in futures):
+                    time.sleep(1)
+                    self._print_progress(done_bytes, size, started)
+                for f in futures:
+                    f.result()
+            self._print_progress(done_bytes, size, started, end="\n")
+
+            actual = os.fstat(fd).st_size
+            if actual != size:
+                print(f"❌ 文件大小不一致: {actual} != {size}")
+                return False
+        finally:
+            os.close(fd)
+
+        if verify_hash and not self._verify_hash(part_file, info):
+            return False
+
+        os.replace(part_file, dest)
+        checkpoint.remove()
+        print(f"✅ 已下载到 {dest}")
+        return True
+
+    def _print_progress(self, done_bytes: int, size: int, started: float, end: str = "\r"):
+        elapsed = time.time() - started or 1e-9
+        current = done_bytes + self.downloaded
+        percent = current / size * 100 if size else 100
+        print(f"  {current / 1024**2:.1f}/{size / 1024**2:.1f} MB ({percent:.1f}%) "
+              f"{self.downloaded / elapsed / 1024**2:.1f} MB/s", end=end, flush=True)
+
+    def _verify_hash(self, path: str, info: Dict[str, Any]) -> bool:
+        """服务端提供了文件哈希时校验内容"""
+        hash_info = info.get("hash_info") or {}
+        for algorithm in HASH_ALGORITHMS:
+            expected = hash_info.get(algorithm)
+            if not expected:
+                continue
+            digest = hashlib.new(algorithm)
+            with open(path, 'rb') as f:
+                for data in iter(lambda: f.read(READ_SIZE), b''):
+                    digest.update(data)
+            if digest.hexdigest().lower() != expected.lower():
+                print(f"❌ {algorithm}校验失败")
+                return False
+            print(f"✓ {algorithm}校验通过")
+            return True
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList并发分块下载")
+    parser.add_argument("path", help="OpenList中的文件路径")
+    parser.add_argument("dest", nargs="?", default=None, help="保存路径 (默认: 当前目录下同名文件)")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--workers", type=int, default=8, help="并发连接数")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE // 1024**2, help="分块大小(MB)")
+    parser.add_argument("--proxy", action="store_true", help="通过 /p 代理下载（默认 /d）")
+    parser.add_argument("--no-verify", action="store_true", help="不校验文件哈希")
+    args = parser.parse_args()
+
+    dest = args.dest or os.path.basename(args.path.rstrip('/'))
+    if os.path.isdir(dest):
+        dest = os.path.join(dest, os.path.basename(args.path.rstrip('/')))
+
+    client = OpenListClient(args.url, args.username, args.password, pool_size=max(10, args.workers))
+    downloader = ChunkedDownloader(client, args.workers, args.chunk_size * 1024**2,
+                                   mode="p" if args.proxy else "d")
+    try:
+        ok = downloader.download(args.path, dest, verify_hash=not args.no_verify)
+    except (RuntimeError, requests.exceptions.RequestException) as e:
+        print(f"\n❌ 下载失败: {e}")
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
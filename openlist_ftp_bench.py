@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+OpenList FTP/SFTP并发测试
+同时建立N个FTP和SFTP会话（同时连接，测量建立连接+登录的延迟），
+所有会话就绪后一起执行列目录、下载或上传负载，统计每个会话和总体的吞吐
+
+使用OpenList的用户名密码登录；服务端需在配置中启用 ftp / sftp (默认端口5221 / 5222)
+SFTP依赖paramiko (pip install -r requirements.txt)
+
+    python3 openlist_ftp_bench.py --dir /local/ftpbench --sessions 1,8,32 --workload mixed
+"""
+
+import argparse
+import ftplib
+import io
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+import paramiko
+
+from openlist_bench_utils import parse_size
+from openlist_client import BASE_URL, OpenListClient
+
+DEFAULT_PORTS = {"ftp": 5221, "sftp": 5222}
+WORKLOADS = ("list", "get", "put", "mixed")
+CHUNK_SIZE = 256 * 1024
+SAMPLE_FILE = "sample.bin"
+UPLOAD_DIR = "uploads"
+
+
+class FTPSession:
+    def __init__(self, host: str, port: int, username: str, password: str, timeout: float = 60):
+        self.ftp = ftplib.FTP(timeout=timeout)
+        self.ftp.connect(host, port)
+        self.ftp.login(username, password)
+        self.ftp.voidcmd("TYPE I")
+
+    def listdir(self, path: str) -> int:
+        lines: List[str] = []
+        self.ftp.retrlines(f"LIST {path}", lines.append)
+        return len(lines)
+
+    def download(self, path: str) -> int:
+        received = 0
+
+        def consume(chunk: bytes):
+            nonlocal received
+            received += len(chunk)
+
+        self.ftp.retrbinary(f"RETR {path}", consume, blocksize=CHUNK_SIZE)
+        return received
+
+    def upload(self, path: str, payload: bytes) -> int:
+        self.ftp.storbinary(f"STOR {path}", io.BytesIO(payload), blocksize=CHUNK_SIZE)
+        return len(payload)
+
+    def close(self):
+        try:
+            self.ftp.quit()
+        except (OSError, ftplib.Error):
+            self.ftp.close()
+
+
+class SFTPSession:
+    def __init__(self, host: str, port: int, username: str, password: str, timeout: float = 60):
+        self.transport = paramiko.Transport((host, port))
+        self.transport.banner_timeout = timeout
+        self.transport.connect(username=username, password=password)
+        self.sftp = paramiko.SFTPClient.from_transport(self.transport)
+
+    def listdir(self, path: str) -> int:
+        return len(self.sftp.listdir_attr(path))
+
+    def download(self, path: str) -> int:
+        received = 0
+        with self.sftp.open(path, 'rb') as f:
+            # 预取：并发发出多个读请求，否则吞吐受往返延迟限制
+            f.prefetch()
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                received += len(chunk)
+        return received
+
+    def upload(self, path: str, payload: bytes) -> int:
+        with self.sftp.open(path, 'wb') as f:
+            # 流水线写入，不逐个等待服务端确认
+            f.set_pipelined(True)
+            for i in range(0, len(payload), CHUNK_SIZE):
+                f.write(payload[i:i + CHUNK_SIZE])
+        return len(payload)
+
+    def close(self):
+        self.sftp.close()
+        self.transport.close()
+
+
+SESSIONS = {"ftp": FTPSession, "sftp": SFTPSession}
+
+
+class SessionBench:
+    def __init__(self, protocol: str, host: str, port: int, username: str, password: str,
+                 directory: str, payload: bytes):
+        self.protocol = protocol
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.directory = directory.rstrip('/')
+        self.payload = payload
+
+    def _operation(self, session, workload: str, index: int, op: int) -> int:
+        if workload == "mixed":
+            workload = ("list", "get", "put")[op % 3]
+        if workload == "list":
+            session.listdir(self.directory)
+            return 0
+        if workload == "get":
+            return session.download(f"{self.directory}/{SAMPLE_FILE}")
+        return session.upload(f"{self.directory}/{UPLOAD_DIR}/{self.protocol}_{index}_{op}.bin", self.payload)
+
+    def _session(self, index: int, workload: str, ops: int, barrier: threading.Barrier) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"setup": None, "ops": 0, "bytes": 0, "seconds": 0.0,
+                                  "latencies": [], "error": None}
+        session = None
+        began = time.perf_counter()
+        try:
+            session = SESSIONS[self.protocol](self.host, self.port, self.username, self.password)
+            result["setup"] = time.perf_counter() - began
+        except (OSError, EOFError, ftplib.Error, paramiko.SSHException) as e:
+            result["error"] = f"连接失败: {e}"
+        # 连接失败的会话也要到达屏障，否则其它会话会一直等待
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        if session is None:
+            return result
+
+        began = time.perf_counter()
+        try:
+            for op in range(ops):
+                op_began = time.perf_counter()
+                result["bytes"] += self._operation(session, workload, index, op)
+                result["latencies"].append(time.perf_counter() - op_began)
+                result["ops"] += 1
+        except (OSError, EOFError, ftplib.Error, paramiko.SSHException) as e:
+            result["error"] = str(e)
+        finally:
+            result["seconds"] = time.perf_counter() - began
+            session.close()
+        return result
+
+    def run(self, sessions: int, workload: str, ops: int) -> Dict[str, Any]:
+        barrier = threading.Barrier(sessions, timeout=300)
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            results = list(executor.map(lambda i: self._session(i, workload, ops, barrier), range(sessions)))
+        wall = time.perf_counter() - began
+
+        setups = sorted(r["setup"] for r in results if r["setup"] is not None)
+        latencies = sorted(lat for r in results for lat in r["latencies"])
+        per_session = [r["bytes"] / r["seconds"] / 1024**2 for r in results if r["seconds"]]
+        workload_wall = max((r["seconds"] for r in results), default=0)
+        total_bytes = sum(r["bytes"] for r in results)
+        total_ops = sum(r["ops"] for r in results)
+        errors = [r["error"] for r in results if r["error"]]
+        return {
+            "protocol": self.protocol,
+            "sessions": sessions,
+            "workload": workload,
+            "connected": len(setups),
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "setup_p50_ms": statistics.median(setups) * 1000 if setups else None,
+            "setup_max_ms": setups[-1] * 1000 if setups else None,
+            "ops": total_ops,
+            "ops_per_s": total_ops / workload_wall if workload_wall else 0,
+            "mb_per_s": total_bytes / workload_wall / 1024**2 if workload_wall else 0,
+            "op_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+            "session_mb_per_s_min": min(per_session) if per_session else 0,
+            "session_mb_per_s_median": statistics.median(per_session) if per_session else 0,
+            "session_mb_per_s_max": max(per_session) if per_session else 0,
+            "wall_seconds": wall,
+        }
+
+
+def prepare(client: OpenListClient, directory: str, payload: bytes):
+    """通过REST接口准备测试目录和下载用的样本文件"""
+    client.post("/api/fs/mkdir", json={"path": f"{directory}/{UPLOAD_DIR}"})
+    data = client.post("/api/fs/get", json={"path": f"{directory}/{SAMPLE_FILE}"})
+    if data.get("code") == 200 and data["data"].get("size") == len(payload):
+        return
+    response = client.raw("PUT", "/api/fs/put", data=payload, headers={
+        "File-Path": quote(f"{directory}/{SAMPLE_FILE}"), "Content-Type": "application/octet-stream",
+        "Content-Length": str(len(payload)), "Overwrite": "true",
+    })
+    if response.json().get("code") != 200:
+        raise RuntimeError(f"上传样本文件失败: {response.json().get('message')}")
+
+
+def _fmt(value: Optional[float], digits: int = 1) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_results(rows: List[Dict[str, Any]]):
+    print(f"\n{'协议':<6}{'会话':>5}{'成功':>5}{'错误':>5}{'建连p50':>9}{'建连max':>9}{'ops/s':>9}{'MB/s':>9}"
+          f"{'操作p50':>9}{'单会话MB/s 最小/中位/最大':>28}")
+    for r in rows:
+        per_session = (f"{r['session_mb_per_s_min']:.1f}/{r['session_mb_per_s_median']:.1f}/"
+                       f"{r['session_mb_per_s_max']:.1f}")
+        print(f"{r['protocol']:<6}{r['sessions']:>5}{r['connected']:>5}{r['errors']:>5}"
+              f"{_fmt(r['setup_p50_ms']):>9}{_fmt(r['setup_max_ms']):>9}{r['ops_per_s']:>9.1f}"
+              f"{r['mb_per_s']:>9.1f}{_fmt(r['op_p50_ms']):>9}{per_session:>28}")
+        if r["first_error"]:
+            print(f"      ⚠ {r['first_error']}")
+    print("  (延迟单位: 毫秒)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList FTP/SFTP并发测试")
+    parser.add_argument("--dir", required=True, help="OpenList中用于测试的目录，建议位于Local驱动挂载下")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址（准备测试数据）")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--host", default=None, help="FTP/SFTP主机 (默认取自--url)")
+    parser.add_argument("--ftp-port", type=int, default=DEFAULT_PORTS["ftp"])
+    parser.add_argument("--sftp-port", type=int, default=DEFAULT_PORTS["sftp"])
+    parser.add_argument("--protocols", default="ftp,sftp", help="测试的协议")
+    parser.add_argument("--sessions", default="1,8,32", help="并发会话数列表")
+    parser.add_argument("--workload", default="mixed", choices=WORKLOADS, help="每个会话执行的负载")
+    parser.add_argument("--ops", type=int, default=9, help="每个会话的操作次数")
+    parser.add_argument("--file-size", default="8M", help="下载/上传的文件大小")
+    parser.add_argument("--keep", action="store_true", help="保留上传的文件")
+    parser.add_argument("--json", default=None, help="同时把结果写入JSON文件")
+    args = parser.parse_args()
+
+    print("=== OpenList FTP/SFTP 并发测试 ===")
+    host = args.host or urlsplit(args.url).hostname
+    directory = '/' + args.dir.strip('/')
+    payload = os.urandom(parse_size(args.file_size))
+    client = OpenListClient(args.url, args.username, args.password)
+    if not client.token:
+        return
+    try:
+        prepare(client, directory, payload)
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return
+
+    ports = {"ftp": args.ftp_port, "sftp": args.sftp_port}
+    rows = []
+    try:
+        for protocol in [p.strip() for p in args.protocols.split(',') if p.strip()]:
+            bench = SessionBench(protocol, host, ports[protocol], args.username, args.password,
+                                 directory, payload)
+            for sessions in [int(n) for n in args.sessions.split(',') if n.strip()]:
+                print(f"  {protocol}: {sessions} 个会话...", end="\r", flush=True)
+                rows.append(bench.run(sessions, args.workload, args.ops))
+    finally:
+        if not args.keep:
+            client.post("/api/fs/remove", json={"dir": directory, "names": [UPLOAD_DIR]})
+    print_results(rows)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+OpenList搜索索引管理
+触发全量构建或按路径增量更新索引，轮询 /api/admin/index/progress 显示速度和预计剩余时间；
+并可在同一份数据上切换索引后端(database/bleve/meilisearch...)，用一组查询对比 /api/fs/search 的延迟
+
+    python3 openlist_index.py build --wait
+    python3 openlist_index.py update /local/photos --wait
+    python3 openlist_index.py bench queries.txt --backends database,bleve
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from openlist_client import BASE_URL, OpenListClient
+
+SEARCH_INDEX_KEY = "search_index"
+BACKENDS = ("database", "database_non_full_text", "bleve", "meilisearch")
+
+
+class IndexManager:
+    def __init__(self, client: OpenListClient):
+        self.client = client
+
+    def _call(self, path: str, **kwargs) -> Dict[str, Any]:
+        data = self.client.post(path, **kwargs)
+        if data.get("code") != 200:
+            raise RuntimeError(f"{path}: {data.get('message')}")
+        return data.get("data") or {}
+
+    def progress(self) -> Dict[str, Any]:
+        data = self.client.get("/api/admin/index/progress")
+        if data.get("code") != 200:
+            raise RuntimeError(f"获取索引进度失败: {data.get('message')}")
+        return data.get("data") or {}
+
+    def build(self):
+        """清空后从 / 全量重建"""
+        self._call("/api/admin/index/build")
+
+    def update(self, paths: List[str], max_depth: int = -1):
+        """只重建指定路径（当前索引需支持自动更新）"""
+        self._call("/api/admin/index/update", json={"paths": paths, "max_depth": max_depth})
+
+    def stop(self):
+        self._call("/api/admin/index/stop")
+
+    def clear(self):
+        self._call("/api/admin/index/clear")
+
+    def get_backend(self) -> str:
+        data = self.client.get("/api/admin/setting/get", params={"key": SEARCH_INDEX_KEY})
+        if data.get("code") != 200:
+            raise RuntimeError(f"读取索引设置失败: {data.get('message')}")
+        return data["data"]["value"]
+
+    def set_backend(self, backend: str):
+        """切换索引后端，服务端保存设置后会重新初始化搜索"""
+        data = self.client.get("/api/admin/setting/get", params={"key": SEARCH_INDEX_KEY})
+        if data.get("code") != 200:
+            raise RuntimeError(f"读取索引设置失败: {data.get('message')}")
+        item = dict(data["data"], value=backend)
+        self._call("/api/admin/setting/save", json=[item])
+
+    def wait(self, previous: Optional[Dict[str, Any]] = None, expected: Optional[int] = None,
+             min_interval: float = 0.5, max_interval: float = 10.0) -> Dict[str, Any]:
+        """轮询进度直到完成；进度不变时逐渐拉长轮询间隔
+
+        previous为触发前的进度：触发后服务端可能还没写入新进度，
+        只有last_done_time变化（或出错）才算本次构建完成。
+        expected为预计对象总数（默认取上一次完成时的数量），用于估算剩余时间。
+        """
+        previous = previous or {}
+        expected = expected or previous.get("obj_count") or None
+        started = time.time()
+        last_count, last_time = 0, started
+        rate = 0.0
+        interval = min_interval
+
+        while True:
+            time.sleep(interval)
+            progress = self.progress()
+            now = time.time()
+            if progress.get("error"):
+                print()
+                raise RuntimeError(f"索引构建出错: {progress['error']}")
+            finished = progress.get("is_done") and progress.get("last_done_time") != previous.get("last_done_time")
+
+            count = progress.get("obj_count", 0)
+            if count != last_count and now > last_time:
+                # 指数滑动平均，避免速度显示来回跳
+                current = (count - last_count) / (now - last_time)
+                rate = current if not rate else rate * 0.7 + current * 0.3
+                last_count, last_time = count, now
+                interval = min_interval
+            else:
+                interval = min(interval * 1.5, max_interval)
+
+            eta = ""
+            if expected and rate and count < expected:
+                eta = f"，预计剩余 {(expected - count) / rate:.0f}秒"
+            print(f"  已索引 {count} 个对象，{rate:.0f} 个/秒，用时 {now - started:.0f}秒{eta}    ",
+                  end="\r", flush=True)
+            if finished:
+                print(f"\n✅ 索引完成: {count} 个对象，用时 {now - started:.1f}秒")
+                return progress
+
+
+def load_queries(path: str) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def bench_search(client: OpenListClient, queries: List[str], parent: str = "/", runs: int = 3,
+                 concurrency: int = 1, per_page: int = 100) -> Dict[str, Any]:
+    """对每个查询运行runs次，统计延迟分布和命中数"""
+    def search(keywords: str):
+        began = time.perf_counter()
+        data = client.post("/api/fs/search", json={
+            "parent": parent, "keywords": keywords, "scope": 0, "page": 1, "per_page": per_page,
+        })
+        elapsed = time.perf_counter() - began
+        if data.get("code") != 200:
+            return elapsed, None
+        return elapsed, (data.get("data") or {}).get("total", 0)
+
+    jobs = [q for _ in range(runs) for q in queries]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(search, jobs))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(r[0] for r in results)
+    errors = sum(1 for r in results if r[1] is None)
+    hits = {q: r[1] for q, r in zip(jobs, results) if r[1] is not None}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "queries": len(jobs),
+        "errors": errors,
+        "qps": len(jobs) / wall if wall else 0,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "hits": sum(hits.values()),
+    }
+
+
+def print_bench(results: Dict[str, Dict[str, Any]]):
+    print(f"\n{'后端':<24}{'查询':>6}{'错误':>6}{'QPS':>8}{'平均':>8}{'p50':>8}{'p95':>8}{'p99':>8}"
+          f"{'max':>8}{'命中':>8}  (ms)")
+    for backend, r in results.items():
+        print(f"{backend:<24}{r['queries']:>6}{r['errors']:>6}{r['qps']:>8.1f}{r['mean_ms']:>8.1f}"
+              f"{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f}{r['max_ms']:>8.1f}{r['hits']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList搜索索引管理与搜索性能测试")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="清空并全量重建索引")
+    p_build.add_argument("--wait", action="store_true", help="等待构建完成并显示进度")
+    p_build.add_argument("--expected", type=int, default=None, help="预计对象总数，用于估算剩余时间")
+
+    p_update = sub.add_parser("update", help="增量更新指定路径的索引")
+    p_update.add_argument("paths", nargs="+")
+    p_update.add_argument("--max-depth", type=int, default=-1, help="最大深度 (默认不限)")
+    p_update.add_argument("--wait", action="store_true", help="等待更新完成并显示进度")
+
+    sub.add_parser("stop", help="停止正在进行的索引")
+    sub.add_parser("clear", help="清空索引")
+    p_progress = sub.add_parser("progress", help="查看索引进度")
+    p_progress.add_argument("--watch", action="store_true", help="持续显示直到完成")
+
+    p_bench = sub.add_parser("bench", help="搜索延迟测试，可对比多个索引后端")
+    p_bench.add_argument("queries", help="查询文件，每行一个关键词")
+    p_bench.add_argument("--backends", default=None,
+                         help=f"依次切换并重建的后端，逗号分隔 ({','.join(BACKENDS)})；默认只测当前后端")
+    p_bench.add_argument("--parent", default="/", help="搜索范围")
+    p_bench.add_argument("--runs", type=int, default=3, help="每个查询重复次数")
+    p_bench.add_argument("--concurrency", type=int, default=1, help="并发查询数")
+    args = parser.parse_args()
+
+    client = OpenListClient(args.url, args.username, args.password)
+    manager = IndexManager(client)
+    try:
+        if args.command == "build":
+            previous = manager.progress()
+            manager.build()
+            print("✓ 已开始全量构建")
+            if args.wait:
+                manager.wait(previous, args.expected)
+        elif args.command == "update":
+            previous = manager.progress()
+            manager.update(args.paths, args.max_depth)
+            print(f"✓ 已开始更新: {', '.join(args.paths)}")
+            if args.wait:
+                manager.wait(previous)
+        elif args.command == "stop":
+            manager.stop()
+            print("✓ 已请求停止")
+        elif args.command == "clear":
+            manager.clear()
+            print("✓ 索引已清空")
+        elif args.command == "progress":
+            progress = manager.progress()
+            print(f"对象数: {progress.get('obj_count')}，完成: {progress.get('is_done')}，"
+                  f"上次完成: {progress.get('last_done_time')}，错误: {progress.get('error') or '无'}")
+            if args.watch and not progress.get("is_done"):
+                manager.wait()
+        elif args.command == "bench":
+            queries = load_queries(args.queries)
+            if not queries:
+                print("❌ 查询文件为空")
+                return
+            results = {}
+            if args.backends:
+                original = manager.get_backend()
+                try:
+                    for backend in [b.strip() for b in args.backends.split(',') if b.strip()]:
+                        print(f"\n=== 后端: {backend} ===")
+                        manager.set_backend(backend)
+                        previous = manager.progress()
+                        manager.build()
+                        manager.wait(previous)
+                        results[backend] = bench_search(client, queries, args.parent, args.runs,
+                                                        args.concurrency)
+                finally:
+                    # 恢复原来的后端（索引内容需要重新构建）
+                    manager.set_backend(original)
+                    print(f"\n✓ 已恢复索引后端: {original}，如需使用请重新构建索引")
+            else:
+                results[manager.get_backend()] = bench_search(client, queries, args.parent, args.runs,
+                                                              args.concurrency)
+            print_bench(results)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
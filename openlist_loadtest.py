@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+OpenList HTTP API压测
+通过OpenListClient登录(复用缓存的token)，按固定到达率（开环，不等待上一个请求返回）
+发送 /api/fs/list、/api/fs/get、/d/*path 的混合请求，
+统计各端点的延迟分布(p50/p95/p99/max)和吞吐
+
+依赖aiohttp (pip install -r requirements.txt)；建议对挂载了Local驱动的本地服务运行，例如:
+    python3 openlist_loadtest.py --path /local --rate 200 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import aiohttp
+
+from openlist_client import BASE_URL, OpenListClient
+
+# 默认请求配比
+DEFAULT_MIX = "fs_list=5,fs_get=3,download=2"
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图，相对误差约为precision，内存与请求数无关"""
+
+    def __init__(self, precision: float = 0.01):
+        self.base = math.log1p(precision)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        micros = max(seconds * 1e6, 1.0)
+        index = int(math.log(micros) / self.base)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        target = math.ceil(self.count * p / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                # 取桶的上界，结果偏保守
+                return min(math.exp((index + 1) * self.base) / 1e6, self.max)
+        return self.max
+
+
+class EndpointStats:
+    """成功和失败（出错、超时）的请求分开统计，超时不会混入成功请求的延迟分布"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.error_latency = LatencyHistogram()
+        self.bytes = 0
+
+    @property
+    def errors(self) -> int:
+        return self.error_latency.count
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        h = self.latency
+        e = self.error_latency
+        return {
+            "requests": h.count,
+            "errors": e.count,
+            "rps": round(h.count / elapsed, 1) if elapsed else 0,
+            "mb_per_s": round(self.bytes / elapsed / 1024**2, 2) if elapsed else 0,
+            "p50_ms": round(h.percentile(50) * 1000, 2),
+            "p95_ms": round(h.percentile(95) * 1000, 2),
+            "p99_ms": round(h.percentile(99) * 1000, 2),
+            "max_ms": round(h.max * 1000, 2),
+            "error_p50_ms": round(e.percentile(50) * 1000, 2),
+            "error_max_ms": round(e.max * 1000, 2),
+        }
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    """解析 "fs_list=5,fs_get=3,download=2" 形式的请求配比"""
+    weights = []
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in LoadTest.OPERATIONS:
+            raise ValueError(f"未知的请求类型: {name} (可选: {', '.join(LoadTest.OPERATIONS)})")
+        weights.append((name, float(weight or 1)))
+    return weights
+
+
+class LoadTest:
+    OPERATIONS = ("fs_list", "fs_get", "download")
+
+    def __init__(self, base_url: str, token: str, root: str, mix: List[Tuple[str, float]],
+                 rate: float, duration: float, connections: int = 100,
+                 poisson: bool = True, timeout: float = 30):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {"Authorization": token}
+        self.root = root
+        self.names = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.rate = rate
+        self.duration = duration
+        self.connections = connections
+        self.poisson = poisson
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in self.names}
+        self.dirs: List[str] = []
+        self.files: List[Dict[str, Any]] = []
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def _api(self, session: aiohttp.ClientSession, path: str,
+                   payload: Dict[str, Any]) -> Dict[str, Any]:
+        async with session.post(f"{self.base_url}{path}", json=payload, headers=self.headers) as response:
+            data = await response.json(content_type=None)
+        if data.get("code") != 200:
+            raise RuntimeError(f"{path}: {data.get('message')}")
+        return data.get("data") or {}
+
+    async def discover(self, session: aiohttp.ClientSession, max_dirs: int = 50):
+        """压测前先遍历root，收集用于fs/list的目录和用于fs/get、下载的文件"""
+        queue = [self.root]
+        while queue and len(self.dirs) < max_dirs:
+            path = queue.pop(0)
+            data = await self._api(session, "/api/fs/list", {"path": path, "page": 1, "per_page": 0})
+            self.dirs.append(path)
+            for item in data.get("content") or []:
+                child = f"{path.rstrip('/')}/{item['name']}"
+                if item.get("is_dir"):
+                    queue.append(child)
+                else:
+                    self.files.append({"path": child, "sign": item.get("sign", "")})
+        if not self.files and any(name != "fs_list" for name in self.names):
+            raise RuntimeError(f"{self.root} 下没有文件，无法测试fs_get/download")
+
+    async def _run_one(self, session: aiohttp.ClientSession, name: str, scheduled: float):
+        stats = self.stats[name]
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        histogram = stats.latency
+        try:
+            if name == "fs_list":
+                await self._api(session, "/api/fs/list",
+                                {"path": random.choice(self.dirs), "page": 1, "per_page": 0})
+            elif name == "fs_get":
+                await self._api(session, "/api/fs/get", {"path": random.choice(self.files)["path"]})
+            else:
+                file = random.choice(self.files)
+                url = f"{self.base_url}/d{quote(file['path'])}"
+                params = {"sign": file["sign"]} if file["sign"] else None
+                async with session.get(url, params=params, headers=self.headers) as response:
+                    if response.status >= 400:
+                        raise RuntimeError(f"/d: HTTP {response.status}")
+                    async for chunk in response.content.iter_chunked(1 << 16):
+                        stats.bytes += len(chunk)
+        except Exception:
+            histogram = stats.error_latency
+        finally:
+            self.inflight -= 1
+            # 从计划发送时间算起，连接池排队的时间也计入延迟（避免协同遗漏）
+            histogram.record(time.monotonic() - scheduled)
+
+    async def run(self) -> Dict[str, Any]:
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            await self.discover(session)
+            print(f"✓ 发现 {len(self.dirs)} 个目录，{len(self.files)} 个文件")
+
+            tasks = set()
+            started = time.monotonic()
+            next_at = started
+            while next_at - started < self.duration:
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                name = random.choices(self.names, self.weights)[0]
+                task = asyncio.ensure_future(self._run_one(session, name, next_at))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                interval = random.expovariate(self.rate) if self.poisson else 1 / self.rate
+                next_at += interval
+            if tasks:
+                await asyncio.wait(tasks)
+            elapsed = time.monotonic() - started
+
+        return {
+            "rate": self.rate,
+            "duration": round(elapsed, 2),
+            "max_inflight": self.max_inflight,
+            "endpoints": {name: stats.summary(elapsed) for name, stats in self.stats.items()},
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n=== 压测结果 (目标 {report['rate']} req/s，用时 {report['duration']}秒，"
+          f"最大在途 {report['max_inflight']}) ===")
+    print(f"{'端点':<10}{'成功':>8}{'req/s':>9}{'MB/s':>8}"
+          f"{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'错误':>7}{'错误p50':>10}{'错误max':>10}  (ms)")
+    for name, s in report["endpoints"].items():
+        print(f"{name:<10}{s['requests']:>8}{s['rps']:>9}{s['mb_per_s']:>8}"
+              f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}{s['max_ms']:>9}"
+              f"{s['errors']:>7}{s['error_p50_ms']:>10}{s['error_max_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList API压测")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--path", default="/local", help="压测的挂载路径（建议使用Local驱动）")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"请求配比 (默认: {DEFAULT_MIX})")
+    parser.add_argument("--rate", type=float, default=100, help="每秒发送的请求数")
+    parser.add_argument("--duration", type=float, default=30, help="持续时间(秒)")
+    parser.add_argument("--connections", type=int, default=100, help="最大连接数")
+    parser.add_argument("--uniform", action="store_true", help="均匀间隔发送（默认按泊松过程）")
+    parser.add_argument("--json", default=None, help="把结果写入JSON文件，便于比较不同版本")
+    args = parser.parse_args()
+
+    print("=== OpenList API压测 ===")
+    token = OpenListClient(args.url, args.username, args.password).token
+    if not token:
+        print("❌ 登录失败，无法压测")
+        return
+
+    load_test = LoadTest(args.url, token, args.path, parse_mix(args.mix), args.rate,
+                         args.duration, args.connections, poisson=not args.uniform)
+    report = asyncio.run(load_test.run())
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✓ 结果已保存到 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,49 +4,151 @@ OpenList存储管理器
 绕过JWT认证问题，直接通过数据库管理存储配置
 """
 
-import sqlite3
 import json
 import os
-from typing import Dict, List, Any
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, TextIO
+
+from openlist_db import DEFAULT_DATA_DIR, get_db
+from openlist_storage_apply import StorageApplier
+
+def iter_storage_records(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """逐条读取存储配置
+
+    支持两种格式:
+    - JSONL: 每行一个存储配置（export_storages的输出），逐行流式读取
+    - {"storages": [...]} 文档: batch_cloud_login / simple_token_getter 等生成的 openlist_storages.json
+    """
+    first = ""
+    for line in stream:
+        if line.strip():
+            first = line
+            break
+    if not first:
+        return
+    
+    try:
+        record = json.loads(first)
+    except ValueError:
+        record = None
+    
+    if isinstance(record, dict) and "storages" not in record:
+        yield record
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+        return
+    
+    # 多行JSON文档，整体解析
+    document = record if record is not None else json.loads(first + stream.read())
+    if isinstance(document, dict):
+        document = document.get("storages", [])
+    for storage in document:
+        yield storage
 
 class OpenListStorageManager:
-    def __init__(self, data_dir: str = "/Users/primihub/github/OpenList/data"):
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, applier: Optional[StorageApplier] = None):
         self.data_dir = data_dir
         self.db_path = os.path.join(data_dir, "data.db")
+        self.db = get_db(self.db_path)
+        # 设置applier即为热加载模式：提交后通过管理API加载变更的存储
+        self.applier = applier
+        self._pending: Dict[str, List[int]] = {"added": [], "updated": [], "removed": []}
+        # 已在删除记录前从服务内存中卸载的存储
+        self._unloaded: Set[int] = set()
+    
+    @contextmanager
+    def transaction(self, unload: Iterable[int] = ()):
+        """批量修改存储配置，块内所有操作合并为一个事务提交，提交后统一热加载
+
+        unload: 块内要删除的存储ID，在开始事务（BEGIN IMMEDIATE）之前先从服务内存中卸载
+        """
+        outermost = not self.db.in_transaction()
+        if outermost:
+            self.unload_storages(unload)
+        try:
+            with self.db.transaction() as conn:
+                yield conn
+        except BaseException:
+            if outermost:
+                self._clear_pending()
+            raise
+        if outermost:
+            self.apply_changes()
+    
+    def _clear_pending(self):
+        for ids in self._pending.values():
+            ids.clear()
+    
+    def _track(self, kind: str, storage_ids: Iterable[int]):
+        """记录变更的存储，不在批量事务中时立即应用"""
+        if self.applier is None:
+            return
+        self._pending[kind].extend(storage_ids)
+        if not self.db.in_transaction():
+            self.apply_changes()
+    
+    def apply_changes(self) -> bool:
+        """热加载已提交的新增和修改；服务不可达时由applier退回到重启
+
+        数据库修改此时已经提交，热加载失败只报告，不影响调用方对数据库操作的判断
+        """
+        if self.applier is None:
+            return True
+        added, updated, removed = (list(self._pending[k]) for k in ("added", "updated", "removed"))
+        self._clear_pending()
+        if not (added or updated or removed):
+            return True
+        
+        self.applier.reachable = True
+        try:
+            ok = self.applier.drop_deleted(removed)
+            return self.applier.apply(added=added, updated=updated) and ok
+        except Exception as e:
+            print(f"⚠ 数据库修改已提交，但热加载失败: {e}")
+            return False
+    
+    def unload_storages(self, storage_ids: Iterable[int]):
+        """删除记录前先从服务内存中卸载
+
+        服务端卸载时要读写该存储的记录，必须在事务外调用；
+        批量删除时通过 transaction(unload=...) 在开始事务前调用
+        """
+        if self.applier is None:
+            return
+        self.applier.reachable = True
+        for storage_id in storage_ids:
+            if self.applier.unload(storage_id):
+                self._unloaded.add(storage_id)
     
     def get_storages(self) -> List[Dict[str, Any]]:
         """获取所有存储配置"""
         if not os.path.exists(self.db_path):
             return []
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                SELECT id, mount_path, driver, addition, status, disabled, remark 
-                FROM x_storages 
-                ORDER BY "order"
-            """)
-            
-            storages = []
-            for row in cursor.fetchall():
-                storage = dict(row)
-                # 解析addition字段
-                if storage['addition']:
-                    try:
-                        storage['addition'] = json.loads(storage['addition'])
-                    except:
-                        storage['addition'] = {}
-                storages.append(storage)
+            with self.db.connection() as conn:
+                cursor = conn.execute("""
+                    SELECT id, mount_path, driver, addition, status, disabled, remark 
+                    FROM x_storages 
+                    ORDER BY "order"
+                """)
+                
+                storages = []
+                for row in cursor.fetchall():
+                    storage = dict(row)
+                    # 解析addition字段
+                    if storage['addition']:
+                        try:
+                            storage['addition'] = json.loads(storage['addition'])
+                        except:
+                            storage['addition'] = {}
+                    storages.append(storage)
             
             return storages
         except Exception as e:
             print(f"获取存储列表失败: {e}")
             return []
-        finally:
-            conn.close()
     
     def add_storage(self, mount_path: str, driver: str, addition: Dict, remark: str = "") -> bool:
         """添加存储配置"""
@@ -54,49 +156,150 @@ class OpenListStorageManager:
             print("数据库文件不存在")
             return False
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # 获取当前最大order值
-            cursor.execute("SELECT MAX(\"order\") FROM x_storages")
-            max_order = cursor.fetchone()[0] or 0
-            
-            cursor.execute("""
-                INSERT INTO x_storages 
-                (mount_path, driver, addition, status, disabled, remark, "order") 
-                VALUES (?, ?, ?, 'work', 0, ?, ?)
-            """, (mount_path, driver, json.dumps(addition), remark, max_order + 1))
-            
-            conn.commit()
-            print(f"✅ 存储添加成功: {mount_path} ({driver})")
+            with self.transaction() as conn:
+                # 获取当前最大order值
+                max_order = conn.execute("SELECT MAX(\"order\") FROM x_storages").fetchone()[0] or 0
+                
+                cursor = conn.execute("""
+                    INSERT INTO x_storages 
+                    (mount_path, driver, addition, status, disabled, remark, "order") 
+                    VALUES (?, ?, ?, 'work', 0, ?, ?)
+                """, (mount_path, driver, json.dumps(addition), remark, max_order + 1))
+                
+                print(f"✅ 存储添加成功: {mount_path} ({driver})")
+                self._track("added", [cursor.lastrowid])
             return True
         except Exception as e:
             print(f"❌ 添加存储失败: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
     
     def delete_storage(self, storage_id: int) -> bool:
-        """删除存储配置"""
+        """删除存储配置
+
+        热加载模式下不在批量事务中时，通过管理API删除：服务端卸载驱动并删除记录；
+        在批量事务中调用时随调用方的事务一起提交
+        """
         if not os.path.exists(self.db_path):
             return False
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if self.applier is not None and not self.db.in_transaction():
+            self.applier.reachable = True
+            if self.applier.delete(storage_id):
+                print(f"✅ 存储删除成功: ID {storage_id}")
+                return True
         
         try:
-            cursor.execute("DELETE FROM x_storages WHERE id = ?", (storage_id,))
-            conn.commit()
+            with self.transaction() as conn:
+                conn.execute("DELETE FROM x_storages WHERE id = ?", (storage_id,))
+                # 没能提前卸载的存储在提交后提示
+                if storage_id not in self._unloaded:
+                    self._track("removed", [storage_id])
+            self._unloaded.discard(storage_id)
             print(f"✅ 存储删除成功: ID {storage_id}")
             return True
         except Exception as e:
             print(f"❌ 删除存储失败: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
+    
+    def import_storages(self, storages: Iterable[Dict[str, Any]], batch_size: int = 500) -> Dict[str, int]:
+        """批量导入存储配置
+
+        按mount_path做upsert：已存在的挂载更新配置并保留原order，
+        新挂载的order在一次遍历中从当前最大值依次分配。
+        输入可以是生成器，按batch_size分批executemany，全程在一个事务内提交。
+        """
+        stats = {"inserted": 0, "updated": 0, "skipped": 0}
+        
+        with self.transaction() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(x_storages)")]
+            known_columns = set(columns) - {"id"}
+            
+            existing = {row[0]: row[1] for row in conn.execute("SELECT mount_path, id FROM x_storages")}
+            inserted_paths: List[str] = []
+            updated_ids: List[int] = []
+            next_order = (conn.execute("SELECT MAX(\"order\") FROM x_storages").fetchone()[0] or 0) + 1
+            
+            # 相同列集合的行放在一起executemany
+            pending: Dict[tuple, List[tuple]] = {}
+            pending_count = 0
+            
+            def flush():
+                for cols, rows in pending.items():
+                    updates = [c for c in cols if c not in ("mount_path", "order")]
+                    quoted = ", ".join(f'"{c}"' for c in cols)
+                    placeholders = ", ".join("?" for _ in cols)
+                    conn.executemany(f"""
+                        INSERT INTO x_storages ({quoted})
+                        VALUES ({placeholders})
+                        ON CONFLICT(mount_path) DO UPDATE SET
+                        {', '.join(f'"{c}" = excluded."{c}"' for c in updates)}
+                    """, rows)
+                pending.clear()
+            
+            for storage in storages:
+                mount_path = (storage.get("mount_path") or "").strip()
+                if not mount_path or not storage.get("driver"):
+                    stats["skipped"] += 1
+                    continue
+                if not mount_path.startswith('/'):
+                    mount_path = '/' + mount_path
+                
+                record = {k: v for k, v in storage.items() if k in known_columns}
+                record["mount_path"] = mount_path
+                if "addition" in record and not isinstance(record["addition"], str):
+                    record["addition"] = json.dumps(record["addition"])
+                
+                if mount_path in existing:
+                    record.pop("order", None)
+                    if existing[mount_path] is not None:
+                        updated_ids.append(existing[mount_path])
+                    stats["updated"] += 1
+                else:
+                    record["order"] = next_order
+                    next_order += 1
+                    record.setdefault("status", "work")
+                    record.setdefault("disabled", 0)
+                    record.setdefault("addition", "{}")
+                    existing[mount_path] = None
+                    inserted_paths.append(mount_path)
+                    stats["inserted"] += 1
+                
+                cols = tuple(sorted(record))
+                pending.setdefault(cols, []).append(tuple(record[c] for c in cols))
+                pending_count += 1
+                if pending_count >= batch_size:
+                    flush()
+                    pending_count = 0
+            
+            flush()
+            
+            if self.applier is not None:
+                ids = {row[0]: row[1] for row in conn.execute("SELECT mount_path, id FROM x_storages")}
+                self._track("added", [ids[p] for p in inserted_paths])
+                self._track("updated", updated_ids)
+        
+        return stats
+    
+    def export_storages(self, stream: TextIO, batch_size: int = 500) -> int:
+        """将x_storages按order导出为JSONL，每行一个存储，分批读取不占用大量内存"""
+        count = 0
+        with self.db.connection() as conn:
+            cursor = conn.execute('SELECT * FROM x_storages ORDER BY "order"')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    storage = dict(row)
+                    if storage.get("addition"):
+                        try:
+                            storage["addition"] = json.loads(storage["addition"])
+                        except ValueError:
+                            pass
+                    stream.write(json.dumps(storage, ensure_ascii=False, default=str) + "\n")
+                    count += 1
+        return count
     
     def get_supported_drivers(self) -> List[str]:
         """获取支持的驱动列表"""
@@ -121,7 +324,8 @@ class OpenListStorageManager:
         return sorted(drivers)
 
 def main():
-    manager = OpenListStorageManager()
+    # 热加载模式：修改后通过管理API只重载变更的存储，服务不可达时才重启
+    manager = OpenListStorageManager(applier=StorageApplier())
     
     print("=== OpenList 存储管理器 ===")
     print("直接通过数据库管理存储配置，绕过JWT认证问题\n")
@@ -137,10 +341,12 @@ def main():
         print("2. 添加存储")
         print("3. 删除存储")
         print("4. 查看支持的驱动")
-        print("5. 重启服务（使配置生效）")
-        print("6. 退出")
+        print("5. 批量导入存储 (JSON/JSONL)")
+        print("6. 导出存储 (JSONL)")
+        print("7. 重载已挂载的存储（不会挂载新增或卸载已删除的存储）")
+        print("8. 退出")
         
-        choice = input("\n请选择操作 (1-6): ").strip()
+        choice = input("\n请选择操作 (1-8): ").strip()
         
         if choice == "1":
             print("\n=== 存储列表 ===")
@@ -206,10 +412,7 @@ def main():
                     except:
                         print("❌ JSON格式错误，使用空配置")
             
-            if manager.add_storage(mount_path, driver, addition, remark):
-                print("\n💡 存储添加成功！请重启OpenList容器使配置生效:")
-                print("   docker restart openlist")
-            else:
+            if not manager.add_storage(mount_path, driver, addition, remark):
                 print("❌ 存储添加失败")
         
         elif choice == "3":
@@ -217,10 +420,7 @@ def main():
             storage_id = input("要删除的存储ID: ").strip()
             
             if storage_id.isdigit():
-                if manager.delete_storage(int(storage_id)):
-                    print("\n💡 存储删除成功！请重启OpenList容器:")
-                    print("   docker restart openlist")
-                else:
+                if not manager.delete_storage(int(storage_id)):
                     print("❌ 存储删除失败")
             else:
                 print("❌ 请输入有效的存储ID")
@@ -233,14 +433,34 @@ def main():
             print(f"\n总共支持 {len(drivers)} 种存储驱动")
         
         elif choice == "5":
-            print("\n重启OpenList容器...")
-            os.system("docker restart openlist")
-            print("✅ 容器已重启")
-            print("等待服务恢复...")
-            import time
-            time.sleep(5)
+            print("\n=== 批量导入存储 ===")
+            import_file = input("导入文件 (默认: openlist_storages.json): ").strip() or "openlist_storages.json"
+            if not os.path.exists(import_file):
+                print(f"❌ 文件不存在: {import_file}")
+                continue
+            try:
+                with open(import_file, 'r', encoding='utf-8') as f:
+                    stats = manager.import_storages(iter_storage_records(f))
+                print(f"✅ 导入完成: 新增 {stats['inserted']}，更新 {stats['updated']}，跳过 {stats['skipped']}")
+            except Exception as e:
+                print(f"❌ 导入失败: {e}")
         
         elif choice == "6":
+            print("\n=== 导出存储 ===")
+            export_file = input("导出文件 (默认: openlist_storages.jsonl): ").strip() or "openlist_storages.jsonl"
+            with open(export_file, 'w', encoding='utf-8') as f:
+                count = manager.export_storages(f)
+            print(f"✅ 已导出 {count} 个存储到 {export_file}")
+        
+        elif choice == "7":
+            # load_all只重新初始化服务内存中已有的存储；增删改通过2、3、5选项即时生效
+            print("\n重载已挂载的存储...")
+            applier = manager.applier
+            applier.reachable = True
+            if applier.load_all():
+                print("✅ 已触发重载，存储将在后台依次重新初始化")
+        
+        elif choice == "8":
             print("退出")
             break
         
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+OpenList存储指标时序库
+把探测结果（每个存储的列目录延迟、错误、容量）保存在本地SQLite中，
+原始样本短期保留，同时写入1分钟和1小时的汇总（带可合并的对数直方图，可以跨时间段计算分位数），
+用于按天查看延迟分位数的趋势，在用户发现之前看出哪个存储开始变慢
+
+    python3 openlist_storage_probe.py --store openlist_metrics.db      # 探测并记录
+    python3 openlist_metrics_store.py trend --days 14 --step 1d        # 每天的p50/p95趋势
+    python3 openlist_metrics_store.py record /baidu quota_used_bytes 123456
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from openlist_db import get_db
+
+DEFAULT_STORE_PATH = "openlist_metrics.db"
+
+# 汇总粒度(秒) -> 保留时间(秒)，None为永久
+RAW_RETENTION = 2 * 86400
+ROLLUPS = {60: 30 * 86400, 3600: None}
+
+# 常用指标名
+LIST_LATENCY = "list_ms"
+CAPACITY_TOTAL = "capacity_total_bytes"
+CAPACITY_FREE = "capacity_free_bytes"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_raw (
+    ts     REAL NOT NULL,
+    series TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value  REAL,
+    ok     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metric_raw ON metric_raw (series, metric, ts);
+CREATE TABLE IF NOT EXISTS metric_rollup (
+    resolution INTEGER NOT NULL,
+    series     TEXT NOT NULL,
+    metric     TEXT NOT NULL,
+    bucket     INTEGER NOT NULL,
+    count      INTEGER NOT NULL,
+    errors     INTEGER NOT NULL,
+    total      REAL NOT NULL,
+    min        REAL,
+    max        REAL,
+    hist       TEXT NOT NULL,
+    PRIMARY KEY (resolution, series, metric, bucket)
+) WITHOUT ROWID;
+"""
+
+# (时间戳, 序列, 指标, 值, 是否成功)；失败的样本值可以为None
+Sample = Tuple[float, str, str, Optional[float], bool]
+
+
+class Histogram:
+    """对数分桶直方图：相对误差约2.5%，桶计数直接相加即可合并"""
+
+    GROWTH = 1.05
+
+    def __init__(self, buckets: Optional[Dict[int, int]] = None):
+        self.buckets: Dict[int, int] = dict(buckets or {})
+
+    @classmethod
+    def loads(cls, text: str) -> "Histogram":
+        return cls({int(k): v for k, v in json.loads(text).items()})
+
+    def dumps(self) -> str:
+        return json.dumps(self.buckets, separators=(",", ":"), sort_keys=True)
+
+    def add(self, value: float, count: int = 1):
+        # 0和负值都放进最小的桶
+        index = math.ceil(math.log(value, self.GROWTH)) if value > 1e-9 else -1000
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: "Histogram"):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = sum(self.buckets.values())
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # 取桶的几何中点
+                return 0.0 if index == -1000 else self.GROWTH ** (index - 0.5)
+        return self.GROWTH ** (max(self.buckets) - 0.5)
+
+
+class Aggregate:
+    """一个时间段内的汇总"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.hist = Histogram()
+
+    def add(self, value: Optional[float], ok: bool):
+        self.count += 1
+        if not ok or value is None:
+            self.errors += 1
+            return
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.hist.add(value)
+
+    def merge(self, row: Dict[str, Any]):
+        self.count += row["count"]
+        self.errors += row["errors"]
+        self.total += row["total"]
+        for attr, pick in (("min", min), ("max", max)):
+            if row[attr] is not None:
+                current = getattr(self, attr)
+                setattr(self, attr, row[attr] if current is None else pick(current, row[attr]))
+        self.hist.merge(Histogram.loads(row["hist"]) if isinstance(row["hist"], str) else row["hist"])
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """直方图给出的是桶中点，限制在实际记录的最小值和最大值之间"""
+        value = self.hist.quantile(q)
+        if value is None or self.min is None or self.max is None:
+            return value
+        return min(max(value, self.min), self.max)
+
+    def summary(self) -> Dict[str, Any]:
+        values = self.count - self.errors
+        return {
+            "count": self.count,
+            "error_rate": self.errors / self.count if self.count else 0.0,
+            "avg": self.total / values if values else None,
+            "p50": self._quantile(0.5),
+            "p95": self._quantile(0.95),
+            "p99": self._quantile(0.99),
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+def local_floor(ts: float, step: int) -> int:
+    """ts所在时间段的起点：按本地时间对齐到step
+
+    UTC偏移取各时间点自己的tm_gmtoff，夏令时切换前后的时间段也从本地整点/0点开始
+    """
+    local = ts + time.localtime(ts).tm_gmtoff
+    start = time.gmtime(local // step * step)
+    # 把本地时间段起点换回时间戳，tm_isdst=-1由mktime判断当时是否为夏令时
+    return int(time.mktime(start[:8] + (-1,)))
+
+
+class MetricsStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.db = get_db(path)
+        with self.db.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def record(self, samples: Iterable[Sample]):
+        """写入原始样本，并在同一事务中合并进各粒度的汇总"""
+        samples = list(samples)
+        if not samples:
+            return
+        pending: Dict[Tuple[int, str, str, int], Aggregate] = defaultdict(Aggregate)
+        for ts, series, metric, value, ok in samples:
+            for resolution in ROLLUPS:
+                pending[(resolution, series, metric, int(ts // resolution * resolution))].add(value, ok)
+
+        with self.db.transaction() as conn:
+            conn.executemany("INSERT INTO metric_raw (ts, series, metric, value, ok) VALUES (?, ?, ?, ?, ?)",
+                             [(ts, series, metric, value, int(ok)) for ts, series, metric, value, ok in samples])
+            rows = []
+            for key, agg in pending.items():
+                existing = conn.execute(
+                    "SELECT count, errors, total, min, max, hist FROM metric_rollup "
+                    "WHERE resolution = ? AND series = ? AND metric = ? AND bucket = ?", key).fetchone()
+                if existing is not None:
+                    agg.merge(dict(existing))
+                rows.append(key + (agg.count, agg.errors, agg.total, agg.min, agg.max, agg.hist.dumps()))
+            conn.executemany("INSERT OR REPLACE INTO metric_rollup (resolution, series, metric, bucket, count, "
+                             "errors, total, min, max, hist) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """删除超过保留时间的原始样本和细粒度汇总"""
+        now = now or time.time()
+        removed = {}
+        with self.db.transaction() as conn:
+            removed["raw"] = conn.execute("DELETE FROM metric_raw WHERE ts < ?", (now - RAW_RETENTION,)).rowcount
+            for resolution, retention in ROLLUPS.items():
+                if retention is not None:
+                    removed[f"{resolution}s"] = conn.execute(
+                        "DELETE FROM metric_rollup WHERE resolution = ? AND bucket < ?",
+                        (resolution, now - retention)).rowcount
+        return removed
+
+    def series(self) -> List[Dict[str, Any]]:
+        with self.db.connection() as conn:
+            return [dict(r) for r in conn.execute(
+                "SELECT series, metric, SUM(count) AS samples, MIN(bucket) AS first, MAX(bucket) AS last "
+                "FROM metric_rollup WHERE resolution = ? GROUP BY series, metric ORDER BY series, metric",
+                (max(ROLLUPS),))]
+
+    def _resolution(self, since: float, step: int, now: float) -> int:
+        """选能覆盖查询范围、且不比step粗的最粗粒度（直方图合并不损失精度，行数最少）；0表示原始样本"""
+        for resolution in sorted(ROLLUPS, reverse=True):
+            retention = ROLLUPS[resolution]
+            if resolution <= step and (retention is None or since >= now - retention):
+                return resolution
+        if since >= now - RAW_RETENTION:
+            return 0
+        return min(ROLLUPS)
+
+    def query(self, metric: str, since: float, until: Optional[float] = None, step: int = 86400,
+              series: Optional[str] = None) -> Dict[str, List[Tuple[int, Dict[str, Any]]]]:
+        """按step切分 [since, until)，返回 {序列: [(时间段起点, 汇总), ...]}；series支持SQL LIKE通配"""
+        now = time.time()
+        until = until or now
+        # 按本地时间对齐到step，按天查看时每段从0点开始（含夏令时切换的那天）
+        since = local_floor(since, step)
+        resolution = self._resolution(since, step, now)
+        where = "metric = ? AND {col} >= ? AND {col} < ?" + (" AND series LIKE ?" if series else "")
+        params: List[Any] = [metric, since, until] + ([series] if series else [])
+        buckets: Dict[str, Dict[int, Aggregate]] = defaultdict(lambda: defaultdict(Aggregate))
+
+        with self.db.connection() as conn:
+            if resolution == 0:
+                for row in conn.execute(f"SELECT ts, series, value, ok FROM metric_raw WHERE {where.format(col='ts')}",
+                                        params):
+                    start = local_floor(row["ts"], step)
+                    buckets[row["series"]][start].add(row["value"], bool(row["ok"]))
+            else:
+                for row in conn.execute(
+                        f"SELECT * FROM metric_rollup WHERE resolution = ? AND {where.format(col='bucket')}",
+                        [resolution] + params):
+                    start = local_floor(row["bucket"], step)
+                    buckets[row["series"]][start].merge(dict(row))
+
+        return {name: [(start, agg.summary()) for start, agg in sorted(steps.items())]
+                for name, steps in sorted(buckets.items())}
+
+
+def parse_duration(value: str) -> int:
+    """解析 30s / 15m / 1h / 1d 这样的时长，返回秒"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd]?)", value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"无效的时长: {value}")
+    return int(float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)])
+
+
+def _fmt(value: Optional[float], metric: str) -> str:
+    if value is None:
+        return "-"
+    if metric.endswith("_bytes"):
+        return f"{value / 1024**3:.1f}G"
+    return f"{value:.0f}"
+
+
+def print_trend(result: Dict[str, List[Tuple[int, Dict[str, Any]]]], metric: str, step: int,
+                threshold: float = 1.5):
+    """每个序列一张表；最后一个时间段的p95超过之前各段p95中位数的threshold倍时标记"""
+    time_format = "%Y-%m-%d" if step >= 86400 else "%m-%d %H:%M"
+    degraded = []
+    for name, rows in result.items():
+        print(f"\n{name}  ({metric})")
+        print(f"  {'时间':<16}{'样本':>7}{'错误率':>8}{'平均':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+        for start, s in rows:
+            print(f"  {time.strftime(time_format, time.localtime(start)):<16}{s['count']:>7}"
+                  f"{s['error_rate'] * 100:>7.1f}%{_fmt(s['avg'], metric):>9}{_fmt(s['p50'], metric):>9}"
+                  f"{_fmt(s['p95'], metric):>9}{_fmt(s['p99'], metric):>9}{_fmt(s['max'], metric):>9}")
+
+        history = sorted(s["p95"] for _, s in rows[:-1] if s["p95"] is not None)
+        last = rows[-1][1] if rows else None
+        if history and last and last["p95"] is not None:
+            baseline = history[len(history) // 2]
+            if baseline and last["p95"] > baseline * threshold:
+                degraded.append((name, baseline, last["p95"]))
+        if len(rows) > 1 and last and last["error_rate"] > max(s["error_rate"] for _, s in rows[:-1]):
+            degraded.append((name, None, last["error_rate"]))
+
+    if degraded:
+        print("\n⚠ 可能在变差的存储:")
+        for name, baseline, current in degraded:
+            if baseline is None:
+                print(f"  {name}: 错误率升至 {current * 100:.1f}%")
+            else:
+                print(f"  {name}: p95 {_fmt(baseline, metric)} -> {_fmt(current, metric)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList存储指标时序库")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="指标数据库")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_trend = sub.add_parser("trend", help="按时间段显示分位数趋势")
+    p_trend.add_argument("--metric", default=LIST_LATENCY, help=f"指标名 (默认 {LIST_LATENCY})")
+    p_trend.add_argument("--days", type=float, default=7, help="查看最近多少天")
+    p_trend.add_argument("--step", type=parse_duration, default=86400, help="时间段长度，如 1h、1d")
+    p_trend.add_argument("--storage", default=None, help="只看某个存储，支持 %% 通配")
+    p_trend.add_argument("--threshold", type=float, default=1.5, help="p95超过历史中位数的倍数时标记")
+    p_trend.add_argument("--json", action="store_true", help="输出JSON")
+
+    sub.add_parser("series", help="列出已记录的序列和指标")
+    sub.add_parser("compact", help="清理超过保留时间的原始样本和1分钟汇总")
+
+    p_record = sub.add_parser("record", help="手动记录一个样本")
+    p_record.add_argument("series", help="序列名，通常为挂载路径")
+    p_record.add_argument("metric")
+    p_record.add_argument("value", type=float, nargs="?", default=None, help="省略时记录为一次失败")
+    args = parser.parse_args()
+
+    store = MetricsStore(args.store)
+    if args.command == "trend":
+        since = time.time() - args.days * 86400
+        result = store.query(args.metric, since, step=args.step, series=args.storage)
+        if args.json:
+            json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        elif not result:
+            print("没有数据")
+        else:
+            print_trend(result, args.metric, args.step, args.threshold)
+    elif args.command == "series":
+        for row in store.series():
+            print(f"{row['series']:<30}{row['metric']:<24}{row['samples']:>8} 个样本  "
+                  f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(row['first']))} ~ "
+                  f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(row['last']))}")
+    elif args.command == "compact":
+        removed = store.compact()
+        print("✓ 已清理: " + "，".join(f"{k} {v} 行" for k, v in removed.items()))
+    elif args.command == "record":
+        store.record([(time.time(), args.series, args.metric, args.value, args.value is not None)])
+        print("✓ 已记录")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+OpenList离线下载批量提交
+从文件流式读取URL，按规范化后的URL在本地台账(SQLite)中去重，
+按目标目录合并成多URL的 /api/fs/add_offline_download 请求，
+并根据 /api/task/offline_download/undone 的队列长度控制同时进行的任务数；
+中断后重新运行会从台账继续，不会重复提交
+
+URL文件每行: URL [目标目录]，未写目录时使用 --path
+
+    python3 openlist_offline_submit.py urls.txt --path /local/downloads --tool aria2 --target 20
+"""
+
+import argparse
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from openlist_client import BASE_URL, OpenListClient
+from openlist_db import get_db
+
+DEFAULT_LEDGER_PATH = "openlist_offline_ledger.db"
+TOOLS = ("SimpleHttp", "aria2", "qBittorrent", "Transmission", "115 Cloud", "115 Open", "123 Open",
+         "PikPak", "Thunder", "ThunderX", "ThunderBrowser")
+DELETE_POLICIES = ("delete_on_upload_succeed", "delete_on_upload_failed", "delete_never",
+                   "delete_always", "upload_download_stream")
+
+# 台账状态
+PENDING, SUBMITTING, SUBMITTED, DONE, FAILED, REJECTED = (
+    "pending", "submitting", "submitted", "done", "failed", "rejected")
+
+# tache任务状态
+STATE_SUCCEEDED = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS offline_ledger (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    url_key    TEXT NOT NULL UNIQUE,
+    url        TEXT NOT NULL,
+    path       TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    task_id    TEXT,
+    error      TEXT,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_offline_ledger_status ON offline_ledger (status);
+CREATE INDEX IF NOT EXISTS idx_offline_ledger_task ON offline_ledger (task_id);
+"""
+
+DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21}
+
+
+def normalize_url(url: str) -> str:
+    """去重用的URL键
+
+    - 磁力链接只取info hash（大小写无关）
+    - 其它URL: scheme和主机小写，去掉默认端口和片段，查询参数排序
+    """
+    url = url.strip()
+    if url.lower().startswith("magnet:"):
+        for key, value in parse_qsl(url[url.index('?') + 1:] if '?' in url else ""):
+            if key == "xt" and value.lower().startswith("urn:btih:"):
+                return "magnet:" + value[9:].lower()
+        return url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}{':' + parts.password if parts.password else ''}@{host}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ""))
+
+
+def read_urls(path: str, default_dir: str) -> Iterator[Tuple[str, str]]:
+    """逐行产出 (URL, 目标目录)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split(None, 1)
+            directory = fields[1].strip() if len(fields) > 1 else default_dir
+            yield fields[0], '/' + directory.strip('/')
+
+
+def url_from_task_name(name: str) -> Optional[str]:
+    """任务名格式为 "download <url> to (<目录>)" """
+    if not name.startswith("download ") or " to (" not in name:
+        return None
+    return name[len("download "):name.rindex(" to (")]
+
+
+class Ledger:
+    """提交台账：每个URL一行，提交前先标记为submitting，
+    崩溃后据此找出状态不确定的URL，与服务端任务列表核对"""
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        self.db = get_db(path)
+        with self.db.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def add_many(self, entries: Iterable[Tuple[str, str]], batch: int = 1000) -> Tuple[int, int]:
+        """写入新URL，返回 (新增数, 重复数)"""
+        added = 0
+        rows: List[Tuple] = []
+
+        def flush():
+            nonlocal added
+            with self.db.transaction() as conn:
+                before = conn.total_changes
+                conn.executemany("INSERT OR IGNORE INTO offline_ledger (url_key, url, path, status, updated_at) "
+                                 "VALUES (?, ?, ?, ?, ?)", rows)
+                added += conn.total_changes - before
+            rows.clear()
+
+        seen = 0
+        for url, path in entries:
+            rows.append((normalize_url(url), url.strip(), path, PENDING, int(time.time())))
+            seen += 1
+            if len(rows) >= batch:
+                flush()
+        if rows:
+            flush()
+        return added, seen - added
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """取出最早的limit个待提交URL并标记为submitting"""
+        with self.db.transaction() as conn:
+            rows = [dict(r) for r in conn.execute(
+                "SELECT id, url, path FROM offline_ledger WHERE status = ? ORDER BY id LIMIT ?",
+                (PENDING, limit))]
+            conn.executemany("UPDATE offline_ledger SET status = ?, updated_at = ? WHERE id = ?",
+                             [(SUBMITTING, int(time.time()), r["id"]) for r in rows])
+        return rows
+
+    def in_status(self, status: str) -> List[Dict[str, Any]]:
+        with self.db.connection() as conn:
+            return [dict(r) for r in conn.execute(
+                "SELECT id, url, path, task_id FROM offline_ledger WHERE status = ?", (status,))]
+
+    def set_status(self, updates: Iterable[Tuple[str, Optional[str], Optional[str], int]]):
+        """updates: (状态, 任务ID, 错误, 行ID)"""
+        now = int(time.time())
+        with self.db.transaction() as conn:
+            conn.executemany("UPDATE offline_ledger SET status = ?, task_id = COALESCE(?, task_id), "
+                             "error = ?, updated_at = ? WHERE id = ?",
+                             [(status, task_id, error, now, row_id)
+                              for status, task_id, error, row_id in updates])
+
+    def finish_tasks(self, done: List[Dict[str, Any]]):
+        """根据已完成任务列表更新已提交的URL"""
+        now = int(time.time())
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "UPDATE offline_ledger SET status = ?, error = ?, updated_at = ? "
+                "WHERE task_id = ? AND status = ?",
+                [(DONE if t.get("state") == STATE_SUCCEEDED else FAILED, t.get("error") or None, now,
+                  t["id"], SUBMITTED) for t in done])
+
+    def reset(self, statuses: Iterable[str]) -> int:
+        with self.db.transaction() as conn:
+            before = conn.total_changes
+            for status in statuses:
+                conn.execute("UPDATE offline_ledger SET status = ?, task_id = NULL, error = NULL "
+                             "WHERE status = ?", (PENDING, status))
+            return conn.total_changes - before
+
+    def counts(self) -> Dict[str, int]:
+        with self.db.connection() as conn:
+            return {r[0]: r[1] for r in conn.execute(
+                "SELECT status, COUNT(*) FROM offline_ledger GROUP BY status")}
+
+
+class OfflineSubmitter:
+    def __init__(self, client: OpenListClient, ledger: Ledger, tool: str,
+                 delete_policy: str = "delete_on_upload_succeed", target: int = 10,
+                 batch_size: int = 50, interval: float = 3.0):
+        self.client = client
+        self.ledger = ledger
+        self.tool = tool
+        self.delete_policy = delete_policy
+        self.target = target
+        self.batch_size = batch_size
+        self.interval = interval
+        self.requests = 0
+
+    def _tasks(self, which: str) -> List[Dict[str, Any]]:
+        data = self.client.get(f"/api/task/offline_download/{which}")
+        if data.get("code") != 200:
+            raise RuntimeError(f"获取离线下载任务失败: {data.get('message')}")
+        return data.get("data") or []
+
+    def _server_tasks_by_url(self) -> Dict[str, Dict[str, Any]]:
+        tasks = {}
+        for info in self._tasks("undone") + self._tasks("done"):
+            url = url_from_task_name(info.get("name", ""))
+            if url is not None:
+                tasks[url] = info
+        return tasks
+
+    def reconcile(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """在服务端任务列表中查找状态不确定的URL，已存在的记为已提交，返回找不到的行"""
+        if not rows:
+            return []
+        tasks = self._server_tasks_by_url()
+        updates, missing = [], []
+        for row in rows:
+            info = tasks.get(row["url"])
+            if info is None:
+                missing.append(row)
+            else:
+                updates.append((SUBMITTED, info["id"], None, row["id"]))
+        self.ledger.set_status(updates)
+        return missing
+
+    def recover(self):
+        """上次运行中断时处于submitting的URL：服务端已有任务的不再提交"""
+        rows = self.ledger.in_status(SUBMITTING)
+        if not rows:
+            return
+        missing = self.reconcile(rows)
+        self.ledger.set_status([(PENDING, None, None, row["id"]) for row in missing])
+        print(f"✓ 恢复: {len(rows) - len(missing)} 个URL已在服务端，{len(missing)} 个重新排队")
+
+    def _add(self, path: str, urls: List[str]) -> Dict[str, Any]:
+        self.requests += 1
+        try:
+            return self.client.post("/api/fs/add_offline_download", json={
+                "urls": urls, "path": path, "tool": self.tool, "delete_policy": self.delete_policy,
+            })
+        except Exception as e:
+            return {"code": -1, "message": str(e)}
+
+    def submit(self, path: str, rows: List[Dict[str, Any]]):
+        data = self._add(path, [row["url"] for row in rows])
+        if data.get("code") == 200:
+            tasks = {url_from_task_name(t.get("name", "")): t["id"]
+                     for t in (data.get("data") or {}).get("tasks") or []}
+            # SimpleHttp可直接写入存储，此时没有对应的任务
+            self.ledger.set_status([(SUBMITTED, tasks[row["url"]], None, row["id"]) if row["url"] in tasks
+                                    else (DONE, None, None, row["id"]) for row in rows])
+            return
+
+        # 服务端遇到第一个失败的URL就返回错误，之前的URL已经创建了任务
+        message = data.get("message")
+        if len(rows) == 1:
+            self.ledger.set_status([(REJECTED, None, message, rows[0]["id"])])
+            print(f"\n❌ {rows[0]['url']}: {message}", file=sys.stderr)
+            return
+        try:
+            missing = self.reconcile(rows)
+        except (RuntimeError, OSError):
+            missing = rows
+        for row in missing:
+            self.submit(path, [row])
+
+    def run(self, wait: bool = True) -> Dict[str, int]:
+        self.recover()
+        ours = {row["task_id"] for row in self.ledger.in_status(SUBMITTED) if row["task_id"]}
+        while True:
+            undone = self._tasks("undone")
+            finished = [t for t in self._tasks("done") if t["id"] in ours]
+            if finished:
+                self.ledger.finish_tasks(finished)
+                ours.difference_update(t["id"] for t in finished)
+            running = sum(1 for t in undone if t["id"] in ours)
+
+            slots = self.target - len(undone)
+            groups: Dict[str, List[Dict[str, Any]]] = OrderedDict()
+            if slots > 0:
+                for row in self.ledger.claim(slots):
+                    groups.setdefault(row["path"], []).append(row)
+                for path, rows in groups.items():
+                    for i in range(0, len(rows), self.batch_size):
+                        self.submit(path, rows[i:i + self.batch_size])
+                if groups:
+                    ours.update(row["task_id"] for row in self.ledger.in_status(SUBMITTED) if row["task_id"])
+
+            counts = self.ledger.counts()
+            print(f"  队列 {len(undone)}/{self.target}，进行中 {running}，待提交 {counts.get(PENDING, 0)}，"
+                  f"完成 {counts.get(DONE, 0)}，失败 {counts.get(FAILED, 0) + counts.get(REJECTED, 0)}，"
+                  f"请求 {self.requests}    ", end="\r", flush=True)
+            if not counts.get(PENDING) and (not wait or not running and not groups):
+                print()
+                return counts
+            time.sleep(self.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量提交OpenList离线下载")
+    parser.add_argument("urls", nargs="?", help="URL文件，每行: URL [目标目录]；省略时只处理台账中未完成的URL")
+    parser.add_argument("--path", default="/", help="默认目标目录")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--tool", default="SimpleHttp", help=f"离线下载工具 ({', '.join(TOOLS)})")
+    parser.add_argument("--delete-policy", default="delete_on_upload_succeed", choices=DELETE_POLICIES)
+    parser.add_argument("--target", type=int, default=10, help="服务端离线下载队列的目标长度")
+    parser.add_argument("--batch-size", type=int, default=50, help="单个请求最多携带的URL数")
+    parser.add_argument("--interval", type=float, default=3.0, help="轮询任务队列的间隔(秒)")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER_PATH, help="提交台账数据库")
+    parser.add_argument("--retry-failed", action="store_true", help="重新提交失败或被拒绝的URL")
+    parser.add_argument("--no-wait", action="store_true", help="全部提交后退出，不等待任务完成")
+    args = parser.parse_args()
+
+    ledger = Ledger(args.ledger)
+    if args.urls:
+        try:
+            added, duplicates = ledger.add_many(read_urls(args.urls, args.path))
+        except OSError as e:
+            print(f"❌ 读取URL文件失败: {e}")
+            sys.exit(1)
+        print(f"✓ 新增 {added} 个URL，跳过重复 {duplicates} 个")
+    if args.retry_failed:
+        print(f"✓ 重新排队 {ledger.reset((FAILED, REJECTED))} 个失败的URL")
+
+    client = OpenListClient(args.url, args.username, args.password)
+    if not client.token:
+        sys.exit(1)
+    submitter = OfflineSubmitter(client, ledger, args.tool, args.delete_policy, args.target,
+                                 args.batch_size, args.interval)
+    try:
+        counts = submitter.run(wait=not args.no_wait)
+    except RuntimeError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n⚠ 已中断，重新运行即可继续")
+        sys.exit(130)
+
+    print(f"✅ 完成 {counts.get(DONE, 0)}，已提交 {counts.get(SUBMITTED, 0)}，"
+          f"失败 {counts.get(FAILED, 0)}，被拒绝 {counts.get(REJECTED, 0)}，请求 {submitter.requests}")
+    sys.exit(1 if counts.get(FAILED) or counts.get(REJECTED) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+OpenList存储配置对账
+对比期望的存储配置(openlist_storages.json)与x_storages，
+只新增/更新/删除有差异的存储，并只热加载这些存储
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List
+
+from openlist_db import DEFAULT_DATA_DIR
+from openlist_manager import OpenListStorageManager, iter_storage_records
+from openlist_storage_apply import BASE_URL, StorageApplier
+
+# 不参与比较的字段
+IGNORED_FIELDS = {"id", "order", "modified", "mount_path", "addition", "status"}
+
+
+def normalize_addition(addition: Any) -> Dict[str, Any]:
+    """addition可能是JSON字符串或dict，统一为dict"""
+    if isinstance(addition, str):
+        try:
+            addition = json.loads(addition) if addition else {}
+        except ValueError:
+            return {"__raw__": addition}
+    return addition or {}
+
+
+def addition_digest(addition: Any) -> str:
+    """规范化后的addition摘要：键排序、紧凑分隔符，与字段顺序和空白无关"""
+    normalized = json.dumps(normalize_addition(addition), sort_keys=True,
+                            separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _normalize_value(value: Any) -> Any:
+    return int(value) if isinstance(value, bool) else value
+
+
+def plan_changes(current: Iterable[Dict[str, Any]], desired: Iterable[Dict[str, Any]],
+                 prune: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """计算最小变更计划
+
+    - add: 期望中有、数据库中没有的挂载
+    - update: addition摘要或其它给出的字段有变化的挂载；
+      期望中的addition按键覆盖到现有addition上，保留服务端补全的默认字段
+    - delete: 数据库中有、期望中没有的挂载（仅prune=True时），
+      以及驱动发生变化的挂载（驱动不能原地修改，先删后加）
+    """
+    existing = {row["mount_path"]: row for row in current}
+    plan: Dict[str, List[Dict[str, Any]]] = {"add": [], "update": [], "delete": []}
+    seen = set()
+
+    for storage in desired:
+        mount_path = (storage.get("mount_path") or "").strip()
+        if not mount_path or not storage.get("driver"):
+            continue
+        if not mount_path.startswith('/'):
+            mount_path = '/' + mount_path
+        if mount_path in seen:
+            continue
+        seen.add(mount_path)
+        storage = dict(storage, mount_path=mount_path)
+
+        row = existing.get(mount_path)
+        if row is None:
+            plan["add"].append(storage)
+            continue
+
+        if row.get("driver") != storage["driver"]:
+            plan["delete"].append(row)
+            plan["add"].append(storage)
+            continue
+
+        current_addition = normalize_addition(row.get("addition"))
+        merged = dict(current_addition)
+        merged.update(normalize_addition(storage.get("addition")))
+        changed = addition_digest(merged) != addition_digest(current_addition)
+        for key, value in storage.items():
+            if key in IGNORED_FIELDS or key not in row:
+                continue
+            if _normalize_value(value) != _normalize_value(row[key]):
+                changed = True
+        if changed:
+            plan["update"].append(dict(storage, addition=merged))
+
+    if prune:
+        plan["delete"].extend(row for path, row in existing.items() if path not in seen)
+    return plan
+
+
+def apply_plan(manager: OpenListStorageManager, plan: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+    """执行变更计划；manager处于热加载模式时提交后只重载变更的存储"""
+    # 删除单独提交：驱动变化的挂载需要旧记录先从表中移除，再按同一mount_path新增
+    if plan["delete"]:
+        # 开始事务前先从服务内存中卸载
+        with manager.transaction(unload=[row["id"] for row in plan["delete"]]):
+            for row in plan["delete"]:
+                manager.delete_storage(row["id"])
+    stats = manager.import_storages(plan["add"] + plan["update"])
+    stats["deleted"] = len(plan["delete"])
+    return stats
+
+
+def load_current(manager: OpenListStorageManager) -> List[Dict[str, Any]]:
+    with manager.db.connection() as conn:
+        return [dict(row) for row in conn.execute("SELECT * FROM x_storages")]
+
+
+def print_plan(plan: Dict[str, List[Dict[str, Any]]]):
+    labels = {"add": "新增", "update": "更新", "delete": "删除"}
+    for kind in ("add", "update", "delete"):
+        for storage in plan[kind]:
+            print(f"  {labels[kind]}: {storage['mount_path']} ({storage.get('driver', '')})")
+    print(f"共 新增 {len(plan['add'])}，更新 {len(plan['update'])}，删除 {len(plan['delete'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对账并应用OpenList存储配置")
+    parser.add_argument("config", nargs="?", default="openlist_storages.json",
+                        help="期望的存储配置，JSON文档或JSONL (默认: openlist_storages.json)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="OpenList数据目录")
+    parser.add_argument("--prune", action="store_true", help="删除配置中不存在的挂载")
+    parser.add_argument("--dry-run", action="store_true", help="只显示变更计划")
+    parser.add_argument("--no-apply", action="store_true", help="只写数据库，不热加载")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    args = parser.parse_args()
+
+    print("=== OpenList 存储配置对账 ===")
+
+    if not os.path.exists(args.config):
+        print(f"❌ 配置文件不存在: {args.config}")
+        return
+
+    applier = None if args.no_apply or args.dry_run else StorageApplier(args.url, args.username, args.password)
+    manager = OpenListStorageManager(args.data_dir, applier=applier)
+    if not os.path.exists(manager.db_path):
+        print(f"❌ 数据库文件不存在: {manager.db_path}")
+        return
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        plan = plan_changes(load_current(manager), iter_storage_records(f), prune=args.prune)
+
+    print_plan(plan)
+    if args.dry_run or not any(plan.values()):
+        return
+
+    stats = apply_plan(manager, plan)
+    print(f"✅ 对账完成: 新增 {stats['inserted']}，更新 {stats['updated']}，删除 {stats['deleted']}")
+
+
+if __name__ == "__main__":
+    main()
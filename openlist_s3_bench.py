@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+OpenList S3服务吞吐测试
+- ListObjectsV2: 按continuation token分页列出大前缀，统计每页延迟（首页/末页）、对象/秒，并检查重复和缺失的key
+- 分片上传: 多个对象并发上传，分片大小和每个对象的分片并发数可调
+- Range GET: 在上传的对象上并发随机读取固定大小的区间
+
+S3的access key/secret和bucket列表默认通过管理接口从设置(s3_access_key_id等)读取，
+建议bucket指向Local驱动的挂载，并用 --local-root 直接在磁盘上生成列表测试数据
+依赖boto3 (pip install -r requirements.txt)
+
+    python3 openlist_s3_bench.py --endpoint http://localhost:5245 --bucket bench --local-root /data/s3bench
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from openlist_bench_utils import parse_size, percentiles
+from openlist_client import BASE_URL, OpenListClient
+
+# docker-compose.yml中映射的S3端口（服务端配置s3.port的默认值为5246）
+DEFAULT_ENDPOINT = "http://localhost:5245"
+LIST_PREFIX = "s3bench/list_{}/"
+UPLOAD_PREFIX = "s3bench/upload/"
+
+
+def load_s3_settings(client: OpenListClient) -> Dict[str, Any]:
+    """从OpenList设置读取S3凭据和bucket列表（需要管理员）"""
+    settings = {}
+    for key in ("s3_access_key_id", "s3_secret_access_key", "s3_buckets"):
+        data = client.get("/api/admin/setting/get", params={"key": key})
+        if data.get("code") != 200:
+            raise RuntimeError(f"读取设置 {key} 失败: {data.get('message')}")
+        settings[key] = data["data"]["value"]
+    settings["s3_buckets"] = json.loads(settings["s3_buckets"] or "[]")
+    return settings
+
+
+def mount_driver(client: OpenListClient, path: str) -> Optional[str]:
+    """path所在挂载的驱动名（最长前缀匹配）"""
+    data = client.get("/api/admin/storage/list", params={"page": 1, "per_page": 0})
+    best, driver = "", None
+    for storage in (data.get("data") or {}).get("content") or []:
+        mount = storage.get("mount_path", "").rstrip('/')
+        if (path == mount or path.startswith(mount + '/')) and len(mount) >= len(best):
+            best, driver = mount, storage.get("driver")
+    return driver
+
+
+class S3Bench:
+    def __init__(self, s3, bucket: str, workers: int = 16, client: Optional[OpenListClient] = None,
+                 bucket_path: Optional[str] = None):
+        self.s3 = s3
+        self.bucket = bucket
+        self.workers = workers
+        # 直接在磁盘上生成数据后，用于刷新服务端的目录缓存
+        self.client = client
+        self.bucket_path = bucket_path
+
+    # ---------- ListObjectsV2 ----------
+
+    def count_prefix(self, prefix: str) -> int:
+        count = 0
+        for page in self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            count += page.get("KeyCount", 0)
+        return count
+
+    def ensure_listing_fixture(self, count: int, local_dir: Optional[str] = None) -> str:
+        """准备有count个小对象的前缀，已存在时直接使用"""
+        prefix = LIST_PREFIX.format(count)
+        if self.count_prefix(prefix) >= count:
+            return prefix
+        print(f"  创建 {prefix} ({count} 个对象)...")
+        names = [f"o{i:06d}" for i in range(count)]
+        if local_dir:
+            directory = os.path.join(local_dir, *prefix.strip('/').split('/'))
+            os.makedirs(directory, exist_ok=True)
+            for name in names:
+                with open(os.path.join(directory, name), 'ab'):
+                    pass
+            if self.client and self.bucket_path:
+                self.client.post("/api/fs/list", json={
+                    "path": f"{self.bucket_path.rstrip('/')}/{prefix.strip('/')}", "per_page": 1, "refresh": True})
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(lambda name: self.s3.put_object(Bucket=self.bucket, Key=prefix + name,
+                                                                  Body=b""), names))
+        return prefix
+
+    def bench_list(self, prefix: str, page_size: int = 1000, expected: Optional[int] = None) -> Dict[str, Any]:
+        """逐页ListObjectsV2直到结束，记录每页耗时"""
+        page_times: List[float] = []
+        keys: List[str] = []
+        token = None
+        began = time.perf_counter()
+        while True:
+            kwargs = {"Bucket": self.bucket, "Prefix": prefix, "MaxKeys": page_size}
+            if token:
+                kwargs["ContinuationToken"] = token
+            page_began = time.perf_counter()
+            response = self.s3.list_objects_v2(**kwargs)
+            page_times.append(time.perf_counter() - page_began)
+            keys.extend(obj["Key"] for obj in response.get("Contents") or [])
+            token = response.get("NextContinuationToken")
+            if not response.get("IsTruncated") or not token:
+                break
+        elapsed = time.perf_counter() - began
+
+        unique = len(set(keys))
+        p50, p95 = percentiles(page_times)
+        return {
+            "prefix": prefix,
+            "page_size": page_size,
+            "pages": len(page_times),
+            "objects": len(keys),
+            "duplicates": len(keys) - unique,
+            "missing": max(expected - unique, 0) if expected else None,
+            "seconds": elapsed,
+            "objects_per_s": len(keys) / elapsed if elapsed else 0,
+            "pages_per_s": len(page_times) / elapsed if elapsed else 0,
+            "first_page_ms": page_times[0] * 1000,
+            "last_page_ms": page_times[-1] * 1000,
+            "page_p50_ms": p50,
+            "page_p95_ms": p95,
+        }
+
+    # ---------- 分片上传 ----------
+
+    def _multipart(self, key: str, object_size: int, part_size: int, payload: bytes,
+                   part_concurrency: int, part_times: List[float]):
+        upload_id = self.s3.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+
+        def upload_part(number: int) -> Dict[str, Any]:
+            size = min(part_size, object_size - (number - 1) * part_size)
+            began = time.perf_counter()
+            response = self.s3.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                           PartNumber=number, Body=payload[:size])
+            part_times.append(time.perf_counter() - began)
+            return {"PartNumber": number, "ETag": response["ETag"]}
+
+        try:
+            with ThreadPoolExecutor(max_workers=part_concurrency) as executor:
+                parts = list(executor.map(upload_part, range(1, -(-object_size // part_size) + 1)))
+            self.s3.complete_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                              MultipartUpload={"Parts": parts})
+        except (BotoCoreError, ClientError):
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def bench_multipart(self, object_size: int, part_size: int, uploads: int,
+                        part_concurrency: int) -> Tuple[Dict[str, Any], List[str]]:
+        """uploads个对象同时分片上传；返回结果和上传成功的key"""
+        payload = os.urandom(min(part_size, object_size))
+        keys = [f"{UPLOAD_PREFIX}mp_{part_size}_{i:03d}.bin" for i in range(uploads)]
+        part_times: List[float] = []
+        errors = 0
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=uploads) as executor:
+            futures = {executor.submit(self._multipart, key, object_size, part_size, payload,
+                                       part_concurrency, part_times): key for key in keys}
+            done = []
+            for future, key in futures.items():
+                try:
+                    future.result()
+                    done.append(key)
+                except (BotoCoreError, ClientError) as e:
+                    errors += 1
+                    print(f"❌ {key}: {e}")
+        elapsed = time.perf_counter() - began
+
+        p50, p95 = percentiles(part_times)
+        return {
+            "object_size": object_size,
+            "part_size": part_size,
+            "uploads": uploads,
+            "part_concurrency": part_concurrency,
+            "errors": errors,
+            "seconds": elapsed,
+            "mb_per_s": len(done) * object_size / elapsed / 1024**2 if elapsed else 0,
+            "parts_per_s": len(part_times) / elapsed if elapsed else 0,
+            "part_p50_ms": p50,
+            "part_p95_ms": p95,
+        }, done
+
+    # ---------- Range GET ----------
+
+    def bench_ranged_get(self, keys: List[str], object_size: int, range_size: int, count: int,
+                         concurrency: int) -> Dict[str, Any]:
+        rng = random.Random(0)
+        jobs = []
+        for _ in range(count):
+            start = rng.randrange(0, max(object_size - range_size, 0) + 1)
+            jobs.append((rng.choice(keys), start, min(start + range_size, object_size) - 1))
+
+        def fetch(job) -> Tuple[float, int]:
+            key, start, end = job
+            began = time.perf_counter()
+            body = self.s3.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")["Body"]
+            received = 0
+            for chunk in iter(lambda: body.read(1024 * 1024), b""):
+                received += len(chunk)
+            return time.perf_counter() - began, received if received == end - start + 1 else -1
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, jobs))
+        elapsed = time.perf_counter() - began
+
+        received = sum(r[1] for r in results if r[1] > 0)
+        p50, p95 = percentiles([r[0] for r in results])
+        return {
+            "range_size": range_size,
+            "requests": count,
+            "concurrency": concurrency,
+            "errors": sum(1 for r in results if r[1] < 0),
+            "ops_per_s": count / elapsed if elapsed else 0,
+            "mb_per_s": received / elapsed / 1024**2 if elapsed else 0,
+            "p50_ms": p50,
+            "p95_ms": p95,
+        }
+
+    def cleanup(self, keys: List[str]):
+        for i in range(0, len(keys), 1000):
+            self.s3.delete_objects(Bucket=self.bucket, Delete={
+                "Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True})
+
+
+def print_results(results: Dict[str, List[Dict[str, Any]]]):
+    if results["list"]:
+        print(f"\n{'ListObjectsV2':<16}{'对象':>8}{'页数':>6}{'重复':>6}{'缺失':>6}{'对象/秒':>10}"
+              f"{'首页ms':>9}{'末页ms':>9}{'p50ms':>8}{'p95ms':>8}")
+        for r in results["list"]:
+            missing = "-" if r["missing"] is None else r["missing"]
+            print(f"{'页大小 ' + str(r['page_size']):<16}{r['objects']:>8}{r['pages']:>6}{r['duplicates']:>6}"
+                  f"{missing:>6}{r['objects_per_s']:>10.0f}{r['first_page_ms']:>9.1f}{r['last_page_ms']:>9.1f}"
+                  f"{r['page_p50_ms']:>8.1f}{r['page_p95_ms']:>8.1f}")
+    if results["multipart"]:
+        print(f"\n{'分片上传':<12}{'对象数':>6}{'分片并发':>8}{'错误':>6}{'MB/s':>10}{'分片/秒':>10}"
+              f"{'p50ms':>9}{'p95ms':>9}")
+        for r in results["multipart"]:
+            print(f"{'分片 ' + str(r['part_size'] // 1024**2) + 'MB':<12}{r['uploads']:>6}"
+                  f"{r['part_concurrency']:>8}{r['errors']:>6}{r['mb_per_s']:>10.1f}{r['parts_per_s']:>10.1f}"
+                  f"{r['part_p50_ms']:>9.1f}{r['part_p95_ms']:>9.1f}")
+    if results["range_get"]:
+        print(f"\n{'Range GET':<12}{'请求':>6}{'并发':>6}{'错误':>6}{'ops/s':>10}{'MB/s':>10}{'p50ms':>9}{'p95ms':>9}")
+        for r in results["range_get"]:
+            print(f"{str(r['range_size'] // 1024) + 'KB':<12}{r['requests']:>6}{r['concurrency']:>6}"
+                  f"{r['errors']:>6}{r['ops_per_s']:>10.1f}{r['mb_per_s']:>10.1f}{r['p50_ms']:>9.1f}"
+                  f"{r['p95_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList S3服务吞吐测试")
+    parser.add_argument("--endpoint", default=DEFAULT_ENDPOINT, help="S3服务地址")
+    parser.add_argument("--bucket", default=None, help="bucket名称 (默认设置中的第一个)")
+    parser.add_argument("--access-key", default=None, help="默认从OpenList设置读取")
+    parser.add_argument("--secret-key", default=None, help="默认从OpenList设置读取")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址（读取S3设置）")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--local-root", default=None, help="bucket对应的本地目录，用于快速生成列表测试数据")
+    parser.add_argument("--list-sizes", default="10000", help="列表测试的对象数")
+    parser.add_argument("--page-sizes", default="1000", help="ListObjectsV2的MaxKeys列表")
+    parser.add_argument("--object-size", default="256M", help="分片上传的对象大小")
+    parser.add_argument("--part-sizes", default="8M,16M", help="分片大小列表")
+    parser.add_argument("--uploads", type=int, default=4, help="同时上传的对象数")
+    parser.add_argument("--part-concurrency", type=int, default=4, help="每个对象同时上传的分片数")
+    parser.add_argument("--range-size", default="1M", help="Range GET的区间大小")
+    parser.add_argument("--gets", type=int, default=200, help="Range GET请求数")
+    parser.add_argument("--get-concurrency", default="1,8", help="Range GET并发数列表")
+    parser.add_argument("--skip-list", action="store_true")
+    parser.add_argument("--skip-upload", action="store_true", help="跳过分片上传和Range GET")
+    parser.add_argument("--keep", action="store_true", help="保留上传的对象")
+    parser.add_argument("--json", default=None, help="同时把结果写入JSON文件")
+    args = parser.parse_args()
+
+    print("=== OpenList S3 吞吐测试 ===")
+    access_key, secret_key, bucket = args.access_key, args.secret_key, args.bucket
+    bucket_path = None
+    client = OpenListClient(args.url, args.username, args.password)
+    try:
+        if not (access_key and secret_key and bucket):
+            settings = load_s3_settings(client)
+            access_key = access_key or settings["s3_access_key_id"]
+            secret_key = secret_key or settings["s3_secret_access_key"]
+            buckets = {b["name"]: b["path"] for b in settings["s3_buckets"]}
+            if not buckets:
+                raise RuntimeError("OpenList中没有配置S3 bucket")
+            bucket = bucket or next(iter(buckets))
+            if bucket in buckets:
+                bucket_path = buckets[bucket]
+                driver = mount_driver(client, bucket_path)
+                print(f"bucket: {bucket} -> {buckets[bucket]} (驱动: {driver or '未知'})")
+                if driver != "Local":
+                    print("⚠ bucket不在Local驱动挂载下，结果会包含上游存储的延迟")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+
+    concurrency = [int(n) for n in args.get_concurrency.split(',') if n.strip()]
+    pool = max(16, args.uploads * args.part_concurrency, *concurrency)
+    s3 = boto3.client("s3", endpoint_url=args.endpoint, aws_access_key_id=access_key,
+                      aws_secret_access_key=secret_key, region_name="us-east-1",
+                      config=Config(s3={"addressing_style": "path"}, max_pool_connections=pool,
+                                    retries={"max_attempts": 1}))
+    bench = S3Bench(s3, bucket, client=client, bucket_path=bucket_path)
+    results: Dict[str, List[Dict[str, Any]]] = {"list": [], "multipart": [], "range_get": []}
+
+    try:
+        if not args.skip_list:
+            for count in [int(n) for n in args.list_sizes.split(',') if n.strip()]:
+                prefix = bench.ensure_listing_fixture(count, args.local_root)
+                for page_size in [int(n) for n in args.page_sizes.split(',') if n.strip()]:
+                    results["list"].append(bench.bench_list(prefix, page_size, expected=count))
+
+        if not args.skip_upload:
+            object_size = parse_size(args.object_size)
+            uploaded: List[str] = []
+            try:
+                for part_size in [parse_size(s) for s in args.part_sizes.split(',') if s.strip()]:
+                    result, keys = bench.bench_multipart(object_size, part_size, args.uploads,
+                                                         args.part_concurrency)
+                    results["multipart"].append(result)
+                    uploaded.extend(keys)
+                if uploaded:
+                    for n in concurrency:
+                        results["range_get"].append(bench.bench_ranged_get(
+                            uploaded, object_size, parse_size(args.range_size), args.gets, n))
+            finally:
+                if uploaded and not args.keep:
+                    bench.cleanup(uploaded)
+    except (BotoCoreError, ClientError) as e:
+        print(f"❌ {e}")
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+OpenList存储热加载
+直接修改data.db后，通过管理API只重新加载变更的存储，
+服务不可达时才退回到重启服务
+"""
+
+import subprocess
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import requests
+
+from openlist_client import BASE_URL, TOKEN_CACHE_FILE, OpenListClient
+
+# 服务不可达时依次尝试的重启命令
+RESTART_COMMANDS = [
+    ["docker", "restart", "openlist"],
+    ["systemctl", "restart", "openlist"],
+    ["service", "openlist", "restart"],
+]
+
+
+class StorageApplier:
+    """通过 /api/admin/storage/* 热加载存储
+
+    - 新增: update(disabled=true) + enable，只加载这一个存储
+    - 修改: update，服务端drop后重新初始化该存储
+    - 删除: 通过delete接口由服务端卸载并删除记录；批量事务中删除时先disable卸载
+    - 修改数量超过load_all_threshold时改用load_all一次性重载（只涉及已挂载的存储）
+    """
+
+    def __init__(self, base_url: str = BASE_URL, username: str = "admin", password: str = "admin",
+                 token_file: str = TOKEN_CACHE_FILE, load_all_threshold: int = 20, timeout: int = 30):
+        self.client = OpenListClient(base_url, username, password, token_file, timeout)
+        self.load_all_threshold = load_all_threshold
+        self.reachable = True
+
+    def _request(self, method: str, path: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """调用管理API；服务不可达时标记reachable=False"""
+        if not self.reachable:
+            return None
+
+        try:
+            if not self.client.token:
+                return None
+            return self.client.request(method, path, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            print(f"⚠ OpenList服务不可达: {e}")
+            self.reachable = False
+        except ValueError as e:
+            print(f"⚠ 响应解析失败: {e}")
+        return None
+
+    def _ok(self, data: Optional[Dict[str, Any]], action: str) -> bool:
+        if data and data.get("code") == 200:
+            return True
+        if data:
+            print(f"❌ {action}失败: {data.get('message')}")
+        return False
+
+    def get_storage(self, storage_id: int) -> Optional[Dict[str, Any]]:
+        data = self._request("GET", "/api/admin/storage/get", params={"id": storage_id})
+        return data.get("data") if self._ok(data, f"获取存储 {storage_id} ") else None
+
+    def load_new(self, storage_id: int) -> bool:
+        """加载新写入数据库的存储"""
+        storage = self.get_storage(storage_id)
+        if storage is None:
+            return False
+        if not storage.get("disabled"):
+            # enable只对已禁用的存储生效，先标记为禁用
+            storage["disabled"] = True
+            if not self._ok(self._request("POST", "/api/admin/storage/update", json=storage),
+                            f"标记存储 {storage_id} "):
+                return False
+        return self._ok(self._request("POST", "/api/admin/storage/enable", params={"id": storage_id}),
+                        f"加载存储 {storage_id} ")
+
+    def reload(self, storage_id: int) -> bool:
+        """按数据库中的最新配置重新初始化一个存储"""
+        storage = self.get_storage(storage_id)
+        if storage is None:
+            return False
+        return self._ok(self._request("POST", "/api/admin/storage/update", json=storage),
+                        f"重载存储 {storage_id} ")
+
+    def unload(self, storage_id: int) -> bool:
+        """从服务内存中卸载存储，应在删除数据库记录之前调用"""
+        data = self._request("POST", "/api/admin/storage/disable", params={"id": storage_id})
+        # 已禁用的存储本来就没有加载
+        return self._ok(data, f"卸载存储 {storage_id} ") or bool(data and "disabled" in str(data.get("message")))
+
+    def delete(self, storage_id: int) -> bool:
+        """通过管理API删除存储：服务端卸载驱动并删除数据库记录"""
+        return self._ok(self._request("POST", "/api/admin/storage/delete", params={"id": storage_id}),
+                        f"删除存储 {storage_id} ")
+
+    def drop_deleted(self, storage_ids: Iterable[int],
+                     fallback: Optional[Callable[[], bool]] = None) -> bool:
+        """处理数据库记录已被删除、但可能仍在服务内存中的存储
+
+        服务端只能按数据库中的记录卸载存储，记录删除后无法单独卸载；
+        默认只提示，指定fallback（如restart）时才执行
+        """
+        storage_ids = list(storage_ids)
+        if not storage_ids:
+            return True
+        ids = ', '.join(map(str, storage_ids))
+        if fallback is None:
+            print(f"⚠ 存储 {ids} 删除前未卸载，服务重启前仍会显示；"
+                  f"批量删除请使用 transaction(unload=...)")
+            return False
+        print(f"⚠ 存储 {ids} 删除前未卸载，执行兜底操作")
+        return fallback()
+
+    def load_all(self) -> bool:
+        """重新初始化服务内存中已加载的存储（服务端异步执行）
+
+        只处理已挂载的存储：数据库中新增的不会被挂载，已删除的也不会被卸载
+        """
+        return self._ok(self._request("POST", "/api/admin/storage/load_all"), "重载已挂载的存储")
+
+    def restart(self) -> bool:
+        """服务不可达时的兜底：重启OpenList"""
+        for cmd in RESTART_COMMANDS:
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                if result.returncode == 0:
+                    print(f"✓ 已通过 {' '.join(cmd)} 重启OpenList")
+                    return True
+            except OSError:
+                continue
+        print("⚠ 无法自动重启OpenList，请手动重启服务")
+        return False
+
+    def apply(self, added: Iterable[int] = (), updated: Iterable[int] = (),
+              fallback: Optional[Callable[[], bool]] = None) -> bool:
+        """热加载变更的存储，服务不可达时退回到重启（可通过fallback替换重启方式）"""
+        added, updated = list(added), list(updated)
+        ok = True
+        for storage_id in added:
+            ok = self.load_new(storage_id) and ok
+        if len(updated) > self.load_all_threshold:
+            ok = self.load_all() and ok
+        else:
+            for storage_id in updated:
+                ok = self.reload(storage_id) and ok
+
+        if not self.reachable:
+            return (fallback or self.restart)()
+        if ok and (added or updated):
+            print(f"✅ 已热加载 {len(added) + len(updated)} 个存储")
+        return ok
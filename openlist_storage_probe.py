@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+OpenList存储健康与延迟探测
+读取x_storages中的所有挂载，通过 /api/fs/list 并发列出每个挂载的根目录（有并发上限和超时），
+重复多轮统计延迟分位数，输出慢或故障的挂载，用于找出拖慢目录浏览的存储
+
+默认带refresh=true跳过服务端缓存，测的是上游存储的真实延迟；
+指定 --store 时把每次探测的延迟、错误和容量写入指标库，用 openlist_metrics_store.py trend 查看趋势
+
+    python3 openlist_storage_probe.py --runs 5 --concurrency 8 --csv probe.csv
+"""
+
+import argparse
+import csv
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from openlist_client import BASE_URL, OpenListClient
+from openlist_db import DEFAULT_DATA_DIR
+from openlist_manager import OpenListStorageManager
+from openlist_metrics_store import CAPACITY_FREE, CAPACITY_TOTAL, LIST_LATENCY, MetricsStore
+
+OK, SLOW, BROKEN = "正常", "慢", "故障"
+
+
+def load_storages(data_dir: str, client: Optional[OpenListClient] = None) -> List[Dict[str, Any]]:
+    """优先直接读x_storages；指定client时改用管理接口（数据库不在本机时）"""
+    if client is None:
+        return OpenListStorageManager(data_dir).get_storages()
+    data = client.get("/api/admin/storage/list", params={"page": 1, "per_page": 0})
+    if data.get("code") != 200:
+        raise RuntimeError(f"获取存储列表失败: {data.get('message')}")
+    return (data.get("data") or {}).get("content") or []
+
+
+class StorageProber:
+    def __init__(self, client: OpenListClient, concurrency: int = 8, timeout: float = 15,
+                 per_page: int = 100, refresh: bool = True):
+        self.client = client
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.per_page = per_page
+        self.refresh = refresh
+
+    def probe(self, mount_path: str) -> Dict[str, Any]:
+        """列一次挂载根目录，返回开始时间、耗时、条目数和错误"""
+        result = {"ts": time.time(), "seconds": 0.0, "items": None, "error": None}
+        began = time.perf_counter()
+        try:
+            data = self.client.post("/api/fs/list", json={
+                "path": mount_path, "page": 1, "per_page": self.per_page, "refresh": self.refresh,
+            }, timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            data = {"message": f"超时 (>{self.timeout:g}秒)"}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            data = {"message": str(e)}
+        result["seconds"] = time.perf_counter() - began
+        if data.get("code") != 200:
+            result["error"] = data.get("message") or f"code {data.get('code')}"
+        else:
+            result["items"] = (data.get("data") or {}).get("total", 0)
+        return result
+
+    def run(self, storages: List[Dict[str, Any]], runs: int = 3) -> Dict[str, List[Dict[str, Any]]]:
+        """每轮并发探测所有挂载，共runs轮"""
+        mounts = [s["mount_path"] for s in storages]
+        samples: Dict[str, List[Dict[str, Any]]] = {m: [] for m in mounts}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for i in range(runs):
+                for mount, result in zip(mounts, executor.map(self.probe, mounts)):
+                    samples[mount].append(result)
+                print(f"  第 {i + 1}/{runs} 轮完成", end="\r", flush=True)
+        print()
+        return samples
+
+
+def summarize(storage: Dict[str, Any], samples: List[Dict[str, Any]], slow_ms: float) -> Dict[str, Any]:
+    ok = [s["seconds"] * 1000 for s in samples if s["error"] is None]
+    errors = [s["error"] for s in samples if s["error"] is not None]
+    if len(ok) > 1:
+        cuts = statistics.quantiles(ok, n=100, method="inclusive")
+        p50, p95 = cuts[49], cuts[94]
+    else:
+        p50 = p95 = ok[0] if ok else None
+
+    if errors:
+        verdict = BROKEN
+    elif p95 is not None and p95 >= slow_ms:
+        verdict = SLOW
+    else:
+        verdict = OK
+    return {
+        "id": storage.get("id"),
+        "mount_path": storage["mount_path"],
+        "driver": storage.get("driver"),
+        "storage_status": storage.get("status"),
+        "verdict": verdict,
+        "ok": len(ok),
+        "runs": len(samples),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "max_ms": max(ok) if ok else None,
+        "items": next((s["items"] for s in samples if s["items"] is not None), None),
+        "error": errors[-1] if errors else "",
+    }
+
+
+def fetch_capacity(client: OpenListClient) -> Dict[str, Dict[str, int]]:
+    """管理接口返回的各挂载容量 {挂载路径: {"total_space", "free_space"}}，驱动不支持时没有"""
+    data = client.get("/api/admin/storage/list", params={"page": 1, "per_page": 0})
+    return {s["mount_path"]: s["mount_details"] for s in (data.get("data") or {}).get("content") or []
+            if s.get("mount_details")}
+
+
+def record_results(store: MetricsStore, samples: Dict[str, List[Dict[str, Any]]],
+                   capacity: Dict[str, Dict[str, int]]):
+    records = [(s["ts"], mount, LIST_LATENCY, s["seconds"] * 1000 if s["error"] is None else None,
+                s["error"] is None)
+               for mount, results in samples.items() for s in results]
+    now = time.time()
+    for mount, details in capacity.items():
+        if mount in samples:
+            records.append((now, mount, CAPACITY_TOTAL, details.get("total_space"), True))
+            records.append((now, mount, CAPACITY_FREE, details.get("free_space"), True))
+    store.record(records)
+    store.compact()
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def print_table(rows: List[Dict[str, Any]], only_problems: bool = False):
+    print(f"\n{'挂载路径':<28}{'驱动':<16}{'结果':<6}{'成功':>7}{'p50':>8}{'p95':>8}{'max':>8}{'条目':>7}  错误")
+    for r in rows:
+        if only_problems and r["verdict"] == OK:
+            continue
+        items = "-" if r["items"] is None else r["items"]
+        print(f"{r['mount_path'][:27]:<28}{(r['driver'] or '')[:15]:<16}{r['verdict']:<6}"
+              f"{str(r['ok']) + '/' + str(r['runs']):>7}{_fmt(r['p50_ms']):>8}{_fmt(r['p95_ms']):>8}"
+              f"{_fmt(r['max_ms']):>8}{items:>7}  {r['error'][:60]}")
+    print("  (毫秒)")
+
+
+def write_csv(path: str, rows: List[Dict[str, Any]]):
+    fields = ["id", "mount_path", "driver", "storage_status", "verdict", "ok", "runs",
+              "p50_ms", "p95_ms", "max_ms", "items", "error"]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发探测所有OpenList挂载的健康状态和延迟")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="OpenList数据目录(包含data.db)")
+    parser.add_argument("--from-api", action="store_true", help="通过管理接口获取存储列表，而不是读数据库")
+    parser.add_argument("--runs", type=int, default=3, help="探测轮数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时探测的挂载数")
+    parser.add_argument("--timeout", type=float, default=15, help="单次列目录超时(秒)")
+    parser.add_argument("--slow-ms", type=float, default=2000, help="p95超过该值视为慢")
+    parser.add_argument("--no-refresh", action="store_true", help="使用服务端缓存（测缓存命中时的延迟）")
+    parser.add_argument("--include-disabled", action="store_true", help="也探测已禁用的挂载")
+    parser.add_argument("--all", action="store_true", help="表格中也列出正常的挂载")
+    parser.add_argument("--csv", default=None, help="把全部结果写入CSV文件")
+    parser.add_argument("--store", default=None, help="把探测结果追加到指标库(SQLite)")
+    args = parser.parse_args()
+
+    print("=== OpenList 存储探测 ===")
+    client = OpenListClient(args.url, args.username, args.password, pool_size=max(10, args.concurrency))
+    if not client.token:
+        sys.exit(1)
+    try:
+        storages = load_storages(args.data_dir, client if args.from_api else None)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    disabled = [s for s in storages if s.get("disabled")]
+    if not args.include_disabled:
+        storages = [s for s in storages if not s.get("disabled")]
+    if not storages:
+        print("暂无存储配置")
+        return
+    print(f"探测 {len(storages)} 个挂载，{args.runs} 轮，并发 {args.concurrency}，超时 {args.timeout:g}秒")
+
+    prober = StorageProber(client, args.concurrency, args.timeout, refresh=not args.no_refresh)
+    started = time.time()
+    samples = prober.run(storages, args.runs)
+    rows = [summarize(s, samples[s["mount_path"]], args.slow_ms) for s in storages]
+    # 故障在前，其余按p95从慢到快
+    rows.sort(key=lambda r: (r["verdict"] != BROKEN, -(r["p95_ms"] or 0)))
+
+    print_table(rows, only_problems=not args.all)
+    counts = {v: sum(1 for r in rows if r["verdict"] == v) for v in (OK, SLOW, BROKEN)}
+    print(f"\n✅ 用时 {time.time() - started:.1f}秒：正常 {counts[OK]}，慢 {counts[SLOW]}，故障 {counts[BROKEN]}"
+          + (f"，跳过已禁用 {len(disabled)}" if disabled and not args.include_disabled else ""))
+    if args.csv:
+        write_csv(args.csv, rows)
+        print(f"✓ 结果已保存: {args.csv}")
+    if args.store:
+        record_results(MetricsStore(args.store), samples, fetch_capacity(client))
+        print(f"✓ 已记录到指标库: {args.store}")
+    sys.exit(1 if counts[BROKEN] else 0)
+
+
+if __name__ == "__main__":
+    main()
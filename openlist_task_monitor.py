@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+OpenList任务队列监控
+用同一个连接定期拉取各类任务(upload/copy/move/offline_download/decompress...)的未完成列表，
+与上一次的快照比较，计算各类任务的吞吐(bytes/s)、排队深度和卡住的任务，
+以类似top的界面实时显示，或输出Prometheus文本格式
+
+    python3 openlist_task_monitor.py                  # 实时界面
+    python3 openlist_task_monitor.py --prometheus     # 间隔采样两次，输出到标准输出
+    python3 openlist_task_monitor.py --listen 9105    # 提供 /metrics
+"""
+
+import argparse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from openlist_client import BASE_URL, OpenListClient
+
+TASK_TYPES = ("upload", "copy", "move", "offline_download", "offline_download_transfer",
+              "decompress", "decompress_upload")
+
+# tache任务状态
+STATE_NAMES = {
+    0: "pending", 1: "running", 2: "succeeded", 3: "canceling", 4: "canceled",
+    5: "errored", 6: "failing", 7: "failed", 8: "waiting_retry", 9: "before_retry",
+}
+STATE_RUNNING, STATE_SUCCEEDED, STATE_CANCELED = 1, 2, 4
+# 排队中（等待运行或等待重试）的状态
+QUEUED_STATES = (0, 8, 9)
+
+
+def format_size(bytes_size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if bytes_size < 1024:
+            return f"{bytes_size:.1f} {unit}"
+        bytes_size /= 1024
+    return f"{bytes_size:.1f} TB"
+
+
+class TaskState:
+    """单个任务上一次观察到的状态"""
+
+    def __init__(self, info: Dict[str, Any], now: float):
+        self.name = info.get("name", "")
+        self.state = info.get("state")
+        self.total = info.get("total_bytes") or 0
+        self.done = self.total * (info.get("progress") or 0) / 100
+        self.speed = 0.0
+        self.changed_at = now
+
+
+class TaskMonitor:
+    """增量比较任务快照
+
+    - 仍在列表中的任务：已完成字节数 = total_bytes * progress，按与上次的差值计算速度
+    - 从未完成列表中消失的任务到 /done 中查最终状态：成功的剩余字节计入本轮吞吐，
+      失败和取消的分别计数、不计字节；/done 中暂时查不到的留到下一轮再查
+    - 运行中且超过stall_after秒没有进度的任务记为卡住
+    """
+
+    # 消失的任务在 /done 中最多查找的轮数，之后放弃（可能已被清除）
+    FINISH_LOOKUPS = 3
+
+    def __init__(self, client: OpenListClient, types=TASK_TYPES, stall_after: float = 60):
+        self.client = client
+        self.types = list(types)
+        self.stall_after = stall_after
+        self.tasks: Dict[str, Dict[str, TaskState]] = {t: {} for t in self.types}
+        self.rates: Dict[str, float] = {t: 0.0 for t in self.types}
+        self.completed: Dict[str, int] = {t: 0 for t in self.types}
+        self.failed: Dict[str, int] = {t: 0 for t in self.types}
+        self.canceled: Dict[str, int] = {t: 0 for t in self.types}
+        # 已离开未完成列表、尚未确认最终状态的任务 {类型: {ID: [状态, 已查找轮数]}}
+        self.finishing: Dict[str, Dict[str, list]] = {t: {} for t in self.types}
+        self.bytes_total: Dict[str, float] = {t: 0.0 for t in self.types}
+        self.last_poll: Optional[float] = None
+        self.errors = 0
+
+    def _fetch(self, task_type: str, kind: str = "undone") -> Optional[List[Dict[str, Any]]]:
+        try:
+            data = self.client.get(f"/api/task/{task_type}/{kind}")
+        except Exception:
+            self.errors += 1
+            return None
+        if data.get("code") != 200:
+            self.errors += 1
+            return None
+        return data.get("data") or []
+
+    def poll(self):
+        now = time.time()
+        elapsed = now - self.last_poll if self.last_poll else None
+        for task_type in self.types:
+            infos = self._fetch(task_type)
+            if infos is None:
+                continue
+            previous = self.tasks[task_type]
+            current: Dict[str, TaskState] = {}
+            moved = 0.0
+            for info in infos:
+                state = TaskState(info, now)
+                old = previous.get(info["id"])
+                if old is not None:
+                    delta = max(0.0, state.done - old.done)
+                    moved += delta
+                    if elapsed:
+                        state.speed = delta / elapsed
+                    if not delta and state.state == old.state:
+                        state.changed_at = old.changed_at
+                current[info["id"]] = state
+
+            finishing = self.finishing[task_type]
+            for task_id, old in previous.items():
+                if task_id not in current:
+                    finishing[task_id] = [old, 0]
+            if finishing:
+                moved += self._settle(task_type, finishing)
+
+            self.tasks[task_type] = current
+            self.bytes_total[task_type] += moved
+            if elapsed:
+                rate = moved / elapsed
+                # 指数滑动平均，平滑任务结束时的突增
+                self.rates[task_type] = rate if not self.rates[task_type] else \
+                    self.rates[task_type] * 0.6 + rate * 0.4
+        self.last_poll = now
+
+    def _settle(self, task_type: str, finishing: Dict[str, list]) -> float:
+        """按 /done 中的最终状态记账，返回成功任务剩余的字节数"""
+        done = self._fetch(task_type, "done")
+        if done is None:
+            return 0.0
+        final = {info["id"]: info.get("state") for info in done}
+        moved = 0.0
+        for task_id in list(finishing):
+            old, lookups = finishing[task_id]
+            state = final.get(task_id)
+            if state is None:
+                if lookups + 1 >= self.FINISH_LOOKUPS:
+                    del finishing[task_id]
+                else:
+                    finishing[task_id][1] = lookups + 1
+                continue
+            del finishing[task_id]
+            if state == STATE_SUCCEEDED:
+                self.completed[task_type] += 1
+                moved += max(0.0, old.total - old.done)
+            elif state == STATE_CANCELED:
+                self.canceled[task_type] += 1
+            else:
+                self.failed[task_type] += 1
+        return moved
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        result = {}
+        for task_type in self.types:
+            tasks = self.tasks[task_type].values()
+            states: Dict[str, int] = {}
+            for task in tasks:
+                name = STATE_NAMES.get(task.state, str(task.state))
+                states[name] = states.get(name, 0) + 1
+            result[task_type] = {
+                "states": states,
+                "queue": sum(1 for t in tasks if t.state in QUEUED_STATES),
+                "running": states.get("running", 0),
+                "stalled": len(self.stalled(task_type, now)),
+                "bytes_per_s": self.rates[task_type],
+                "completed": self.completed[task_type],
+                "failed": self.failed[task_type],
+                "canceled": self.canceled[task_type],
+                "bytes_total": self.bytes_total[task_type],
+            }
+        return result
+
+    def stalled(self, task_type: str, now: Optional[float] = None) -> List[TaskState]:
+        now = now or time.time()
+        return [t for t in self.tasks[task_type].values()
+                if t.state == STATE_RUNNING and now - t.changed_at >= self.stall_after]
+
+    def prometheus(self) -> str:
+        summary = self.summary()
+        lines = [
+            "# HELP openlist_tasks Unfinished tasks by type and state",
+            "# TYPE openlist_tasks gauge",
+        ]
+        for task_type, s in summary.items():
+            for state, count in s["states"].items():
+                lines.append(f'openlist_tasks{{type="{task_type}",state="{state}"}} {count}')
+        metrics = [
+            ("openlist_task_queue_depth", "gauge", "Tasks waiting to run", "queue"),
+            ("openlist_task_stalled", "gauge", "Running tasks without progress", "stalled"),
+            ("openlist_task_bytes_per_second", "gauge", "Transfer rate", "bytes_per_s"),
+            ("openlist_task_completed_total", "counter", "Tasks that finished successfully", "completed"),
+            ("openlist_task_failed_total", "counter", "Tasks that finished as failed", "failed"),
+            ("openlist_task_canceled_total", "counter", "Tasks that were canceled", "canceled"),
+            ("openlist_task_bytes_total", "counter", "Bytes transferred while monitored", "bytes_total"),
+        ]
+        for name, kind, help_text, key in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for task_type, s in summary.items():
+                lines.append(f'{name}{{type="{task_type}"}} {s[key]:g}')
+        lines.append("# HELP openlist_task_poll_errors_total Failed task list requests")
+        lines.append("# TYPE openlist_task_poll_errors_total counter")
+        lines.append(f"openlist_task_poll_errors_total {self.errors}")
+        return "\n".join(lines) + "\n"
+
+    def render(self, top: int = 15) -> str:
+        now = time.time()
+        summary = self.summary()
+        lines = [f"OpenList 任务监控  {time.strftime('%H:%M:%S')}  (Ctrl+C 退出)", "",
+                 f"{'类型':<26}{'运行':>6}{'排队':>6}{'卡住':>6}{'完成':>7}{'失败':>6}{'取消':>6}"
+                 f"{'速度':>14}{'累计':>12}"]
+        for task_type, s in summary.items():
+            lines.append(f"{task_type:<26}{s['running']:>6}{s['queue']:>6}{s['stalled']:>6}"
+                         f"{s['completed']:>7}{s['failed']:>6}{s['canceled']:>6}"
+                         f"{format_size(s['bytes_per_s']) + '/s':>14}"
+                         f"{format_size(s['bytes_total']):>12}")
+
+        running = [(task_type, t) for task_type in self.types for t in self.tasks[task_type].values()
+                   if t.state == STATE_RUNNING]
+        running.sort(key=lambda item: item[1].speed, reverse=True)
+        lines += ["", f"{'类型':<20}{'进度':>8}{'速度':>14}  名称"]
+        for task_type, t in running[:top]:
+            progress = t.done / t.total * 100 if t.total else 0
+            mark = " ⚠卡住" if now - t.changed_at >= self.stall_after else ""
+            lines.append(f"{task_type:<20}{progress:>7.1f}%{format_size(t.speed) + '/s':>14}  {t.name[:60]}{mark}")
+        return "\n".join(lines)
+
+
+def serve_metrics(monitor: TaskMonitor, port: int, interval: float):
+    """后台定期采样，HTTP /metrics 返回最近一次结果"""
+    lock = threading.Lock()
+
+    def loop():
+        while True:
+            with lock:
+                monitor.poll()
+            time.sleep(interval)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            with lock:
+                body = monitor.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    threading.Thread(target=loop, daemon=True).start()
+    print(f"✓ Prometheus指标: http://0.0.0.0:{port}/metrics")
+    ThreadingHTTPServer(("", port), Handler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList任务队列监控")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--types", default=",".join(TASK_TYPES), help="监控的任务类型，逗号分隔")
+    parser.add_argument("--interval", type=float, default=2.0, help="采样间隔(秒)")
+    parser.add_argument("--stall-after", type=float, default=60, help="无进度超过该秒数视为卡住")
+    parser.add_argument("--prometheus", action="store_true", help="采样两次后输出Prometheus文本并退出")
+    parser.add_argument("--listen", type=int, default=None, help="在该端口提供 /metrics")
+    args = parser.parse_args()
+
+    # 只用一个连接，避免监控本身给服务端增加负担
+    client = OpenListClient(args.url, args.username, args.password, pool_size=1)
+    if not client.token:
+        sys.exit(1)
+    monitor = TaskMonitor(client, [t.strip() for t in args.types.split(',') if t.strip()], args.stall_after)
+
+    if args.listen:
+        serve_metrics(monitor, args.listen, args.interval)
+    elif args.prometheus:
+        monitor.poll()
+        time.sleep(args.interval)
+        monitor.poll()
+        sys.stdout.write(monitor.prometheus())
+    else:
+        try:
+            while True:
+                monitor.poll()
+                # 清屏并回到左上角
+                print("\033[H\033[2J" + monitor.render(), flush=True)
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ import subprocess
 import time
 from pathlib import Path
 
+from openlist_storage_apply import StorageApplier
+
 def find_openlist_config():
     """查找OpenList配置文件"""
     print("\n=== 查找OpenList配置 ===")
@@ -106,11 +108,12 @@ def add_new_storage(config_path, storage_config):
             "work"
         ))
         
+        storage_id = cursor.lastrowid
         conn.commit()
         conn.close()
         
         print(f"✓ 已添加新存储: {storage_config['mount_path']}")
-        return True
+        return storage_id
     except Exception as e:
         print(f"添加存储失败: {e}")
         return False
@@ -172,6 +175,19 @@ def restart_openlist():
     print("⚠ 无法自动重启OpenList，请手动重启服务")
     return False
 
+def apply_to_openlist(added_ids=(), updated_ids=()):
+    """使配置生效：通过管理API只热加载变更的存储，OpenList不可达时才重启服务
+
+    不知道改了哪些存储时重启服务：load_all只重新初始化已挂载的存储，
+    不会挂载新增的记录，也不会卸载已删除的记录
+    """
+    print("\n=== 应用配置到OpenList ===")
+    if not (added_ids or updated_ids):
+        return restart_openlist()
+    
+    applier = StorageApplier()
+    return applier.apply(added=added_ids, updated=updated_ids, fallback=restart_openlist)
+
 def manage_existing_storage(config_path, storage_id, storage_info):
     """管理现有存储"""
     print(f"\n管理存储: {storage_info['mount_path']} ({storage_info['driver']})")
@@ -187,8 +203,7 @@ def manage_existing_storage(config_path, storage_id, storage_info):
             new_token = get_aliyun_token_with_alist()
             if new_token:
                 current_addition['refresh_token'] = new_token
-                update_storage_token(config_path, storage_id, current_addition)
-                return True
+                return update_storage_token(config_path, storage_id, current_addition)
     
     elif storage_info['driver'] == 'BaiduNetdisk':
         current_token = current_addition.get('refresh_token', '')
@@ -199,8 +214,7 @@ def manage_existing_storage(config_path, storage_id, storage_info):
             new_token = get_baidu_token_with_alist()
             if new_token:
                 current_addition['refresh_token'] = new_token
-                update_storage_token(config_path, storage_id, current_addition)
-                return True
+                return update_storage_token(config_path, storage_id, current_addition)
     
     elif storage_info['driver'] == 'Quark':
         current_cookie = current_addition.get('cookie', '')
@@ -211,8 +225,7 @@ def manage_existing_storage(config_path, storage_id, storage_info):
             new_cookie = get_quark_cookie()
             if new_cookie:
                 current_addition['cookie'] = new_cookie
-                update_storage_token(config_path, storage_id, current_addition)
-                return True
+                return update_storage_token(config_path, storage_id, current_addition)
     
     return False
 
@@ -301,7 +314,7 @@ def main():
         print("\n操作选项:")
         print("1. 管理现有存储 (更新token)")
         print("2. 添加新云盘存储")
-        print("3. 重启OpenList服务")
+        print("3. 重启OpenList使全部配置生效")
         print("4. 退出")
         
         choice = input("\n请选择 (1-4): ").strip()
@@ -312,20 +325,21 @@ def main():
                 if manage_existing_storage(config_path, storage_id, current_storages[storage_id]):
                     # 更新后重新加载配置
                     current_storages = get_current_storages(config_path)
-                    if input("是否重启OpenList服务? (y/n): ").lower() == 'y':
-                        restart_openlist()
+                    if input("是否立即应用到OpenList? (y/n): ").lower() == 'y':
+                        apply_to_openlist(updated_ids=[storage_id])
             else:
                 print("无效的存储ID")
         
         elif choice == '2':
-            if add_new_cloud_storage(config_path):
+            new_storage_id = add_new_cloud_storage(config_path)
+            if new_storage_id:
                 # 更新后重新加载配置
                 current_storages = get_current_storages(config_path)
-                if input("是否重启OpenList服务? (y/n): ").lower() == 'y':
-                    restart_openlist()
+                if input("是否立即应用到OpenList? (y/n): ").lower() == 'y':
+                    apply_to_openlist(added_ids=[new_storage_id])
         
         elif choice == '3':
-            restart_openlist()
+            apply_to_openlist()
         
         elif choice == '4':
             break
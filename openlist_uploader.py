@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+OpenList批量上传
+把本地文件或目录流式PUT到 /api/fs/put（文件内容不读入内存），
+多个文件通过连接池并发上传；远端已有大小和修改时间相同的文件时跳过
+
+    python3 openlist_uploader.py ./photos /local/photos --workers 8
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from openlist_client import BASE_URL, OpenListClient
+
+# 远端修改时间与本地相差不超过该秒数视为相同（部分存储只保存到秒）
+MTIME_TOLERANCE = 2
+
+SKIPPED, UPLOADED, FAILED = "skipped", "uploaded", "failed"
+
+
+def parse_modified(value: str) -> Optional[float]:
+    """解析服务端返回的RFC3339时间（可能带纳秒或Z后缀）"""
+    if not value:
+        return None
+    value = value.replace("Z", "+00:00")
+    head, dot, rest = value.partition('.')
+    if dot:
+        digits = len(rest) - len(rest.lstrip("0123456789"))
+        value = f"{head}.{rest[:min(digits, 6)]}{rest[digits:]}"
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def iter_local_files(source: str, remote_dir: str) -> Iterator[Tuple[str, str]]:
+    """产出 (本地路径, 远端路径)；source为目录时保留其下的相对路径"""
+    remote_dir = '/' + remote_dir.strip('/')
+    if os.path.isfile(source):
+        yield source, f"{remote_dir.rstrip('/')}/{os.path.basename(source)}"
+        return
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        rel = os.path.relpath(root, source)
+        base = remote_dir if rel == "." else f"{remote_dir.rstrip('/')}/{rel.replace(os.sep, '/')}"
+        for name in sorted(files):
+            yield os.path.join(root, name), f"{base.rstrip('/')}/{name}"
+
+
+class Uploader:
+    def __init__(self, client: OpenListClient, workers: int = 4, overwrite: bool = True,
+                 as_task: bool = False, retries: int = 3, verbose: bool = False):
+        self.client = client
+        self.workers = workers
+        self.overwrite = overwrite
+        self.as_task = as_task
+        self.retries = retries
+        self.verbose = verbose
+        self.stats = {SKIPPED: 0, UPLOADED: 0, FAILED: 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    def should_skip(self, remote_path: str, size: int, mtime: float) -> bool:
+        """远端文件大小和修改时间都与本地一致，或不覆盖时远端已存在"""
+        data = self.client.post("/api/fs/get", json={"path": remote_path})
+        if data.get("code") != 200:
+            return False
+        info = data.get("data") or {}
+        if not self.overwrite:
+            return True
+        if info.get("is_dir") or info.get("size") != size:
+            return False
+        remote_mtime = parse_modified(info.get("modified", ""))
+        return remote_mtime is not None and abs(remote_mtime - mtime) <= MTIME_TOLERANCE
+
+    def _put(self, local_path: str, remote_path: str, st: os.stat_result) -> Dict[str, Any]:
+        headers = {
+            "File-Path": quote(remote_path),
+            "Last-Modified": str(int(st.st_mtime * 1000)),
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(st.st_size),
+            "Overwrite": "true" if self.overwrite else "false",
+            "As-Task": "true" if self.as_task else "false",
+        }
+        # 传入文件对象，requests按块读取发送
+        with open(local_path, 'rb') as f:
+            return self.client.raw("PUT", "/api/fs/put", data=f, headers=headers, timeout=None).json()
+
+    def upload_one(self, local_path: str, remote_path: str) -> str:
+        st = os.stat(local_path)
+        try:
+            if self.should_skip(remote_path, st.st_size, st.st_mtime):
+                return SKIPPED
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # fs/get失败（连接错误、非JSON响应）只记为这个文件失败，不中断整批上传
+            print(f"\n❌ {local_path} -> {remote_path}: 检查远端文件失败: {e}", file=sys.stderr)
+            return FAILED
+
+        for attempt in range(self.retries + 1):
+            try:
+                data = self._put(local_path, remote_path, st)
+                if data.get("code") == 401 and self.client.login():
+                    # 请求体已经发送过，需要重新打开文件再传一次
+                    data = self._put(local_path, remote_path, st)
+                if data.get("code") == 200:
+                    with self._lock:
+                        self.stats["bytes"] += st.st_size
+                    return UPLOADED
+                message = data.get("message")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                message = str(e)
+            if attempt < self.retries:
+                time.sleep(min(2 ** attempt, 30))
+        print(f"\n❌ {local_path} -> {remote_path}: {message}", file=sys.stderr)
+        return FAILED
+
+    def run(self, files: Iterator[Tuple[str, str]]) -> Dict[str, Any]:
+        """并发上传；在途任务数不超过workers的两倍，遍历大目录时不会一次性提交所有文件"""
+        started = time.time()
+        last_report = started
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            for local_path, remote_path in files:
+                future = executor.submit(self.upload_one, local_path, remote_path)
+                pending[future] = (local_path, remote_path)
+                if len(pending) >= self.workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done, pending)
+                if time.time() - last_report >= 1:
+                    self._print_progress(started)
+                    last_report = time.time()
+            while pending:
+                done, _ = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                self._collect(done, pending)
+                self._print_progress(started)
+
+        elapsed = time.time() - started
+        self._print_progress(started, end="\n")
+        return dict(self.stats, seconds=elapsed,
+                    mb_per_s=self.stats["bytes"] / elapsed / 1024**2 if elapsed else 0)
+
+    def _collect(self, done, pending):
+        for future in done:
+            local_path, remote_path = pending.pop(future)
+            try:
+                result = future.result()
+            except OSError as e:
+                print(f"\n❌ {local_path}: {e}", file=sys.stderr)
+                result = FAILED
+            self.stats[result] += 1
+            if self.verbose and result != FAILED:
+                print(f"\n{'✓' if result == UPLOADED else '-'} {remote_path}")
+
+    def _print_progress(self, started: float, end: str = "\r"):
+        elapsed = time.time() - started or 1e-9
+        s = self.stats
+        print(f"  上传 {s[UPLOADED]}，跳过 {s[SKIPPED]}，失败 {s[FAILED]}，"
+              f"{s['bytes'] / 1024**2:.1f} MB，{s['bytes'] / elapsed / 1024**2:.1f} MB/s，"
+              f"{(s[UPLOADED] + s[SKIPPED]) / elapsed:.1f} 文件/秒", end=end, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量上传文件到OpenList")
+    parser.add_argument("source", help="本地文件或目录")
+    parser.add_argument("remote_dir", help="OpenList中的目标目录")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--workers", type=int, default=4, help="同时上传的文件数")
+    parser.add_argument("--no-overwrite", action="store_true", help="远端已存在时不覆盖")
+    parser.add_argument("--as-task", action="store_true", help="作为后台任务上传到存储")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出每个文件的结果")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ 路径不存在: {args.source}")
+        sys.exit(1)
+
+    print("=== OpenList 批量上传 ===")
+    client = OpenListClient(args.url, args.username, args.password, pool_size=max(10, args.workers))
+    if not client.token:
+        sys.exit(1)
+    uploader = Uploader(client, args.workers, overwrite=not args.no_overwrite,
+                        as_task=args.as_task, verbose=args.verbose)
+    stats = uploader.run(iter_local_files(args.source, args.remote_dir))
+    print(f"✅ 完成: 上传 {stats[UPLOADED]} 个 ({stats['bytes'] / 1024**2:.1f} MB)，"
+          f"跳过 {stats[SKIPPED]} 个，失败 {stats[FAILED]} 个，"
+          f"用时 {stats['seconds']:.1f}秒，平均 {stats['mb_per_s']:.1f} MB/s")
+    sys.exit(1 if stats[FAILED] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+OpenList目录树遍历
+分页取完 /api/fs/list，用有上限的异步worker并发展开子目录，结果以NDJSON流式输出；
+目录列表按 路径+服务端修改时间 缓存在本地SQLite，目录未变化时直接用缓存
+依赖aiohttp (pip install -r requirements.txt)
+
+    python3 openlist_walker.py / > tree.ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from openlist_client import BASE_URL, OpenListClient
+from openlist_db import get_db
+
+DEFAULT_CACHE_PATH = "openlist_walk_cache.db"
+PER_PAGE = 1000
+
+# 驱动不提供目录修改时间时返回的零值，无法用来判断目录是否变化
+ZERO_TIMES = ("", "0001-01-01T00:00:00Z")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fs_listings (
+    path       TEXT PRIMARY KEY,
+    modified   TEXT NOT NULL,
+    content    TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL
+);
+"""
+
+
+class ListingCache:
+    """目录列表缓存
+
+    get/put是同步的sqlite调用；异步遍历中使用aget/aput，在线程中执行，不阻塞事件循环。
+    写入都交给同一个线程，按提交顺序执行，不会互相争抢写锁
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.db = get_db(path)
+        with self.db.connection() as conn:
+            conn.executescript(SCHEMA)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="walk-cache-writer")
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT modified, content, fetched_at FROM fs_listings WHERE path = ?",
+                               (path,)).fetchone()
+        if row is None:
+            return None
+        return {"modified": row["modified"], "content": json.loads(row["content"]),
+                "fetched_at": row["fetched_at"]}
+
+    def put(self, path: str, modified: str, content: List[Dict[str, Any]]):
+        with self.db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO fs_listings (path, modified, content, fetched_at) "
+                         "VALUES (?, ?, ?, ?)",
+                         (path, modified, json.dumps(content, ensure_ascii=False), int(time.time())))
+
+    async def aget(self, path: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, path)
+
+    async def aput(self, path: str, modified: str, content: List[Dict[str, Any]]):
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.put, path, modified, content)
+
+    def close(self):
+        """等待排队中的写入完成"""
+        self._writer.shutdown(wait=True)
+
+
+class Walker:
+    """目录树遍历
+
+    目录的修改时间只反映它直接包含的条目，父目录命中缓存时，
+    子目录的修改时间来自缓存，不可信：先用 /api/fs/get 取得当前修改时间再比较。
+    修改时间为零值的目录（驱动不提供）只有在缓存未超过max_age时才复用。
+    """
+
+    def __init__(self, base_url: str, token: str, cache: ListingCache, out,
+                 workers: int = 8, max_age: int = 0, refresh: bool = False, timeout: float = 60):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {"Authorization": token}
+        self.cache = cache
+        self.out = out
+        self.workers = workers
+        self.max_age = max_age
+        self.refresh = refresh
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.stats = {"dirs": 0, "files": 0, "list_requests": 0, "get_requests": 0,
+                      "cache_hits": 0, "errors": 0}
+
+    async def _api(self, session: aiohttp.ClientSession, path: str,
+                   payload: Dict[str, Any]) -> Dict[str, Any]:
+        async with session.post(f"{self.base_url}{path}", json=payload, headers=self.headers) as response:
+            data = await response.json(content_type=None)
+        if data.get("code") != 200:
+            raise RuntimeError(f"{path} {payload.get('path')}: {data.get('message')}")
+        return data.get("data") or {}
+
+    async def fetch_modified(self, session: aiohttp.ClientSession, path: str) -> str:
+        self.stats["get_requests"] += 1
+        return (await self._api(session, "/api/fs/get", {"path": path})).get("modified", "")
+
+    async def fetch_listing(self, session: aiohttp.ClientSession, path: str) -> List[Dict[str, Any]]:
+        """分页取完整个目录"""
+        content: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            self.stats["list_requests"] += 1
+            data = await self._api(session, "/api/fs/list", {
+                "path": path, "page": page, "per_page": PER_PAGE, "refresh": self.refresh,
+            })
+            items = data.get("content") or []
+            content.extend(items)
+            if not items or len(content) >= data.get("total", 0):
+                return content
+            page += 1
+
+    def _cache_usable(self, cached: Optional[Dict[str, Any]], modified: Optional[str]) -> bool:
+        if cached is None or self.refresh:
+            return False
+        if modified not in ZERO_TIMES and modified is not None:
+            return cached["modified"] == modified
+        return bool(self.max_age) and time.time() - cached["fetched_at"] <= self.max_age
+
+    async def list_dir(self, session: aiohttp.ClientSession, path: str,
+                       modified: Optional[str]) -> tuple:
+        """返回 (目录内容, 是否来自缓存)；modified为None表示没有可信的当前修改时间"""
+        cached = await self.cache.aget(path)
+        if modified is None and not self.refresh:
+            modified = await self.fetch_modified(session, path)
+        if self._cache_usable(cached, modified):
+            self.stats["cache_hits"] += 1
+            return cached["content"], True
+
+        content = await self.fetch_listing(session, path)
+        await self.cache.aput(path, modified or "", content)
+        return content, False
+
+    def emit(self, parent: str, item: Dict[str, Any]):
+        record = {
+            "path": f"{parent.rstrip('/')}/{item['name']}",
+            "name": item["name"],
+            "is_dir": item.get("is_dir", False),
+            "size": item.get("size", 0),
+            "modified": item.get("modified"),
+        }
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    async def _worker(self, session: aiohttp.ClientSession, queue: asyncio.Queue):
+        while True:
+            path, modified = await queue.get()
+            try:
+                content, from_cache = await self.list_dir(session, path, modified)
+                self.stats["dirs"] += 1
+                for item in content:
+                    self.emit(path, item)
+                    if item.get("is_dir"):
+                        child = f"{path.rstrip('/')}/{item['name']}"
+                        # 缓存中的子目录修改时间可能已过期，交给list_dir重新确认
+                        queue.put_nowait((child, None if from_cache else item.get("modified", "")))
+                    else:
+                        self.stats["files"] += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError, ValueError) as e:
+                self.stats["errors"] += 1
+                print(f"⚠ {path}: {e}", file=sys.stderr)
+            finally:
+                queue.task_done()
+
+    async def walk(self, root: str) -> Dict[str, int]:
+        queue: asyncio.Queue = asyncio.Queue()
+        queue.put_nowait(('/' + root.strip('/'), None))
+        connector = aiohttp.TCPConnector(limit=self.workers)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            workers = [asyncio.ensure_future(self._worker(session, queue)) for _ in range(self.workers)]
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="遍历OpenList目录树，输出NDJSON")
+    parser.add_argument("root", nargs="?", default="/", help="起始路径 (默认: /，即所有挂载)")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--workers", type=int, default=8, help="并发列目录的数量")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="目录缓存数据库")
+    parser.add_argument("--max-age", type=int, default=0,
+                        help="修改时间不可用时，缓存在该秒数内仍直接使用 (默认不使用)")
+    parser.add_argument("--refresh", action="store_true", help="忽略本地缓存，并要求服务端刷新目录")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON输出文件 (默认标准输出)")
+    args = parser.parse_args()
+
+    token = OpenListClient(args.url, args.username, args.password).token
+    if not token:
+        sys.exit(1)
+
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    cache = ListingCache(args.cache)
+    try:
+        walker = Walker(args.url, token, cache, out, args.workers, args.max_age, args.refresh)
+        started = time.time()
+        stats = asyncio.run(walker.walk(args.root))
+    finally:
+        cache.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ {stats['dirs']} 个目录，{stats['files']} 个文件，用时 {time.time() - started:.1f}秒；"
+          f"list请求 {stats['list_requests']}，get请求 {stats['get_requests']}，"
+          f"缓存命中 {stats['cache_hits']}，错误 {stats['errors']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+OpenList WebDAV与REST接口对比测试
+- 列目录: 在100/1万/10万个条目的目录上比较 PROPFIND Depth:1 与 /api/fs/list（一次取完/分页）的延迟和响应大小
+- 传输: 多个并发客户端分别通过 WebDAV PUT/GET 和 /api/fs/put、/d 上传下载同一批文件，比较吞吐
+
+WebDAV使用与REST登录相同的用户名密码（Basic认证），用户需要有WebDAV读写权限。
+测试目录不存在时会自动创建；指定 --local-root（base所在Local驱动挂载的本地目录）时直接在磁盘上生成，快得多
+
+    python3 openlist_webdav_bench.py --base /local/davbench --local-root /data/davbench
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from openlist_bench_utils import parse_size, percentiles
+from openlist_client import BASE_URL, OpenListClient
+
+DAV_PREFIX = "/dav"
+RESPONSE_TAG = b"<D:response>"
+PAGE_SIZE = 1000
+CHUNK_SIZE = 1024 * 1024
+
+PROPFIND_BODY = (b'<?xml version="1.0" encoding="utf-8"?>'
+                 b'<D:propfind xmlns:D="DAV:"><D:allprop/></D:propfind>')
+
+
+class WebDAVBench:
+    def __init__(self, client: OpenListClient, username: str, password: str, workers: int = 16):
+        self.client = client
+        self.auth = (username, password)
+        self.workers = workers
+
+    def dav(self, method: str, path: str, **kwargs) -> requests.Response:
+        # 显式的auth会覆盖client附带的token头
+        return self.client.raw(method, DAV_PREFIX + quote(path), auth=self.auth, **kwargs)
+
+    # ---------- 列目录 ----------
+
+    def propfind(self, path: str) -> Tuple[float, int, int]:
+        """返回 (耗时, 条目数, 响应字节数)；流式统计response元素，不解析整个XML"""
+        began = time.perf_counter()
+        with self.dav("PROPFIND", path.rstrip('/') + '/', data=PROPFIND_BODY, stream=True,
+                      headers={"Depth": "1", "Content-Type": "application/xml"}) as response:
+            if response.status_code != 207:
+                raise RuntimeError(f"PROPFIND {path}: HTTP {response.status_code}")
+            count = size = 0
+            tail = b""
+            for chunk in response.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                data = tail + chunk
+                count += data.count(RESPONSE_TAG)
+                # 保留可能被切断的标签前缀（比标签短，不会重复计数）
+                tail = data[-(len(RESPONSE_TAG) - 1):]
+        # 第一个response是目录本身
+        return time.perf_counter() - began, max(count - 1, 0), size
+
+    def rest_list(self, path: str, per_page: int = 0, refresh: bool = False) -> Tuple[float, int, int]:
+        """/api/fs/list 取完整个目录；per_page为0时一次取完"""
+        began = time.perf_counter()
+        count = size = 0
+        page = 1
+        while True:
+            response = self.client.raw("POST", "/api/fs/list", json={
+                "path": path, "page": page, "per_page": per_page, "refresh": refresh,
+            })
+            size += len(response.content)
+            data = response.json()
+            if data.get("code") != 200:
+                raise RuntimeError(f"fs/list {path}: {data.get('message')}")
+            items = (data.get("data") or {}).get("content") or []
+            count += len(items)
+            if not per_page or not items or count >= data["data"].get("total", 0):
+                return time.perf_counter() - began, count, size
+            page += 1
+
+    def _total(self, path: str) -> int:
+        """目录条目数；同时让服务端刷新目录缓存"""
+        data = self.client.post("/api/fs/list", json={"path": path, "page": 1, "per_page": 1, "refresh": True})
+        return (data.get("data") or {}).get("total", 0) if data.get("code") == 200 else 0
+
+    def ensure_fixture(self, base: str, entries: int, local_root: Optional[str] = None) -> str:
+        """准备有entries个文件的目录，已存在且数量足够时直接使用"""
+        path = f"{base.rstrip('/')}/list_{entries}"
+        if self._total(path) >= entries:
+            return path
+
+        print(f"  创建测试目录 {path} ({entries} 个文件)...")
+        names = [f"f{i:06d}.txt" for i in range(entries)]
+        if local_root:
+            directory = os.path.join(local_root, f"list_{entries}")
+            os.makedirs(directory, exist_ok=True)
+            for name in names:
+                with open(os.path.join(directory, name), 'ab'):
+                    pass
+        else:
+            self.client.post("/api/fs/mkdir", json={"path": path})
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for response in executor.map(lambda name: self.dav("PUT", f"{path}/{name}", data=b""), names):
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"创建测试文件失败: HTTP {response.status_code}")
+        self._total(path)
+        return path
+
+    def bench_listing(self, path: str, runs: int = 5) -> Dict[str, Any]:
+        """各方式先预热一次（服务端目录缓存），再计时runs次"""
+        methods = {
+            "propfind": lambda: self.propfind(path),
+            "rest_all": lambda: self.rest_list(path),
+            "rest_paged": lambda: self.rest_list(path, per_page=PAGE_SIZE),
+        }
+        result: Dict[str, Any] = {"path": path}
+        for name, method in methods.items():
+            _, entries, size = method()
+            times = [method()[0] for _ in range(runs)]
+            p50, p95 = percentiles(times)
+            result[name] = {"entries": entries, "bytes": size, "p50_ms": p50, "p95_ms": p95}
+        result["entries"] = result["rest_all"]["entries"]
+        return result
+
+    # ---------- 传输 ----------
+
+    def _rest_put(self, path: str, payload: bytes) -> bool:
+        response = self.client.raw("PUT", "/api/fs/put", data=payload, headers={
+            "File-Path": quote(path), "Content-Type": "application/octet-stream",
+            "Content-Length": str(len(payload)), "Overwrite": "true",
+        })
+        return response.ok and response.json().get("code") == 200
+
+    def _dav_put(self, path: str, payload: bytes) -> bool:
+        return self.dav("PUT", path, data=payload).status_code in (200, 201, 204)
+
+    def _get(self, response: requests.Response) -> int:
+        with response:
+            if response.status_code >= 400:
+                return -1
+            return sum(len(chunk) for chunk in response.iter_content(CHUNK_SIZE))
+
+    def _timed(self, func, items: List[Any], concurrency: int) -> Tuple[float, List[float], List[Any]]:
+        def run(item):
+            began = time.perf_counter()
+            result = func(item)
+            return time.perf_counter() - began, result
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(run, items))
+        return time.perf_counter() - began, [r[0] for r in results], [r[1] for r in results]
+
+    def bench_transfer(self, base: str, files: int, size: int, concurrency: int) -> List[Dict[str, Any]]:
+        payload = os.urandom(size)
+        results = []
+        for protocol in ("webdav", "rest"):
+            directory = f"{base.rstrip('/')}/transfer_{protocol}"
+            paths = [f"{directory}/t{i:04d}.bin" for i in range(files)]
+            self.client.post("/api/fs/mkdir", json={"path": directory})
+
+            put = self._dav_put if protocol == "webdav" else self._rest_put
+            wall, latencies, oks = self._timed(lambda p: put(p, payload), paths, concurrency)
+            results.append(self._transfer_row(protocol, "PUT", concurrency, wall, latencies,
+                                              sum(oks) * size, len(oks) - sum(oks)))
+
+            if protocol == "webdav":
+                def get(p):
+                    return self._get(self.dav("GET", p, stream=True))
+            else:
+                # 计时前取好签名，避免把 fs/list 算进下载时间
+                data = self.client.post("/api/fs/list", json={"path": directory, "per_page": 0, "refresh": True})
+                signs = {item["name"]: item.get("sign", "") for item in (data.get("data") or {}).get("content") or []}
+
+                def get(p):
+                    sign = signs.get(p.rsplit('/', 1)[1])
+                    return self._get(self.client.raw("GET", "/d" + quote(p),
+                                                     params={"sign": sign} if sign else None, stream=True))
+            wall, latencies, received = self._timed(get, paths, concurrency)
+            errors = sum(1 for r in received if r != size)
+            results.append(self._transfer_row(protocol, "GET", concurrency, wall, latencies,
+                                              sum(r for r in received if r > 0), errors))
+        return results
+
+    @staticmethod
+    def _transfer_row(protocol: str, op: str, concurrency: int, wall: float, latencies: List[float],
+                      transferred: int, errors: int) -> Dict[str, Any]:
+        p50, p95 = percentiles(latencies)
+        return {
+            "protocol": protocol, "op": op, "concurrency": concurrency, "files": len(latencies),
+            "errors": errors, "mb_per_s": transferred / wall / 1024**2 if wall else 0,
+            "files_per_s": len(latencies) / wall if wall else 0, "p50_ms": p50, "p95_ms": p95,
+        }
+
+    def cleanup(self, base: str):
+        self.client.post("/api/fs/remove", json={"dir": base, "names": ["transfer_webdav", "transfer_rest"]})
+
+
+def print_listing(rows: List[Dict[str, Any]]):
+    print(f"\n{'条目数':>8}  {'PROPFIND p50/p95':>18}{'REST全部 p50/p95':>20}{'REST分页 p50/p95':>20}"
+          f"{'响应 DAV/REST(KB)':>20}")
+    for r in rows:
+        cells = [f"{r[k]['p50_ms']:.0f}/{r[k]['p95_ms']:.0f}" for k in ("propfind", "rest_all", "rest_paged")]
+        sizes = f"{r['propfind']['bytes'] / 1024:.0f}/{r['rest_all']['bytes'] / 1024:.0f}"
+        print(f"{r['entries']:>8}  {cells[0]:>18}{cells[1]:>20}{cells[2]:>20}{sizes:>20}")
+    print("  (毫秒)")
+
+
+def print_transfer(rows: List[Dict[str, Any]]):
+    print(f"\n{'协议':<8}{'操作':<5}{'并发':>5}{'文件':>6}{'错误':>6}{'MB/s':>10}{'文件/秒':>10}"
+          f"{'p50(ms)':>10}{'p95(ms)':>10}")
+    for r in rows:
+        print(f"{r['protocol']:<8}{r['op']:<5}{r['concurrency']:>5}{r['files']:>6}{r['errors']:>6}"
+              f"{r['mb_per_s']:>10.1f}{r['files_per_s']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenList WebDAV与REST接口对比测试")
+    parser.add_argument("--base", required=True, help="OpenList中用于测试的目录，如 /local/davbench")
+    parser.add_argument("--url", default=BASE_URL, help="OpenList地址")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--local-root", default=None, help="base对应的本地目录，用于快速生成列目录测试数据")
+    parser.add_argument("--sizes", default="100,10000,100000", help="列目录测试的目录条目数")
+    parser.add_argument("--runs", type=int, default=5, help="每个目录的列目录次数")
+    parser.add_argument("--files", type=int, default=64, help="传输测试的文件数")
+    parser.add_argument("--file-size", default="4M", help="传输测试的单个文件大小")
+    parser.add_argument("--concurrency", default="1,8", help="传输测试的并发客户端数列表")
+    parser.add_argument("--skip-listing", action="store_true")
+    parser.add_argument("--skip-transfer", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="保留传输测试的文件")
+    parser.add_argument("--json", default=None, help="同时把结果写入JSON文件")
+    args = parser.parse_args()
+
+    print("=== OpenList WebDAV / REST 对比测试 ===")
+    concurrency = [int(n) for n in args.concurrency.split(',') if n.strip()]
+    client = OpenListClient(args.url, args.username, args.password, pool_size=max(16, *concurrency))
+    if not client.token:
+        return
+    bench = WebDAVBench(client, args.username, args.password)
+    results: Dict[str, Any] = {"listing": [], "transfer": []}
+
+    try:
+        if not args.skip_listing:
+            for entries in [int(n) for n in args.sizes.split(',') if n.strip()]:
+                path = bench.ensure_fixture(args.base, entries, args.local_root)
+                results["listing"].append(bench.bench_listing(path, args.runs))
+            print_listing(results["listing"])
+
+        if not args.skip_transfer:
+            size = parse_size(args.file_size)
+            try:
+                for n in concurrency:
+                    results["transfer"].extend(bench.bench_transfer(args.base, args.files, size, n))
+            finally:
+                if not args.keep:
+                    bench.cleanup(args.base)
+            print_transfer(results["transfer"])
+    except (RuntimeError, requests.exceptions.RequestException) as e:
+        print(f"❌ {e}")
+        return
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+夸克网盘目录索引
+广度优先遍历整个网盘，把文件元数据保存到本地SQLite，
+之后的容量统计和文件搜索直接查本地索引；
+已有索引时可增量刷新，只重新列出updated_at有变化的目录
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional
+
+from openlist_db import get_db
+from view_quark_files import create_quark_session, iter_quark_files, list_quark_changes, load_quark_config
+
+DEFAULT_INDEX_PATH = "quark_index.db"
+
+# 增量水位向前预留的时间，容忍本机与夸克服务器的时钟偏差
+WATERMARK_MARGIN_MS = 10 * 60 * 1000
+
+# 遍历队列状态
+PENDING, DONE, FAILED = 0, 1, 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quark_files (
+    fid        TEXT PRIMARY KEY,
+    pdir_fid   TEXT NOT NULL,
+    file_name  TEXT NOT NULL,
+    is_dir     INTEGER NOT NULL,
+    size       INTEGER NOT NULL DEFAULT 0,
+    updated_at INTEGER NOT NULL DEFAULT 0,
+    seen_at    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quark_files_pdir ON quark_files(pdir_fid);
+CREATE INDEX IF NOT EXISTS idx_quark_files_name ON quark_files(file_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_quark_files_size ON quark_files(size);
+
+CREATE TABLE IF NOT EXISTS quark_frontier (
+    fid   TEXT PRIMARY KEY,
+    state INTEGER NOT NULL DEFAULT 0,
+    full  INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_quark_frontier_state ON quark_frontier(state);
+
+CREATE TABLE IF NOT EXISTS quark_changes (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    crawl_at   INTEGER NOT NULL,
+    op         TEXT NOT NULL,
+    fid        TEXT NOT NULL,
+    pdir_fid   TEXT,
+    file_name  TEXT,
+    is_dir     INTEGER,
+    size       INTEGER,
+    updated_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_quark_changes_crawl ON quark_changes(crawl_at);
+
+CREATE TABLE IF NOT EXISTS quark_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def format_size(bytes_size):
+    if bytes_size >= 1024**4:
+        return f"{bytes_size / 1024**4:.2f} TB"
+    elif bytes_size >= 1024**3:
+        return f"{bytes_size / 1024**3:.2f} GB"
+    elif bytes_size >= 1024**2:
+        return f"{bytes_size / 1024**2:.2f} MB"
+    elif bytes_size >= 1024:
+        return f"{bytes_size / 1024:.2f} KB"
+    else:
+        return f"{bytes_size} B"
+
+
+class QuarkIndex:
+    """夸克网盘本地索引"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = os.path.abspath(path)
+        self.db = get_db(self.path)
+        with self.db.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT value FROM quark_meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_meta(self, key: str, value: Any):
+        with self.db.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO quark_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ---- 遍历队列 ----
+
+    def start_crawl(self, root_id: str, restart: bool = False, incremental: bool = False) -> int:
+        """开始或继续一次遍历，返回本次遍历的开始时间戳(毫秒)
+
+        队列中还有未完成的目录且未要求restart时继续上次遍历，
+        上次失败的目录重新放回队列。增量遍历时根目录只列出变化部分。
+        """
+        with self.db.transaction() as conn:
+            unfinished = conn.execute(
+                "SELECT COUNT(*) FROM quark_frontier WHERE state != ?", (DONE,)
+            ).fetchone()[0]
+            started_at = self.get_meta("crawl_started_at")
+            if unfinished and started_at and not restart and self.get_meta("root_id") == root_id:
+                conn.execute("UPDATE quark_frontier SET state = ? WHERE state = ?", (PENDING, FAILED))
+                return int(started_at)
+
+            started_at = int(time.time() * 1000)
+            conn.execute("DELETE FROM quark_frontier")
+            conn.execute("INSERT INTO quark_frontier (fid, state, full) VALUES (?, ?, ?)",
+                         (root_id, PENDING, int(not incremental)))
+            self.set_meta("crawl_started_at", started_at)
+            self.set_meta("root_id", root_id)
+            self.set_meta("incremental", int(incremental))
+            return started_at
+
+    def finish_crawl(self, started_at: int) -> bool:
+        """队列全部完成时记录水位，作为下次增量遍历的起点"""
+        if self.stats()["pending"]:
+            return False
+        self.set_meta("watermark", started_at)
+        return True
+
+    def pending_dirs(self, limit: int, exclude: Iterable[str] = ()) -> List[tuple]:
+        """按入队顺序取待遍历的目录（广度优先），返回 [(fid, full)]"""
+        exclude = set(exclude)
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                "SELECT fid, full FROM quark_frontier WHERE state = ? ORDER BY rowid LIMIT ?",
+                (PENDING, limit + len(exclude))
+            ).fetchall()
+        return [(row[0], bool(row[1])) for row in rows if row[0] not in exclude][:limit]
+
+    def mark_failed(self, fid: str):
+        with self.db.connection() as conn:
+            conn.execute("UPDATE quark_frontier SET state = ? WHERE fid = ?", (FAILED, fid))
+
+    def child_count(self, pdir_fid: str) -> int:
+        with self.db.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM quark_files WHERE pdir_fid = ?", (pdir_fid,)
+            ).fetchone()[0]
+
+    def _existing_rows(self, conn, fids: List[str]) -> Dict[str, Dict[str, Any]]:
+        existing = {}
+        # SQLite单条语句的参数个数有上限，分批查询
+        for i in range(0, len(fids), 500):
+            chunk = fids[i:i + 500]
+            rows = conn.execute(f"""
+                SELECT fid, pdir_fid, file_name, is_dir, size, updated_at FROM quark_files
+                WHERE fid IN ({', '.join('?' for _ in chunk)})
+            """, chunk).fetchall()
+            existing.update((row["fid"], dict(row)) for row in rows)
+        return existing
+
+    def count_new(self, pdir_fid: str, items: List[Dict[str, Any]]) -> int:
+        """items中尚未以pdir_fid为父目录收录的条目数"""
+        with self.db.connection() as conn:
+            existing = self._existing_rows(conn, [item.get("fid") for item in items])
+        return sum(1 for item in items
+                   if existing.get(item.get("fid"), {}).get("pdir_fid") != pdir_fid)
+
+    def save_listing(self, pdir_fid: str, items: List[Dict[str, Any]], seen_at: int,
+                     complete: bool = True, full: bool = True, watermark: Optional[int] = None,
+                     log_changes: bool = False) -> int:
+        """保存一个目录的列表
+
+        一个事务内完成：写入子项、子目录入队、当前目录标记为完成。
+        complete=True表示items是完整列表，此时删除已不存在的子项（及其整个子树）。
+        full=True时所有子目录都完整遍历；否则只有新目录和updated_at晚于watermark的目录入队。
+        log_changes=True时把新增/修改/删除写入quark_changes。返回变更条数。
+        """
+        with self.db.transaction() as conn:
+            existing = self._existing_rows(conn, [item.get("fid") for item in items])
+
+            rows = []
+            changes = []
+            frontier = []
+            for item in items:
+                fid = item.get("fid")
+                is_dir = int(not item.get("file", True))
+                row = (fid, pdir_fid, item.get("file_name", ""), is_dir,
+                       item.get("size", 0) or 0, item.get("updated_at", 0) or 0, seen_at)
+                rows.append(row)
+
+                old = existing.get(fid)
+                if old is None:
+                    changes.append(("insert",) + row[:6])
+                elif (old["pdir_fid"], old["file_name"], old["size"], old["updated_at"]) != \
+                        (row[1], row[2], row[4], row[5]):
+                    changes.append(("update",) + row[:6])
+
+                if is_dir:
+                    if full or old is None:
+                        frontier.append((fid, PENDING, 1))
+                    elif watermark is None or row[5] > watermark:
+                        frontier.append((fid, PENDING, 0))
+
+            conn.executemany("""
+                INSERT INTO quark_files (fid, pdir_fid, file_name, is_dir, size, updated_at, seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(fid) DO UPDATE SET
+                    pdir_fid = excluded.pdir_fid,
+                    file_name = excluded.file_name,
+                    is_dir = excluded.is_dir,
+                    size = excluded.size,
+                    updated_at = excluded.updated_at,
+                    seen_at = excluded.seen_at
+            """, rows)
+            if complete:
+                changes.extend(("delete",) + tuple(row)
+                               for row in self._delete_stale_children(conn, pdir_fid, seen_at))
+            conn.executemany(
+                "INSERT OR IGNORE INTO quark_frontier (fid, state, full) VALUES (?, ?, ?)", frontier
+            )
+            conn.execute("UPDATE quark_frontier SET state = ? WHERE fid = ?", (DONE, pdir_fid))
+            if log_changes and changes:
+                conn.executemany("""
+                    INSERT INTO quark_changes (crawl_at, op, fid, pdir_fid, file_name, is_dir, size, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(seen_at,) + change for change in changes])
+        return len(changes)
+
+    def _delete_stale_children(self, conn, pdir_fid: str, seen_at: int) -> List[tuple]:
+        """删除本次列表中不再出现的子项，已删除目录的子树一并删除，返回被删除的行"""
+        stale = conn.execute("""
+            WITH RECURSIVE stale(fid) AS (
+                SELECT fid FROM quark_files WHERE pdir_fid = ? AND seen_at < ?
+                UNION ALL
+                SELECT f.fid FROM quark_files f JOIN stale ON f.pdir_fid = stale.fid
+            )
+            SELECT fid, pdir_fid, file_name, is_dir, size, updated_at
+            FROM quark_files WHERE fid IN stale
+        """, (pdir_fid, seen_at)).fetchall()
+        conn.executemany("DELETE FROM quark_files WHERE fid = ?", [(row[0],) for row in stale])
+        return [tuple(row) for row in stale]
+
+    # ---- 本地查询 ----
+
+    def stats(self) -> Dict[str, int]:
+        with self.db.connection() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(is_dir), 0), COALESCE(SUM(size), 0)
+                FROM quark_files
+            """).fetchone()
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM quark_frontier WHERE state != ?", (DONE,)
+            ).fetchone()[0]
+        return {"entries": row[0], "dirs": row[1], "files": row[0] - row[1], "bytes": row[2], "pending": pending}
+
+    def changes(self, crawl_at: Optional[int] = None) -> Iterable[Dict[str, Any]]:
+        """某次遍历的变更日志，默认最近一次"""
+        with self.db.connection() as conn:
+            if crawl_at is None:
+                crawl_at = conn.execute("SELECT MAX(crawl_at) FROM quark_changes").fetchone()[0]
+            rows = conn.execute("""
+                SELECT crawl_at, op, fid, pdir_fid, file_name, is_dir, size, updated_at
+                FROM quark_changes WHERE crawl_at = ? ORDER BY id
+            """, (crawl_at,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, keyword: str, limit: int = 50) -> List[Dict[str, Any]]:
+        with self.db.connection() as conn:
+            rows = conn.execute("""
+                SELECT fid, pdir_fid, file_name, is_dir, size, updated_at
+                FROM quark_files WHERE file_name LIKE ? ORDER BY file_name LIMIT ?
+            """, (f"%{keyword}%", limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def largest_files(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self.db.connection() as conn:
+            rows = conn.execute("""
+                SELECT fid, pdir_fid, file_name, size, updated_at
+                FROM quark_files WHERE is_dir = 0 ORDER BY size DESC LIMIT ?
+            """, (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def folder_sizes(self, pdir_fid: str = "0") -> List[Dict[str, Any]]:
+        """统计某目录下每个子目录的总大小和文件数"""
+        with self.db.connection() as conn:
+            rows = conn.execute("""
+                WITH RECURSIVE tree(root, fid) AS (
+                    SELECT fid, fid FROM quark_files WHERE pdir_fid = ? AND is_dir = 1
+                    UNION ALL
+                    SELECT tree.root, f.fid FROM quark_files f JOIN tree ON f.pdir_fid = tree.fid
+                )
+                SELECT d.fid, d.file_name,
+                       COALESCE(SUM(CASE WHEN f.is_dir = 0 THEN f.size END), 0) AS size,
+                       COALESCE(SUM(1 - f.is_dir), 0) AS files
+                FROM tree
+                JOIN quark_files d ON d.fid = tree.root
+                JOIN quark_files f ON f.fid = tree.fid
+                GROUP BY d.fid, d.file_name
+                ORDER BY size DESC
+            """, (pdir_fid,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+def crawl(cookie: str, index: QuarkIndex, root_id: str = "0", concurrency: int = 4,
+          page_workers: int = 1, restart: bool = False, incremental: bool = False) -> Dict[str, int]:
+    """广度优先遍历网盘
+
+    最多concurrency个目录同时列出，共用一个keep-alive会话；
+    每个目录列完后立即落盘，中断后再次运行会从队列中未完成的目录继续。
+
+    incremental=True时以上次完整遍历的开始时间为水位：
+    - 目录按updated_at倒序列出，遇到水位之前的条目即停止翻页
+    - 只有updated_at晚于水位的子目录才会继续遍历，未变化的子树整体跳过
+      （依赖夸克在子项变化时更新上级目录的updated_at）
+    - 列出的条目数与索引对不上时（有删除或移出）再完整列出该目录
+    """
+    watermark = None
+    if incremental:
+        watermark = index.get_meta("watermark")
+        if watermark is None:
+            print("⚠ 还没有完整的索引，执行完整遍历")
+            incremental = False
+        else:
+            watermark = int(watermark) - WATERMARK_MARGIN_MS
+
+    seen_at = index.start_crawl(root_id, restart, incremental)
+    session = create_quark_session(cookie, concurrency * page_workers)
+
+    def list_dir(fid, full):
+        if full or watermark is None:
+            return list(iter_quark_files(cookie, fid, workers=page_workers, session=session)), True
+        changed, total = list_quark_changes(session, fid, watermark)
+        if index.child_count(fid) + index.count_new(fid, changed) == total:
+            return changed, False
+        return list(iter_quark_files(cookie, fid, workers=page_workers, session=session)), True
+
+    result = {"dirs": 0, "entries": 0, "changes": 0, "failed": 0}
+    started = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            inflight = {}
+            while True:
+                if len(inflight) < concurrency:
+                    for fid, full in index.pending_dirs(concurrency - len(inflight),
+                                                        [fid for fid, _ in inflight.values()]):
+                        inflight[executor.submit(list_dir, fid, full)] = (fid, full)
+                if not inflight:
+                    break
+
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fid, full = inflight.pop(future)
+                    try:
+                        items, complete = future.result()
+                    except Exception as e:
+                        print(f"✗ 列出目录 {fid} 失败: {e}")
+                        index.mark_failed(fid)
+                        result["failed"] += 1
+                        continue
+                    result["changes"] += index.save_listing(
+                        fid, items, seen_at, complete=complete, full=full,
+                        watermark=watermark, log_changes=incremental
+                    )
+                    result["dirs"] += 1
+                    result["entries"] += len(items)
+
+                    if result["dirs"] % 50 == 0:
+                        elapsed = time.time() - started
+                        print(f"  已遍历 {result['dirs']} 个目录，{result['entries']} 项，"
+                              f"{result['dirs'] / elapsed:.1f} 目录/秒")
+    finally:
+        session.close()
+
+    index.finish_crawl(seen_at)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="夸克网盘本地索引")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="索引数据库路径")
+    sub = parser.add_subparsers(dest="command")
+
+    p_crawl = sub.add_parser("crawl", help="遍历网盘建立索引（中断后再次运行可继续）")
+    p_crawl.add_argument("--root", default=None, help="起始目录fid (默认使用配置中的root_id)")
+    p_crawl.add_argument("--concurrency", type=int, default=4, help="同时列出的目录数")
+    p_crawl.add_argument("--page-workers", type=int, default=1, help="单个目录内并发请求的页数")
+    p_crawl.add_argument("--restart", action="store_true", help="丢弃未完成的队列，重新遍历")
+    p_crawl.add_argument("--incremental", action="store_true", help="只重新列出上次遍历后有变化的目录")
+
+    p_changes = sub.add_parser("changes", help="输出最近一次增量遍历的变更日志 (JSONL)")
+    p_changes.add_argument("--crawl-at", type=int, default=None, help="遍历开始时间戳(毫秒)")
+
+    p_search = sub.add_parser("search", help="按文件名搜索")
+    p_search.add_argument("keyword")
+    p_search.add_argument("--limit", type=int, default=50)
+
+    p_top = sub.add_parser("top", help="最大的文件")
+    p_top.add_argument("--limit", type=int, default=20)
+
+    p_sizes = sub.add_parser("sizes", help="子目录容量统计")
+    p_sizes.add_argument("--fid", default="0", help="父目录fid")
+
+    sub.add_parser("stats", help="索引概况")
+    args = parser.parse_args()
+
+    index = QuarkIndex(args.index)
+
+    if args.command == "crawl":
+        config = load_quark_config()
+        if not config or not config.get("cookie"):
+            print("请先配置夸克网盘")
+            return
+        root_id = args.root or config.get("root_id", "0")
+        print(f"=== 遍历夸克网盘 (根目录: {root_id}, 并发: {args.concurrency}) ===")
+        start = time.time()
+        result = crawl(config["cookie"], index, root_id, args.concurrency, args.page_workers,
+                       args.restart, args.incremental)
+        print(f"\n✓ 遍历 {result['dirs']} 个目录，{result['entries']} 项，耗时 {time.time() - start:.1f} 秒")
+        if args.incremental:
+            print(f"变更: {result['changes']} 项 (运行 changes 查看)")
+        if result["failed"]:
+            print(f"⚠ {result['failed']} 个目录失败，再次运行crawl会重试")
+
+    elif args.command == "changes":
+        for change in index.changes(args.crawl_at):
+            sys.stdout.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+    elif args.command == "search":
+        for item in index.search(args.keyword, args.limit):
+            icon = "📁" if item["is_dir"] else "📄"
+            print(f"{icon} {item['file_name']}  {format_size(item['size'])}  fid={item['fid']}")
+
+    elif args.command == "top":
+        for item in index.largest_files(args.limit):
+            print(f"{format_size(item['size']):>12}  {item['file_name']}  fid={item['fid']}")
+
+    elif args.command == "sizes":
+        for item in index.folder_sizes(args.fid):
+            print(f"{format_size(item['size']):>12}  {item['files']:>8} 个文件  📁 {item['file_name']}")
+
+    else:
+        stats = index.stats()
+        print("=== 夸克网盘索引 ===")
+        print(f"索引文件: {index.path}")
+        print(f"文件: {stats['files']}，文件夹: {stats['dirs']}，总大小: {format_size(stats['bytes'])}")
+        if stats["pending"]:
+            print(f"未完成目录: {stats['pending']} (运行crawl继续)")
+
+
+if __name__ == "__main__":
+    main()
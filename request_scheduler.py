@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+云盘API请求调度
+按主机限速(令牌桶)、AIMD自适应并发、带抖动的指数退避重试(遵循Retry-After)，
+让夸克/百度等接口在不被限流的前提下以最快速度运行
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+# 可以重试的状态码，同时触发降低并发
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# 响应分类：成功；被限流或服务端过载（降低并发并重试）；业务错误（不影响并发，直接返回）
+OK, THROTTLED, ERROR = "ok", "throttled", "error"
+
+
+def classify_http(response: requests.Response) -> str:
+    """默认分类：只看HTTP状态码"""
+    return THROTTLED if response.status_code in RETRY_STATUS else OK
+
+
+# 各主机的初始参数: rate(每秒请求数), burst(令牌桶容量), concurrency(初始并发), max_concurrency
+HOST_DEFAULTS = {
+    "drive.quark.cn": {"rate": 10, "burst": 10, "concurrency": 4, "max_concurrency": 16},
+    "pan.baidu.com": {"rate": 5, "burst": 5, "concurrency": 2, "max_concurrency": 8},
+    "openapi.baidu.com": {"rate": 1, "burst": 2, "concurrency": 1, "max_concurrency": 1},
+}
+DEFAULT_HOST = {"rate": 10, "burst": 10, "concurrency": 4, "max_concurrency": 32}
+
+
+class TokenBucket:
+    """令牌桶：平均速率rate，允许burst个请求的突发"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AIMDLimiter:
+    """AIMD并发控制
+
+    每成功一个"窗口"(当前并发数个请求)并发+1；被限流或出错时并发减半。
+    减半之前已发出的请求再失败不会重复减半，避免一次突发把并发降到最低。
+    success=None（业务错误）只归还名额，不调整并发。
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 32):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.inflight = 0
+        self.cond = threading.Condition()
+        self._started = 0
+        self._decreased_at = 0
+
+    def acquire(self) -> int:
+        """等待空位，返回本次请求的序号，release时传回"""
+        with self.cond:
+            while self.inflight >= int(self.limit):
+                self.cond.wait()
+            self.inflight += 1
+            self._started += 1
+            return self._started
+
+    def release(self, ticket: int, success: Optional[bool]):
+        with self.cond:
+            self.inflight -= 1
+            if success:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif success is False and ticket > self._decreased_at:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._decreased_at = self._started
+            self.cond.notify_all()
+
+
+class HostState:
+    def __init__(self, rate: float, burst: int, concurrency: int, max_concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AIMDLimiter(concurrency, maximum=max_concurrency)
+
+
+def retry_after_seconds(response: Optional[requests.Response]) -> Optional[float]:
+    """解析Retry-After头，支持秒数和HTTP日期两种格式"""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """共享的请求调度器，线程安全，同一进程内的工具共用"""
+
+    def __init__(self, max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 60.0,
+                 host_config: Optional[Dict[str, Dict[str, float]]] = None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.host_config = dict(HOST_DEFAULTS)
+        self.host_config.update(host_config or {})
+        self.session = requests.Session()
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostState:
+        hostname = urlsplit(url).hostname or ""
+        with self._lock:
+            state = self._hosts.get(hostname)
+            if state is None:
+                state = HostState(**self.host_config.get(hostname, DEFAULT_HOST))
+                self._hosts[hostname] = state
+            return state
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Retry-After优先，否则指数退避加全抖动"""
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, session: Optional[requests.Session] = None,
+                classify: Callable[[requests.Response], str] = classify_http,
+                **kwargs) -> requests.Response:
+        """发送请求；被限流(由classify判断)和连接错误按退避策略重试，重试耗尽后返回最后的响应或抛出异常
+
+        classify(response) 返回 OK / THROTTLED / ERROR。百度(errno)、夸克(JSON中的status)
+        在HTTP 200里报告限流，调用方需传入对应的分类函数，否则限流会被当作成功而继续加大并发
+        """
+        session = session or self.session
+        state = self.host(url)
+
+        for attempt in range(self.max_retries + 1):
+            ticket = state.limiter.acquire()
+            response = None
+            success: Optional[bool] = False
+            # 任何异常都要归还并发名额；限流、连接错误和异常都当作拥塞信号
+            try:
+                state.bucket.acquire()
+                try:
+                    response = session.request(method, url, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt == self.max_retries:
+                        raise
+                else:
+                    outcome = classify(response)
+                    if outcome != THROTTLED:
+                        success = True if outcome == OK else None
+                        return response
+                    if attempt == self.max_retries:
+                        return response
+            finally:
+                state.limiter.release(ticket, success=success)
+
+            time.sleep(self.backoff(attempt, response))
+
+        return response
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """进程内共享的调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
@@ -4,43 +4,39 @@ OpenList JWT认证测试脚本
 用于诊断和修复JWT token验证问题
 """
 
+import argparse
 import requests
 import json
 import sys
 
+from openlist_client import OpenListClient
+
 BASE_URL = "http://localhost:5244"
 
-def test_login(username, password):
-    """测试登录"""
-    url = f"{BASE_URL}/api/auth/login"
-    data = {"username": username, "password": password}
-    
+def test_login(username, password, fresh_login=False):
+    """测试登录，返回客户端
+
+    默认复用token缓存（未临近过期时不重复登录）；fresh_login=True时跳过缓存重新登录
+    """
+    client = OpenListClient(BASE_URL, username, password)
     try:
-        response = requests.post(url, json=data, timeout=10)
-        print(f"登录响应状态码: {response.status_code}")
-        print(f"登录响应内容: {response.text}")
-        
-        if response.status_code == 200:
-            token = response.json().get("data", {}).get("token")
-            if token:
-                print(f"✅ 成功获取token: {token[:50]}...")
-                return token
+        token = client.fresh_login() if fresh_login else client.token
+        if token:
+            print(f"✅ 成功获取token: {token[:50]}...")
+            return client
         return None
     except Exception as e:
         print(f"❌ 登录请求失败: {e}")
         return None
 
-def test_token_validation(token):
-    """测试token验证"""
-    if not token:
+def test_token_validation(client):
+    """测试token验证（复用客户端的连接池）"""
+    if not client:
         return False
     
     # 测试存储列表API
-    url = f"{BASE_URL}/api/admin/storage/list"
-    headers = {"Authorization": f"Bearer {token}"}
-    
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = client.raw("GET", "/api/admin/storage/list", timeout=10)
         print(f"\nToken验证响应状态码: {response.status_code}")
         print(f"Token验证响应内容: {response.text}")
         
@@ -82,6 +78,10 @@ def test_public_apis():
         print(f"公共设置测试失败: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="OpenList JWT认证诊断")
+    parser.add_argument("--fresh-login", action="store_true", help="跳过token缓存，重新登录获取新token")
+    args = parser.parse_args()
+
     print("=== OpenList JWT认证诊断 ===")
     
     # 测试公共API
@@ -89,15 +89,15 @@ def main():
     
     # 测试管理员登录
     print("\n=== 测试管理员登录 ===")
-    admin_token = test_login("admin", "admin")
-    if admin_token:
-        test_token_validation(admin_token)
+    admin_client = test_login("admin", "admin", args.fresh_login)
+    if admin_client:
+        test_token_validation(admin_client)
     
     # 测试访客登录
     print("\n=== 测试访客登录 ===")
-    guest_token = test_login("guest", "guest")
-    if guest_token:
-        test_token_validation(guest_token)
+    guest_client = test_login("guest", "guest", args.fresh_login)
+    if guest_client:
+        test_token_validation(guest_client)
     
     print("\n=== 诊断完成 ===")
 
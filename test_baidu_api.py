@@ -3,12 +3,15 @@
 测试百度网盘API
 """
 
-import requests
 import json
 import time
 import sqlite3
 import os
 
+from baidu_lister import classify_baidu, iter_baidu_files
+from baidu_token_cache import BaiduTokenCache, find_baidu_storage_id
+from request_scheduler import get_scheduler
+
 
 def get_baidu_config():
     """从数据库获取百度网盘配置"""
@@ -29,105 +32,38 @@ def get_baidu_config():
         return None
 
 
-def refresh_access_token(refresh_token, client_id, client_secret):
-    """使用refresh_token获取新的access_token"""
-    print("尝试刷新access_token...")
-
-    url = "https://openapi.baidu.com/oauth/2.0/token"
-    params = {
-        "grant_type": "refresh_token",
-        "refresh_token": refresh_token,
-        "client_id": client_id,
-        "client_secret": client_secret,
-    }
+def list_files(access_token, dir="/"):
+    """列出百度网盘目录下的全部文件（自动翻页）"""
+    print(f"\n尝试列出目录: {dir}")
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        print(f"刷新token状态码: {response.status_code}")
-
-        if response.status_code == 200:
-            data = response.json()
-            print(f"响应: {json.dumps(data, ensure_ascii=False)}")
-
-            if "access_token" in data:
-                new_access_token = data["access_token"]
-                new_refresh_token = data.get("refresh_token", refresh_token)
-                expires_in = data.get("expires_in", 2592000)
-
-                print(f"✅ 获取到新的access_token")
-                print(f"access_token: {new_access_token[:30]}...")
-                print(f"refresh_token: {new_refresh_token[:30]}...")
-                print(f"有效期: {expires_in}秒 ({expires_in / 86400:.1f}天)")
-
-                return new_access_token, new_refresh_token
+        files = list(iter_baidu_files(access_token, dir))
+        print(f"✅ 找到 {len(files)} 个文件/文件夹")
+
+        for i, file in enumerate(files[:10]):  # 只显示前10个
+            is_dir = file.get("isdir", 0) == 1
+            size = file.get("size", 0)
+            if size > 1024 * 1024 * 1024:
+                size_str = f"{size / (1024 * 1024 * 1024):.2f}GB"
+            elif size > 1024 * 1024:
+                size_str = f"{size / (1024 * 1024):.2f}MB"
+            elif size > 1024:
+                size_str = f"{size / 1024:.2f}KB"
             else:
-                print(f"❌ 响应中没有access_token: {data}")
-                return None, None
-        else:
-            print(f"❌ 刷新token失败: {response.text}")
-            return None, None
-    except Exception as e:
-        print(f"❌ 请求异常: {e}")
-        return None, None
-
+                size_str = f"{size}B"
 
-def list_files(access_token, dir="/"):
-    """列出百度网盘文件"""
-    print(f"\n尝试列出目录: {dir}")
-
-    url = "https://pan.baidu.com/rest/2.0/xpan/file"
-    params = {
-        "method": "list",
-        "access_token": access_token,
-        "dir": dir,
-        "order": "name",
-        "desc": "0",
-        "start": "0",
-        "limit": "100",
-        "web": "web",
-        "folder": "0",
-        "showempty": "0",
-    }
+            print(
+                f"  {i + 1:2d}. {'📁' if is_dir else '📄'} {file.get('server_filename', '未知')}"
+            )
+            print(f"      大小: {size_str}, 路径: {file.get('path', '未知')}")
 
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        print(f"列出文件状态码: {response.status_code}")
+        if len(files) > 10:
+            print(f"  ... 还有 {len(files) - 10} 个文件未显示")
+            print("  完整列表: python3 baidu_lister.py --jsonl files.jsonl [-r]")
 
-        if response.status_code == 200:
-            data = response.json()
-            if "list" in data:
-                files = data["list"]
-                print(f"✅ 找到 {len(files)} 个文件/文件夹")
-
-                for i, file in enumerate(files[:10]):  # 只显示前10个
-                    is_dir = file.get("isdir", 0) == 1
-                    size = file.get("size", 0)
-                    if size > 1024 * 1024 * 1024:
-                        size_str = f"{size / (1024 * 1024 * 1024):.2f}GB"
-                    elif size > 1024 * 1024:
-                        size_str = f"{size / (1024 * 1024):.2f}MB"
-                    elif size > 1024:
-                        size_str = f"{size / 1024:.2f}KB"
-                    else:
-                        size_str = f"{size}B"
-
-                    print(
-                        f"  {i + 1:2d}. {'📁' if is_dir else '📄'} {file.get('server_filename', '未知')}"
-                    )
-                    print(f"      大小: {size_str}, 路径: {file.get('path', '未知')}")
-
-                if len(files) > 10:
-                    print(f"  ... 还有 {len(files) - 10} 个文件未显示")
-
-                return files
-            else:
-                print(f"❌ 响应中没有文件列表: {data}")
-                return []
-        else:
-            print(f"❌ 列出文件失败: {response.text}")
-            return []
+        return files
     except Exception as e:
-        print(f"❌ 请求异常: {e}")
+        print(f"❌ 列出文件失败: {e}")
         return []
 
 
@@ -139,7 +75,7 @@ def get_quota_info(access_token):
     params = {"access_token": access_token, "checkfree": "1", "checkexpire": "1"}
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = get_scheduler().request("GET", url, params=params, timeout=10, classify=classify_baidu)
         print(f"容量查询状态码: {response.status_code}")
 
         if response.status_code == 200:
@@ -204,42 +140,30 @@ def main():
         print("❌ 缺少refresh_token")
         return
 
-    # 刷新access_token
-    access_token, new_refresh_token = refresh_access_token(
-        refresh_token, client_id, client_secret
-    )
+    # 获取access_token：优先使用缓存，临近过期时后台刷新，轮换的refresh_token由缓存写回数据库
+    token_cache = BaiduTokenCache(db_path="data/data.db")
+    storage_id = find_baidu_storage_id(token_cache.db_path)
+    if storage_id is None:
+        print("❌ 没有找到百度网盘存储")
+        return
+    access_token = token_cache.get_access_token(storage_id)
 
     if not access_token:
         print("❌ 无法获取access_token，测试终止")
         return
 
+    expires_at = token_cache.expires_at(storage_id)
+    print(f"✅ access_token: {access_token[:30]}...")
+    print(f"有效期至: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(expires_at))}")
+
     # 获取容量信息
     quota_info = get_quota_info(access_token)
 
     # 列出根目录文件
     files = list_files(access_token, "/")
 
-    # 如果有新的refresh_token，更新数据库
-    if new_refresh_token and new_refresh_token != refresh_token:
-        print(f"\n🔄 检测到新的refresh_token，更新数据库...")
-        try:
-            config["refresh_token"] = new_refresh_token
-            new_config_json = json.dumps(config)
-
-            conn = sqlite3.connect("data/data.db")
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE x_storages SET addition = ? WHERE driver = 'BaiduNetdisk'",
-                (new_config_json,),
-            )
-            conn.commit()
-            conn.close()
-
-            print(f"✅ 数据库已更新")
-            print(f"新的refresh_token: {new_refresh_token[:30]}...")
-        except Exception as e:
-            print(f"❌ 更新数据库失败: {e}")
-
+    # 等待可能正在进行的后台刷新写回refresh_token
+    token_cache.wait()
     print("\n✅ 测试完成")
 
 
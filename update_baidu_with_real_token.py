@@ -6,6 +6,9 @@
 import sqlite3
 import json
 import os
+import time
+
+from baidu_token_cache import BaiduTokenCache, find_baidu_storage_id
 
 
 def update_baidu_with_real_token():
@@ -174,8 +177,20 @@ def test_baidu_api():
         print(f"client_secret: {'*' * len(client_secret)}")
         print(f"refresh_token长度: {len(refresh_token)} 字符")
 
-        # 这里可以添加实际的API测试代码
-        # 需要实现OAuth2.0的token刷新和API调用
+        # 获取access_token：缓存未过期时不会请求OAuth接口
+        token_cache = BaiduTokenCache(db_path=db_path)
+        storage_id = find_baidu_storage_id(db_path)
+        if storage_id is None:
+            print("没有百度网盘配置")
+            return
+        access_token = token_cache.get_access_token(storage_id)
+        token_cache.wait()
+        if access_token:
+            expires_at = token_cache.expires_at(storage_id)
+            print(f"✅ access_token: {access_token[:30]}...")
+            print(f"有效期剩余: {(expires_at - time.time()) / 86400:.1f}天")
+        else:
+            print("❌ 获取access_token失败")
 
     except Exception as e:
         print(f"测试失败: {e}")
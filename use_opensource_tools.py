@@ -175,6 +175,7 @@ def generate_openlist_config(tokens):
         json.dump(config, f, ensure_ascii=False, indent=2)
     
     print(f"\n✓ OpenList配置已生成到 opensource_tokens_config.json")
+    print("增量应用到OpenList: python3 openlist_reconcile.py opensource_tokens_config.json")
     return config
 
 def main():
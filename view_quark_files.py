@@ -8,8 +8,28 @@ import requests
 import json
 import sqlite3
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from request_scheduler import ERROR, OK, THROTTLED, classify_http, get_scheduler
+
+
+def classify_quark(response):
+    """夸克接口的响应分类：HTTP 200时看JSON里的status，429或"频繁"类提示是限流"""
+    if response.status_code != 200:
+        return classify_http(response)
+    try:
+        data = response.json()
+    except ValueError:
+        return ERROR
+    status = data.get("status")
+    if status == 200:
+        return OK
+    if status == 429 or "频繁" in str(data.get("message", "")):
+        return THROTTLED
+    return ERROR
+
 
 def get_quark_config_from_db():
     """从数据库获取夸克网盘配置"""
@@ -77,7 +97,8 @@ def get_quark_files(cookie, root_id="0", page=1, size=100):
     print(f"页码: {page}, 每页大小: {size}")
 
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+        response = get_scheduler().request("POST", api_url, headers=headers, json=payload, timeout=30,
+                                           classify=classify_quark)
 
         print(f"状态码: {response.status_code}")
 
@@ -178,6 +199,108 @@ def get_quark_files(cookie, root_id="0", page=1, size=100):
         return None
 
 
+QUARK_SORT_URL = "https://drive.quark.cn/1/clouddrive/file/sort"
+QUARK_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) quark-cloud-drive/2.5.20 Chrome/100.0.4896.160 Electron/18.3.5.4-b478491100 Safari/537.36 Channel/pckk_other_ch"
+
+
+def create_quark_session(cookie, pool_size=8):
+    """创建复用keep-alive连接的会话，连接池大小与并发数一致"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": QUARK_USER_AGENT,
+        "Referer": "https://pan.quark.cn",
+        "Cookie": cookie,
+        "Content-Type": "application/json",
+        "Origin": "https://pan.quark.cn",
+    })
+    return session
+
+
+def fetch_quark_page(session, root_id="0", page=1, size=100, sort="file_type", order="asc"):
+    """获取一页目录内容，返回原始响应；失败时抛出异常"""
+    now = int(datetime.now().timestamp() * 1000)
+    payload = {
+        "pr": "ucpro",
+        "fr": "pc",
+        "uc_param_str": "",
+        "__dt": now,
+        "__t": now,
+        "pdir_fid": root_id,
+        "_page": page,
+        "_size": size,
+        "_fetch_total": 1,
+        "_fetch_sub_dirs": 0,
+        "_sort": sort,
+        "_order": order,
+        "force": 0,
+        "web": 1,
+    }
+    response = get_scheduler().request("POST", QUARK_SORT_URL, session=session, json=payload, timeout=30,
+                                       classify=classify_quark)
+    response.raise_for_status()
+    data = response.json()
+    if data.get("status") != 200:
+        raise RuntimeError(f"夸克API错误 (第{page}页): {data.get('message', '未知错误')}")
+    return data
+
+
+def iter_quark_files(cookie, root_id="0", size=100, workers=8, session=None):
+    """并发分页列出目录下的全部文件
+
+    先请求第1页拿到metadata._total，其余页交给有界线程池并发获取，
+    按页码顺序逐条yield；同一时间最多有workers*2页在途，内存占用与目录大小无关。
+    """
+    own_session = session is None
+    if own_session:
+        session = create_quark_session(cookie, workers)
+
+    try:
+        first = fetch_quark_page(session, root_id, 1, size)
+        yield from first.get("data", {}).get("list", [])
+
+        total = first.get("metadata", {}).get("_total", 0)
+        total_pages = (total + size - 1) // size
+        if total_pages <= 1:
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_page = 2
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < workers * 2:
+                    pending.append(executor.submit(fetch_quark_page, session, root_id, next_page, size))
+                    next_page += 1
+                data = pending.popleft().result()
+                yield from data.get("data", {}).get("list", [])
+    finally:
+        if own_session:
+            session.close()
+
+
+def list_quark_changes(session, root_id="0", since=0, size=100):
+    """增量列出目录
+
+    按updated_at倒序分页(_sort=updated_at, _order=desc)，
+    遇到updated_at不晚于since(毫秒)的条目即停止翻页，未变化的部分不再请求。
+    返回 (变化的条目列表, 目录下条目总数)
+    """
+    changed = []
+    page = 1
+    while True:
+        data = fetch_quark_page(session, root_id, page, size, sort="updated_at", order="desc")
+        total = data.get("metadata", {}).get("_total", 0)
+        items = data.get("data", {}).get("list", [])
+        for item in items:
+            if (item.get("updated_at") or 0) <= since:
+                return changed, total
+            changed.append(item)
+        if not items or page * size >= total:
+            return changed, total
+        page += 1
+
+
 def get_quark_capacity(cookie):
     """获取夸克网盘容量信息"""
 
@@ -191,7 +314,7 @@ def get_quark_capacity(cookie):
     api_url = "https://drive.quark.cn/1/clouddrive/capacity"
 
     try:
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = get_scheduler().request("GET", api_url, headers=headers, timeout=10, classify=classify_quark)
 
         if response.status_code == 200:
             data = response.json()
@@ -237,10 +360,8 @@ def get_quark_capacity(cookie):
         return None
 
 
-def main():
-    print("=== 夸克网盘文件查看工具 ===")
-
-    # 从数据库获取配置
+def load_quark_config():
+    """获取夸克网盘配置：优先数据库，其次Cookie备份文件"""
     config = get_quark_config_from_db()
 
     if not config:
@@ -253,9 +374,17 @@ def main():
                 cookie = f.read().strip()
                 config = {"cookie": cookie, "root_id": "0"}
                 print(f"从备份文件读取Cookie: {len(cookie)} 字符")
-        else:
-            print("请先配置夸克网盘")
-            return
+
+    return config
+
+
+def main():
+    print("=== 夸克网盘文件查看工具 ===")
+
+    config = load_quark_config()
+    if not config:
+        print("请先配置夸克网盘")
+        return
 
     cookie = config.get("cookie", "")
     root_id = config.get("root_id", "0")
@@ -286,10 +415,11 @@ def main():
             print("1. 查看下一页")
             print("2. 查看特定目录")
             print("3. 查看容量详情")
-            print("4. 退出")
+            print("4. 列出当前目录全部文件 (并发分页)")
+            print("5. 退出")
 
             try:
-                choice = input("\n请选择 (1-4): ").strip()
+                choice = input("\n请选择 (1-5): ").strip()
 
                 if choice == "1":
                     # 获取下一页
@@ -304,6 +434,21 @@ def main():
                 elif choice == "3":
                     get_quark_capacity(cookie)
 
+                elif choice == "4":
+                    start = datetime.now()
+                    file_count = folder_count = 0
+                    try:
+                        for file_item in iter_quark_files(cookie, root_id):
+                            if file_item.get("file", True):
+                                file_count += 1
+                            else:
+                                folder_count += 1
+                            print(f"{'📄' if file_item.get('file', True) else '📁'} {file_item.get('file_name', '未知')}")
+                    except (requests.exceptions.RequestException, RuntimeError) as e:
+                        print(f"✗ 列出文件中断: {e}")
+                    elapsed = (datetime.now() - start).total_seconds()
+                    print(f"\n共 {file_count} 个文件，{folder_count} 个文件夹，耗时 {elapsed:.1f} 秒")
+
             except:
                 print("使用默认选项")
 